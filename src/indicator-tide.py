@@ -25,14 +25,22 @@ import gettext
 gettext.install( INDICATOR_NAME )
 
 import gi
+gi.require_version( "Gdk", "3.0" )
 gi.require_version( "Gtk", "3.0" )
 gi.require_version( "Notify", "0.7" )
 
-from gi.repository import Gtk, Notify
-from indicatorbase import IndicatorBase
+from gi.repository import Gdk, GLib, Gtk, Notify
+from indicatorbase import CancellationToken, ConfigOption, IndicatorBase
 from pathlib import Path
+from tideaggregates import TideAggregates
+from tidealerts import TideAlertScheduler
+from tidegraph import TideCurveWindow
+from tideserver import TideReadingsServer
+from tidestore import TideEventStore
 
-import datetime, importlib.util, json, os, sys, webbrowser, config
+import tidecurve, tideicons, tiderecords, tideserver, tidestations, tidetimezone, tidetransport
+
+import atexit, bisect, datetime, importlib.util, inspect, json, math, os, sys, threading, time, webbrowser, config
 
 
 class IndicatorTide( IndicatorBase ):
@@ -42,7 +50,32 @@ class IndicatorTide( IndicatorBase ):
     CONFIG_USER_SCRIPT_CLASS_NAME = "userScriptClassName"
     CONFIG_USER_SCRIPT_PATH_AND_FILENAME = "userScriptPathAndFilename"
     CONFIG_DURATION_DAYS = "durationDays"
+    CONFIG_ALERTS = "alerts"
+    CONFIG_LOCATION = "location"
+    CONFIG_NEARBY_SEAPORT_COUNT = "nearbySeaportCount"
+    CONFIG_PUBLISH_READINGS = "publishReadings"
     CONFIG_SEAPORT_ID = "seaportId"
+    CONFIG_SHARED_CACHE_DIRECTORY = "sharedCacheDirectory"
+    CONFIG_STORE_EVENTS = "storeEvents"
+    CONFIG_TIMEZONE = "timezone"
+    CONFIG_TRANSPORT = "transport"
+    CONFIG_UPDATE_TIMEOUT = "updateTimeoutInSeconds"
+
+    COLUMN_SEAPORT_ID = 0
+    COLUMN_SEAPORT_LABEL = 1
+
+    ICON_DEFAULT_COLOUR = "ffffff" # Tide state icons, when the icon theme has no colour defined.
+
+    STATIONS_CACHE_BASENAME = "station-records-" # See tiderecords.
+    STATIONS_CACHE_MAXIMUM_AGE_HOURS = 24 * 7
+
+    SHARED_CACHE_MAXIMUM_AGE_IN_SECONDS = 30 * 60 # Matches the update interval.
+
+    # The readings of the last good update, shown at startup ahead of the first fetch and when a fetch fails; see tiderecords.
+    SNAPSHOT_CACHE_BASENAME = "readings-snapshot-"
+
+    MENU_ITEMS_MINIMUM = 5 # Always show at least this many tide/day menu items per page.
+    MENU_ITEMS_RESERVED = 6 # Location, Show tide curve, separator, Preferences, About, Quit.
 
 
     def __init__( self ):
@@ -57,6 +90,41 @@ class IndicatorTide( IndicatorBase ):
         self.userScriptPathAndFilename = ""
         self.durationDays = 7
         self.seaportId = ""
+        self.storeEvents = False
+        self.eventStore = None
+        self.timezone = "" # Empty for the system time zone.
+        self.countdownReadings = [ ] # Readings with a timestamp, sorted by timestamp.
+        self.countdownTimestamps = [ ] # Timestamps of the above, for bisection.
+        self.countdownIndex = 0 # Index of the next reading in the future.
+        self.countdownTimerID = None
+        self.views = [ ] # ( title, countdown readings, countdown timestamps ) per menu view; see __buildViews().
+        self.viewTitle = None # Title of the view shown; None for all readings.
+        self.viewMenus = [ ] # Menus of the views of the update underway.
+        self.alerts = [ ] # Alert rules; see TideAlertScheduler.
+        self.alertScheduler = None
+        self.location = "" # "latitude, longitude"; when set, used in lieu of the seaport ID.
+        self.nearbySeaportCount = 1
+        self.stationIndex = None
+        self.stationSpatialIndex = None
+        self.stationIndexLock = threading.Lock()
+        self.fetchedSeaportIds = [ ] # The seaports of the fetched readings.
+        self.transportMode = tidetransport.MODE_LIVE # Record/replay HTTP responses; see tidetransport.
+        self.transport = None
+        self.transportLock = threading.Lock() # Created on first use, from the fetch or the Preferences stations download.
+        self.sharedCacheDirectory = "" # When set, responses are shared with other processes/users; see tidesharedcache.
+        self.stateIcons = None # Tide state ( phase, level ) to icon file; see tideicons.
+        self.stateIconsColour = None
+        self.stateIntervals = [ ] # Consecutive readings, from which the tide state is found.
+        self.aggregates = None # Daily/per station summaries of the current readings.
+        self.curveWindow = None
+        self.publishReadings = True # Serve the readings to other processes; see tideserver.
+        self.readingsServer = None
+        self.readingsServerFailed = False # The server could not start (such as another process publishing); not retried until publishing is next enabled.
+        self.fetchedReadings = None # Readings obtained by fetch(), for the following update(); None on error.
+        self.fetchError = None # Menu label describing why no readings were fetched.
+        self.fetchedReadingsShown = False # False until the fetched readings are first shown (and then published/saved).
+        self.readingsNextUpdateTimestamp = None
+        self.saveSnapshot = True # Keep the fetched readings for startup/offline; not for the soak test, so the user's are kept.
         #Define the path to your icon file
         # Assuming 'my_tide_icon.png' is in the same directory as indicator-tide.py
         # If it's elsewhere, use its full path, e.g., Path.home() / ".indicator-tide" / "my_tide_icon.png"
@@ -73,69 +141,56 @@ class IndicatorTide( IndicatorBase ):
             icon = str(icon_path)
         )
         Notify.init( INDICATOR_NAME )
-        self.setLabel("Test Tooltip")
+        self.iconUpdateSupported = self.isIconUpdateSupported()
+        self.connectConfig( IndicatorTide.CONFIG_PUBLISH_READINGS, self.__onPublishReadingsChanged )
+        self.requestMouseWheelScrollEvents()
+
+
+    # Options other than display options are passed to (or determine the calls to) the user script.
+    def getConfigOptions( self ):
+        return [
+            ConfigOption( IndicatorTide.CONFIG_ALERTS, "alerts", [ ], display = True ),
+            ConfigOption( IndicatorTide.CONFIG_DURATION_DAYS, "durationDays", 7 ),
+            ConfigOption( IndicatorTide.CONFIG_LOCATION, "location", "" ),
+            ConfigOption( IndicatorTide.CONFIG_NEARBY_SEAPORT_COUNT, "nearbySeaportCount", 1 ),
+            ConfigOption( IndicatorTide.CONFIG_PUBLISH_READINGS, "publishReadings", True, display = True ),
+            ConfigOption( IndicatorTide.CONFIG_SEAPORT_ID, "seaportId", "" ),
+            ConfigOption( IndicatorTide.CONFIG_SHARED_CACHE_DIRECTORY, "sharedCacheDirectory", "" ),
+            ConfigOption( IndicatorTide.CONFIG_SHOW_AS_SUBMENUS, "showAsSubMenus", False, display = True ),
+            ConfigOption( IndicatorTide.CONFIG_SHOW_AS_SUBMENUS_EXCEPT_FIRST_DAY, "showAsSubMenusExceptFirstDay", False, display = True ),
+            ConfigOption( IndicatorTide.CONFIG_STORE_EVENTS, "storeEvents", False ),
+            ConfigOption( IndicatorTide.CONFIG_TIMEZONE, "timezone", "" ), # The user script formats dates/times in the time zone.
+            ConfigOption( IndicatorTide.CONFIG_TRANSPORT, "transportMode", tidetransport.MODE_LIVE ),
+            ConfigOption( IndicatorTide.CONFIG_UPDATE_TIMEOUT, "updateTimeoutInSeconds", IndicatorBase.UPDATE_TIMEOUT_IN_SECONDS ),
+            ConfigOption( IndicatorTide.CONFIG_USER_SCRIPT_CLASS_NAME, "userScriptClassName", "" ),
+            ConfigOption( IndicatorTide.CONFIG_USER_SCRIPT_PATH_AND_FILENAME, "userScriptPathAndFilename", "" ) ]
 
 
     def loadConfig( self, configDict ):
-        """
-        Loads configuration from the provided dictionary into instance attributes.
-        This method is called by IndicatorBase during initialization.
-        """
-        # --- START DEBUGGING PRINTS (to bypass logging issues) ---
-        print( f"DEBUG: IndicatorTide.loadConfig called. Received configDict: {configDict}" )
-        # --- END DEBUGGING PRINTS ---
-
-        self.getLogging().debug( "Loading configuration." )
-        self.getLogging().debug( f"Config dictionary received by loadConfig: {configDict}" ) # Keep this for if logging does work
-
-        if configDict:
-            self.showAsSubMenus = configDict.get( IndicatorTide.CONFIG_SHOW_AS_SUBMENUS, False )
-            self.showAsSubMenusExceptFirstDay = configDict.get( IndicatorTide.CONFIG_SHOW_AS_SUBMENUS_EXCEPT_FIRST_DAY, False )
-            self.userScriptClassName = configDict.get( IndicatorTide.CONFIG_USER_SCRIPT_CLASS_NAME, "" )
-            self.userScriptPathAndFilename = configDict.get( IndicatorTide.CONFIG_USER_SCRIPT_PATH_AND_FILENAME, "" )
-            self.durationDays = configDict.get( IndicatorTide.CONFIG_DURATION_DAYS, 7 )
-            self.seaportId = configDict.get( IndicatorTide.CONFIG_SEAPORT_ID, "" )
-
-        # --- START DEBUGGING PRINTS (to bypass logging issues) ---
-        print( f"DEBUG: IndicatorTide.loadConfig. userScriptPathAndFilename after load: {self.userScriptPathAndFilename}" )
-        # --- END DEBUGGING PRINTS ---
-        self.getLogging().debug( f"User script path after loadConfig: {self.userScriptPathAndFilename}" )
-
-
-    def saveConfig( self ):
-        """
-        Saves current instance attributes to a dictionary for persistence.
-        This method is called by IndicatorBase when configuration needs to be saved.
-        """
-        self.getLogging().debug( "Saving configuration." )
-        return {
-            IndicatorTide.CONFIG_SHOW_AS_SUBMENUS : self.showAsSubMenus,
-            # Corrected typo: 'showAsSubmenusExceptFirstDay' -> 'showAsSubMenusExceptFirstDay'
-            IndicatorTide.CONFIG_SHOW_AS_SUBMENUS_EXCEPT_FIRST_DAY : self.showAsSubMenusExceptFirstDay,
-            IndicatorTide.CONFIG_USER_SCRIPT_CLASS_NAME : self.userScriptClassName,
-            IndicatorTide.CONFIG_USER_SCRIPT_PATH_AND_FILENAME : self.userScriptPathAndFilename,
-            IndicatorTide.CONFIG_DURATION_DAYS : self.durationDays,
-            IndicatorTide.CONFIG_SEAPORT_ID : self.seaportId
-        }
-
-
-    def __onDurationChanged( self, spinButton ):
-        self.durationDays = spinButton.get_value_as_int()
+        self.getLogging().debug( "Loading configuration: %s", configDict ) # Formatted only when debug logging is enabled.
+        super().loadConfig( configDict )
 
 
     def buildMenu( self, menu, tidalReadings ):
-        menu.prepend( Gtk.MenuItem.new_with_label( tidalReadings[ 0 ].getLocation() ) )
         # Only populate if we have data to display.
         if tidalReadings:
             self.getLogging().debug( "Populating menu." )
 
             #self.portName = tidalReadings[ 0 ].getLocation()
 
-            if self.showAsSubMenus:
-                self.__buildSubMenus( menu, tidalReadings )
+            tidalReadingsByLocation = { }
+            for tide in tidalReadings:
+                tidalReadingsByLocation.setdefault( tide.getLocation(), [ ] ).append( tide )
+
+            if len( tidalReadingsByLocation ) == 1:
+                menu.prepend( Gtk.MenuItem.new_with_label( tidalReadings[ 0 ].getLocation() ) )
+                self.__buildLocationMenu( menu, tidalReadings )
 
             else:
-                self.__buildFlatMenu( menu, tidalReadings )
+                # Several seaports: a sub menu for each, built when first opened.
+                self.__appendPaged( menu, list( tidalReadingsByLocation.items() ), self.__getMenuItemsBudget(), self.__createLocationMenuItem )
+
+            self.__appendTideCurveMenuItem( menu, tidalReadings )
 
         else:
             self.getLogging().info( "No tidal readings to display." )
@@ -146,11 +201,62 @@ class IndicatorTide( IndicatorBase ):
             menu.append( menuItem )
 
 
+    def __appendTideCurveMenuItem( self, menu, tidalReadings ):
+        menuItem = Gtk.MenuItem( label = _( "Show tide curve..." ) )
+        menuItem.connect( "activate", self.__onShowTideCurve, tidalReadings )
+        menu.append( menuItem )
+
+
+    # Show the tide curve from the start of today for the duration, replacing any curve already shown.
+    def __onShowTideCurve( self, menuItem, tidalReadings ):
+        if self.curveWindow:
+            self.curveWindow.destroy()
+
+        timezone = tidetimezone.getTimezone( self.timezone )
+        startTimestamp = datetime.datetime.combine( datetime.datetime.now( timezone ).date(), datetime.time(), timezone ).timestamp()
+        self.curveWindow = TideCurveWindow(
+            _( "Tide curve" ),
+            tidalReadings,
+            startTimestamp,
+            startTimestamp + self.durationDays * 24 * 60 * 60,
+            self.timezone )
+
+        self.curveWindow.connect( "destroy", self.__onTideCurveDestroyed )
+        self.curveWindow.show_all()
+
+
+    def __onTideCurveDestroyed( self, window ):
+        if self.curveWindow is window:
+            self.curveWindow = None
+
+
+    def __createLocationMenuItem( self, locationAndTidalReadings ):
+        location, tidalReadings = locationAndTidalReadings
+        return self.__createLazySubMenuItem( location, lambda subMenu: self.__populateLocationMenu( subMenu, location, tidalReadings ) )
+
+
+    def __populateLocationMenu( self, menu, location, tidalReadings ):
+        summary = self.aggregates.getStation( location ) if self.aggregates else None
+        if summary:
+            maximumHigh, minimumLow, minimumRange, maximumRange = summary
+            self.__appendSummaryMenuItem( menu, [
+                ( _( "Highest {:.2f}m" ), maximumHigh ),
+                ( _( "lowest {:.2f}m" ), minimumLow ),
+                ( _( "range {:.2f}m to {:.2f}m" ), minimumRange, maximumRange ) ] )
+
+        self.__buildLocationMenu( menu, tidalReadings )
+
+
+    def __buildLocationMenu( self, menu, tidalReadings ):
+        if self.showAsSubMenus:
+            self.__buildSubMenus( menu, tidalReadings )
+
+        else:
+            self.__buildFlatMenu( menu, tidalReadings )
+
+
     def __buildFlatMenu( self, menu, tidalReadings ):
-        for tide in tidalReadings:
-            menuItem = Gtk.MenuItem( label = self.__formatLabel( tide ) )
-            menuItem.connect( "activate", self.__onItemClicked, tide.getURL() )
-            menu.append( menuItem )
+        self.__appendPaged( menu, tidalReadings, self.__getMenuItemsBudget(), self.__createTideMenuItem )
 
 
     def __buildSubMenus( self, menu, tidalReadings ):
@@ -158,44 +264,129 @@ class IndicatorTide( IndicatorBase ):
         # Format in "YYYY-MM-DD" style so we can compare to tide date string.
         now = datetime.datetime.now().strftime( "%Y-%m-%d" )
 
-        currentDay = None
-        currentDayMenu = None
-
-        # Build sub menus for each day.
+        # Group into top level entries: either a single tide (shown as a menu item)
+        # or a list of tides for a day (shown as a sub menu).
+        entries = [ ]
         for tide in tidalReadings:
-            # If this is a new day, create a new sub menu.
-            if tide.getDate() != currentDay:
-                currentDay = tide.getDate()
+            if self.showAsSubMenusExceptFirstDay and now == tide.getDate():
+                # The first menu item will always link to the primary tide.
+                entries.append( tide )
 
-                if self.showAsSubMenusExceptFirstDay and now == tide.getDate():
-                    # The first menu item will always link to the primary tide.
-                    menuItem = Gtk.MenuItem( label = self.__formatLabel( tide ) )
-                    menuItem.connect( "activate", self.__onItemClicked, tide.getURL() )
-                    menu.append( menuItem )
+            elif entries and isinstance( entries[ -1 ], list ) and entries[ -1 ][ 0 ].getDate() == tide.getDate():
+                # Add an item to display the next item of tide.
+                entries[ -1 ].append( tide )
+
+            else:
+                # If this is a new day, create a new sub menu.
+                entries.append( [ tide ] )
+
+        self.__appendPaged( menu, entries, self.__getMenuItemsBudget(), self.__createEntryMenuItem )
+
+
+    # The number of tide/day menu items which may be shown at the top level of the menu (or any "More..." page)
+    # without the menu exceeding the screen height.
+    def __getMenuItemsBudget( self ):
+        return max( IndicatorTide.MENU_ITEMS_MINIMUM, int( self.getMenuItemsGuess() ) - IndicatorTide.MENU_ITEMS_RESERVED )
+
+
+    # Append a menu item for each entry, up to the budget.
+    # Any remaining entries spill into a "More..." sub menu, itself paged in the same way,
+    # which is only built when first shown.
+    def __appendPaged( self, menu, entries, budget, createMenuItem ):
+        if len( entries ) <= budget:
+            for entry in entries:
+                menu.append( createMenuItem( entry ) )
+
+        else:
+            for entry in entries[ : budget - 1 ]:
+                menu.append( createMenuItem( entry ) )
+
+            remaining = entries[ budget - 1 : ]
+            menu.append(
+                self.__createLazySubMenuItem(
+                    _( "More..." ),
+                    lambda subMenu: self.__appendPaged( subMenu, remaining, budget, createMenuItem ) ) )
+
+
+    # Create a menu item with a sub menu which is populated (once) when first selected/shown,
+    # so that the cost of an update is only that of what the user actually opens.
+    #
+    # populate: Function taking the sub menu, which appends the menu items.
+    def __createLazySubMenuItem( self, label, populate ):
+        placeholder = Gtk.MenuItem( label = "..." )
+        placeholder.set_sensitive( False )
+        subMenu = Gtk.Menu()
+        subMenu.append( placeholder )
+
+        menuItem = Gtk.MenuItem( label = label )
+        menuItem.set_submenu( subMenu )
+        menuItem.connect( "select", self.__onLazySubMenu, subMenu, placeholder, populate )
+        subMenu.connect( "show", self.__onLazySubMenu, subMenu, placeholder, populate )
+        return menuItem
+
+
+    def __onLazySubMenu( self, widget, subMenu, placeholder, populate ):
+        if placeholder.get_parent() is subMenu: # Not yet populated.
+            subMenu.remove( placeholder )
+            placeholder.destroy()
+            populate( subMenu )
+            subMenu.show_all()
+
+
+    def __createEntryMenuItem( self, entry ):
+        if isinstance( entry, list ):
+            # Create an empty sub menu, filled with an item for each tide of the day when first opened.
+            menuItem = self.__createLazySubMenuItem( entry[ 0 ].getDate(), lambda dayMenu: self.__populateDayMenu( dayMenu, entry ) )
+
+        else:
+            menuItem = self.__createTideMenuItem( entry )
+
+        return menuItem
 
-                else:
-                    # Create the sub menu and add an item to display the first item of tide.
-                    currentDayMenu = Gtk.Menu()
-                    menuItem = Gtk.MenuItem( label = tide.getDate() )
-                    menuItem.set_submenu( currentDayMenu )
-                    menu.append( menuItem )
 
-                    menuItem = Gtk.MenuItem( label = self.__formatLabel( tide ) )
-                    menuItem.connect( "activate", self.__onItemClicked, tide.getURL() )
-                    currentDayMenu.append( menuItem )
+    def __populateDayMenu( self, dayMenu, tidalReadings ):
+        summary = self.aggregates.getDay( tidalReadings[ 0 ].getLocation(), tidalReadings[ 0 ].getDate() ) if self.aggregates else None
+        if summary:
+            maximumHigh, minimumLow, tidalRange, springNeapIndex = summary
+            if springNeapIndex >= TideAggregates.SPRINGS_THRESHOLD:
+                springNeap = _( "springs" )
+
+            elif springNeapIndex <= TideAggregates.NEAPS_THRESHOLD:
+                springNeap = _( "neaps" )
 
             else:
-                # Add an item to display the next item of tide.
-                if self.showAsSubMenusExceptFirstDay and now == tide.getDate():
-                    # The first menu item will always link to the primary tide.
-                    menuItem = Gtk.MenuItem( label = self.__formatLabel( tide ) )
-                    menuItem.connect( "activate", self.__onItemClicked, tide.getURL() )
-                    menu.append( menuItem )
+                springNeap = None
 
-                else:
-                    menuItem = Gtk.MenuItem( label = self.__formatLabel( tide ) )
-                    menuItem.connect( "activate", self.__onItemClicked, tide.getURL() )
-                    currentDayMenu.append( menuItem )
+            self.__appendSummaryMenuItem( dayMenu, [
+                ( _( "High {:.2f}m" ), maximumHigh ),
+                ( _( "low {:.2f}m" ), minimumLow ),
+                ( _( "range {:.2f}m" ), tidalRange ),
+                ( springNeap, ) ] )
+
+        for tide in tidalReadings:
+            dayMenu.append( self.__createTideMenuItem( tide ) )
+
+
+    # Append an insensitive header and separator summarising the readings which follow.
+    #
+    # parts: List of ( format, value, ... ); parts with an unknown (NaN) value or no format are omitted.
+    def __appendSummaryMenuItem( self, menu, parts ):
+        text = ", ".join(
+            part[ 0 ].format( *part[ 1 : ] )
+            for part in parts
+            if part[ 0 ] and not any( math.isnan( value ) for value in part[ 1 : ] ) )
+
+        if text:
+            menuItem = Gtk.MenuItem( label = text )
+            menuItem.set_sensitive( False )
+            menu.append( menuItem )
+            menu.append( Gtk.SeparatorMenuItem() )
+
+
+    def __createTideMenuItem( self, tide ):
+        menuItem = Gtk.MenuItem( label = self.__formatLabel( tide ) )
+        menuItem.connect( "activate", self.__onItemClicked, tide.getURL() )
+        return menuItem
 
 
     def __formatLabel( self, tide ):
@@ -212,19 +403,17 @@ class IndicatorTide( IndicatorBase ):
         #return "{} {} ({}): {}" tide.getTime(), tide.getLevel() 
 
 
-    def update( self, menu ):
-        # Set the default icon.
-        self.indicator.set_icon_full( self.icon, self.icon )
-
-        self.setLabel( self.portName )
-
-        nextUpdateInSeconds = 30 * 60 # Default to 30 minutes.
+    # Runs on a background thread; see IndicatorBase.fetch().
+    # Once cancelled, the readings of the previous fetch are kept (for re-rendering).
+    def fetch( self, cancellation ):
+        tidalReadings = None
+        seaportIds = [ ]
+        fetchError = None
 
         # Defensive check: If userScriptPathAndFilename is empty after init/loadConfig,
         # attempt to re-read it directly from the config file as a fallback.
         if not self.userScriptPathAndFilename:
             config_file_path = Path.home() / f".{INDICATOR_NAME}" / f"{INDICATOR_NAME}.json"
-            #print(f"DEBUG: Initial userScriptPathAndFilename empty. Checking fallback at: {config_file_path}")
             if config_file_path.exists():
                 try:
                     with open(config_file_path, 'r') as f:
@@ -233,18 +422,13 @@ class IndicatorTide( IndicatorBase ):
                         self.userScriptClassName = direct_config.get(IndicatorTide.CONFIG_USER_SCRIPT_CLASS_NAME, "") # Also load class name
                         self.durationDays = direct_config.get(IndicatorTide.CONFIG_DURATION_DAYS, 7) # Also load duration
                         self.seaportId = direct_config.get(IndicatorTide.CONFIG_SEAPORT_ID, "")
-
-                        # Print this for debugging, even if no logs are working
-                        print(f"DEBUG: Fallback config load SUCCESS: Path='{self.userScriptPathAndFilename}', Class='{self.userScriptClassName}', Duration={self.durationDays}")
+                        self.getLogging().debug( "Fallback config load: %s | %s, duration %s.", self.userScriptPathAndFilename, self.userScriptClassName, self.durationDays )
 
                 except json.JSONDecodeError as e: # Specific error for invalid JSON
-                    print(f"ERROR: Config file is invalid JSON: {e}")
                     self.getLogging().error(f"Config file is invalid JSON: {e}")
                 except Exception as e:
-                    print(f"ERROR: Failed to read config file directly during fallback: {e}")
                     self.getLogging().error(f"Failed to read config file directly during fallback: {e}")
             else:
-                print(f"DEBUG: Config file does not exist at {config_file_path}. No fallback possible.")
                 self.getLogging().error("Config file does not exist")
 
 
@@ -259,38 +443,471 @@ class IndicatorTide( IndicatorBase ):
                 # The user script has been loaded.
                 # Now try to obtain the tidal information from it.
                 try:
-                    tidalReadings = self.userScript.getTideData(
-                        logging = self.getLogging(),
-                        urlTimeoutInSeconds = IndicatorBase.URL_TIMEOUT_IN_SECONDS,
-                        durationDays = self.durationDays,
-                        seaportId = self.seaportId ) # Pass durationDays from preferences
-
-                    self.buildMenu( menu, tidalReadings )
+                    tidalReadings, seaportIds = self.__getTidalReadings( cancellation )
 
                 except Exception as e:
                     self.getLogging().error( "Error getting tidal data from user script: {} | {}.\n{}".format( self.userScriptPathAndFilename, self.userScriptClassName, e ) )
                     # Defensive check for showNotification
                     if hasattr(self, 'showNotification'):
                         self.showNotification( _( "Tidal information" ), _( "Error getting tidal data from user script: {}. Check the log for details." ).format( self.userScriptPathAndFilename ) )
-                    menuItem = Gtk.MenuItem( label = _( "Error getting data" ) )
-                    menuItem.set_sensitive( False )
-                    menu.append( menuItem )
+                    fetchError = _( "Error getting data" )
 
             else:
                 # The user script could not be loaded.
-                menuItem = Gtk.MenuItem( label = _( "User script error" ) )
-                menuItem.set_sensitive( False )
-                menu.append( menuItem )
+                fetchError = _( "User script error" )
 
         else:
             # User script not set up.
-            menuItem = Gtk.MenuItem( label = _( "User script not set" ) )
+            fetchError = _( "User script not set" )
+
+        if cancellation.isExpired() and not tidalReadings:
+            fetchError = _( "Timed out getting data" )
+
+        if not cancellation.isCancelled():
+            self.fetchedReadings = tidalReadings
+            self.fetchedSeaportIds = seaportIds
+            self.fetchError = fetchError
+            self.fetchedReadingsShown = False
+
+
+    def update( self, menu ):
+        # Set the default icon.
+        self.setIcon( self.icon )
+
+        self.setLabel( self.portName )
+
+        nextUpdateInSeconds = 30 * 60 # Default to 30 minutes.
+
+        self.views = [ ]
+        tidalReadings = self.fetchedReadings
+        if tidalReadings:
+            self.__showReadings( menu, tidalReadings )
+            if not self.fetchedReadingsShown: # Otherwise re-rendered following a change to a display option.
+                self.fetchedReadingsShown = True
+                self.readingsNextUpdateTimestamp = time.time() + nextUpdateInSeconds
+                self.__publishReadings( tidalReadings, self.readingsNextUpdateTimestamp )
+                if self.saveSnapshot:
+                    self.__writeSnapshot( tidalReadings )
+
+        elif self.__showSnapshot( menu ):
+            # Offline or otherwise failed; the last good readings are better than nothing.
+            if self.fetchError:
+                for viewMenu in self.viewMenus:
+                    menuItem = Gtk.MenuItem( label = self.fetchError )
+                    menuItem.set_sensitive( False )
+                    viewMenu.prepend( menuItem )
+
+        elif tidalReadings is not None:
+            self.__showReadings( menu, tidalReadings ) # No data.
+
+        else:
+            menuItem = Gtk.MenuItem( label = self.fetchError )
             menuItem.set_sensitive( False )
             menu.append( menuItem )
 
         return nextUpdateInSeconds
 
 
+    # Show the readings saved by the previous run ahead of the first fetch.
+    def updateFromCache( self, menu ):
+        self.views = [ ]
+        return self.__showSnapshot( menu )
+
+
+    def __showReadings( self, menu, tidalReadings ):
+        self.aggregates = TideAggregates( tidalReadings )
+        self.buildMenu( menu, tidalReadings )
+        self.__buildViews( menu, tidalReadings )
+        self.__setCountdown()
+        self.__setAlerts( tidalReadings )
+
+
+    # Precompute a menu and label countdown for each view cycled by the mouse wheel:
+    # all readings (the menu passed in), then each seaport or, with a single seaport, each day.
+    # Switching between views is then a swap, without fetching nor rebuilding the menu.
+    def __buildViews( self, menu, tidalReadings ):
+        readingsByView = { }
+        for tide in tidalReadings:
+            readingsByView.setdefault( tide.getLocation(), [ ] ).append( tide )
+
+        byDay = len( readingsByView ) == 1
+        if byDay:
+            readingsByView = { }
+            for tide in tidalReadings:
+                readingsByView.setdefault( tide.getDate(), [ ] ).append( tide )
+
+        views = [ ( None, tidalReadings ) ]
+        self.viewMenus = [ menu ]
+        if len( readingsByView ) > 1:
+            for title, readings in readingsByView.items():
+                viewMenu = self.createMenuView()[ 1 ]
+                if byDay:
+                    self.__buildDayViewMenu( viewMenu, readings, tidalReadings )
+
+                else:
+                    self.buildMenu( viewMenu, readings )
+
+                views.append( ( title, readings ) )
+                self.viewMenus.append( viewMenu )
+
+        self.views = [ ]
+        for title, readings in views:
+            countdownReadings = sorted(
+                ( tide for tide in readings if tide.getTimestamp() is not None ),
+                key = lambda tide: tide.getTimestamp() )
+
+            self.views.append( ( title, countdownReadings, [ tide.getTimestamp() for tide in countdownReadings ] ) )
+
+
+    # The tides of a single day, for a single seaport.
+    def __buildDayViewMenu( self, menu, tidalReadings, allTidalReadings ):
+        menu.append( Gtk.MenuItem.new_with_label( tidalReadings[ 0 ].getLocation() ) )
+        menuItem = Gtk.MenuItem( label = tidalReadings[ 0 ].getDate() )
+        menuItem.set_sensitive( False )
+        menu.append( menuItem )
+        self.__populateDayMenu( menu, tidalReadings )
+        self.__appendTideCurveMenuItem( menu, allTidalReadings )
+
+
+    # Cycle between the views; the menu and label are swapped for those precomputed.
+    def onMouseWheelScroll( self, indicator, delta, scrollDirection ):
+        if len( self.views ) > 1:
+            step = -1 if scrollDirection == Gdk.ScrollDirection.UP else 1
+            titles = [ view[ 0 ] for view in self.views ]
+            index = titles.index( self.viewTitle ) if self.viewTitle in titles else 0
+            self.__showView( ( index + step ) % len( self.views ) )
+
+
+    def __showView( self, index ):
+        self.viewTitle, self.countdownReadings, self.countdownTimestamps = self.views[ index ]
+        self.countdownIndex = 0
+        self.showMenuView( index )
+        if self.__updateCountdownLabel() and self.countdownTimerID is None:
+            self.__scheduleCountdownTick()
+
+
+    # The settings which determine the readings (including the time zone of their dates/times); a snapshot taken under other settings is not shown.
+    def __getSnapshotKey( self ):
+        return [ self.seaportId, self.location, self.nearbySeaportCount, self.durationDays, self.userScriptPathAndFilename, self.timezone ]
+
+
+    # The snapshot is a convenience; a failure is logged and never stops the update.
+    def __writeSnapshot( self, tidalReadings ):
+        try:
+            self.flushCache( IndicatorTide.SNAPSHOT_CACHE_BASENAME, 0 )
+            self.writeCacheBinary(
+                tiderecords.encodeReadings( tidalReadings, { "key" : self.__getSnapshotKey() } ),
+                IndicatorTide.SNAPSHOT_CACHE_BASENAME )
+
+        except Exception as e:
+            self.getLogging().error( "Error writing readings snapshot: {}".format( e ) )
+
+
+    # Populate the menu from the snapshot, marked as cached with its age.
+    #
+    # Returns True if there is a snapshot for the current settings; False otherwise.
+    def __showSnapshot( self, menu ):
+        tidalReadings = None
+        snapshot = self.readCacheBinary( IndicatorTide.SNAPSHOT_CACHE_BASENAME )
+        if snapshot:
+            try:
+                metadata = tiderecords.decodeMetadata( snapshot )
+                if metadata and metadata.get( "key" ) == self.__getSnapshotKey():
+                    tidalReadings = tiderecords.decodeReadings( snapshot )[ 0 ]
+
+            except ValueError as e:
+                self.getLogging().warning( "Ignoring readings snapshot: {}".format( e ) )
+
+        shown = bool( tidalReadings )
+        if shown:
+            self.__showReadings( menu, tidalReadings )
+            age = datetime.datetime.utcnow() - self.getCacheDateTime( IndicatorTide.SNAPSHOT_CACHE_BASENAME )
+            for viewMenu in self.viewMenus:
+                menuItem = Gtk.MenuItem( label = _( "Cached readings from {} ago" ).format( IndicatorTide.__formatAge( age ) ) )
+                menuItem.set_sensitive( False )
+                viewMenu.prepend( menuItem )
+
+            self.getLogging().debug( "Showing %s cached readings.", len( tidalReadings ) )
+
+        return shown
+
+
+    @staticmethod
+    def __formatAge( age ):
+        minutes = max( 0, int( age.total_seconds() // 60 ) )
+        if minutes < 60:
+            text = _( "{}m" ).format( minutes )
+
+        elif minutes < 48 * 60:
+            text = _( "{}h" ).format( minutes // 60 )
+
+        else:
+            text = _( "{}d" ).format( minutes // ( 24 * 60 ) )
+
+        return text
+
+
+    # Returns the event store if storing events is enabled, opening it as required; None otherwise.
+    def __getEventStore( self ):
+        if self.storeEvents:
+            if self.eventStore is None:
+                try:
+                    self.eventStore = TideEventStore( self.getCacheDirectory() + TideEventStore.FILENAME )
+
+                except Exception as e:
+                    self.getLogging().error( "Error opening event store: {}".format( e ) )
+
+        elif self.eventStore:
+            self.eventStore.close()
+            self.eventStore = None
+
+        return self.eventStore
+
+
+    # Obtain the tidal readings from the user script for each seaport, in turn.
+    # Past the deadline, seaports not yet fetched are filled from the event store (if enabled).
+    #
+    # Returns ( readings, seaport IDs ).
+    def __getTidalReadings( self, cancellation ):
+        tidalReadings = [ ]
+        seaportIds = self.__getSeaportIds( cancellation )
+        for seaportId in seaportIds:
+            if cancellation.isCancelled():
+                break
+
+            seaportTidalReadings = [ ]
+            if not cancellation.isExpired():
+                seaportTidalReadings = self.__getTideData(
+                    logging = self.getLogging(),
+                    urlTimeoutInSeconds = IndicatorBase.URL_TIMEOUT_IN_SECONDS,
+                    durationDays = self.durationDays,
+                    seaportId = seaportId, # Pass durationDays from preferences
+                    cacheDirectory = self.getCacheDirectory(),
+                    eventStore = self.__getEventStore(),
+                    timezoneName = self.timezone,
+                    transport = self.__getTransport(),
+                    cancellation = cancellation )
+
+            if not seaportTidalReadings and self.storeEvents and not cancellation.isCancelled():
+                seaportTidalReadings = self.__getTidalReadingsFromEventStore( seaportId )
+
+            tidalReadings.extend( seaportTidalReadings )
+
+        return tidalReadings, seaportIds
+
+
+    # Make the readings available to other processes on the host, if enabled.
+    # A failure is logged and never stops the update.
+    def __publishReadings( self, tidalReadings, nextUpdateTimestamp ):
+        try:
+            readingsServer = self.__getReadingsServer()
+            if readingsServer:
+                stationsById = { station.id : station for station in self.stationIndex.getStations() } if self.stationIndex else { }
+                stations = [ ]
+                for seaportId in self.fetchedSeaportIds:
+                    station = stationsById.get( seaportId )
+                    stations.append( {
+                        "id" : seaportId,
+                        "name" : station.name if station else None,
+                        "latitude" : station.latitude if station else None,
+                        "longitude" : station.longitude if station else None } )
+
+                readingsServer.publish( tidalReadings, stations, nextUpdateTimestamp )
+
+        except Exception as e:
+            self.getLogging().error( "Error publishing readings: {}".format( e ) )
+
+
+    def __onPublishReadingsChanged( self, key, previousValue, value ):
+        self.readingsServerFailed = False
+        if value and self.fetchedReadings:
+            self.__publishReadings( self.fetchedReadings, self.readingsNextUpdateTimestamp )
+
+        else:
+            self.__getReadingsServer() # Starts or stops the server.
+
+
+    # Returns the readings server if publishing is enabled, starting it as required; None otherwise.
+    def __getReadingsServer( self ):
+        if self.publishReadings:
+            if self.readingsServer is None and not self.readingsServerFailed:
+                try:
+                    readingsServer = TideReadingsServer( tideserver.getDefaultSocketPath( INDICATOR_NAME ), self.getLogging() )
+                    readingsServer.start()
+                    atexit.register( readingsServer.stop )
+                    self.readingsServer = readingsServer
+
+                except Exception as e:
+                    self.getLogging().error( "Error starting readings server: {}".format( e ) )
+                    self.readingsServerFailed = True # Do not retry every update; the setting is left as the user chose.
+
+        elif self.readingsServer:
+            atexit.unregister( self.readingsServer.stop )
+            self.readingsServer.stop()
+            self.readingsServer = None
+
+        return self.readingsServer
+
+
+    # The transport for HTTP access, created for the configured mode (live, record, replay),
+    # sharing responses through the shared cache directory if set.
+    def __getTransport( self ):
+        with self.transportLock:
+            if self.transport is None:
+                transport = tidetransport.createTransport( self.transportMode, self.getCacheDirectory() )
+                if self.transportMode != tidetransport.MODE_LIVE:
+                    self.getLogging().warning( "HTTP transport mode: " + self.transportMode )
+
+                if self.sharedCacheDirectory:
+                    try:
+                        transport = tidetransport.SharedCacheTransport(
+                            os.path.join( os.path.expanduser( self.sharedCacheDirectory ), "" ),
+                            IndicatorTide.SHARED_CACHE_MAXIMUM_AGE_IN_SECONDS,
+                            self.getLogging(),
+                            transport )
+
+                    except Exception as e:
+                        self.getLogging().error( "Error opening shared cache directory {}: {}".format( self.sharedCacheDirectory, e ) )
+
+                self.transport = transport
+
+            return self.transport
+
+
+    # The seaports for which to obtain tidal readings:
+    # those nearest the location if a location is set, otherwise the selected seaport.
+    def __getSeaportIds( self, cancellation ):
+        seaportIds = [ self.seaportId ]
+        location = tidestations.parseLocation( self.location )
+        if location:
+            self.__getStationIndex( cancellation )
+            if self.stationSpatialIndex:
+                nearest = self.stationSpatialIndex.getNearest( *location, self.nearbySeaportCount )
+                seaportIds = [ station.id for distance, station in nearest ]
+
+            else:
+                self.getLogging().warning( "No station list from which to find the nearest seaports; using the selected seaport." )
+
+        return seaportIds
+
+
+    # When the user script yields nothing (offline, API down), fall back to previously stored events for the window.
+    def __getTidalReadingsFromEventStore( self, seaportId ):
+        tidalReadings = [ ]
+        eventStore = self.__getEventStore()
+        if eventStore:
+            timezone = tidetimezone.getTimezone( self.timezone )
+            start = datetime.datetime.combine( datetime.datetime.now( timezone ).date(), datetime.time(), timezone )
+            end = start + datetime.timedelta( days = self.durationDays )
+            tidalReadings = eventStore.getReadings( start.timestamp(), end.timestamp(), seaportId, "", self.timezone )
+            self.getLogging().info( "Using {} stored tidal events.".format( len( tidalReadings ) ) )
+
+        return tidalReadings
+
+
+    # Call the user script, passing only those arguments its getTideData() accepts,
+    # so that scripts written against an older TideDataGetterBase continue to work.
+    def __getTideData( self, **kwargs ):
+        parameters = inspect.signature( self.userScript.getTideData ).parameters
+        acceptsAnyKeyword = any( parameter.kind == inspect.Parameter.VAR_KEYWORD for parameter in parameters.values() )
+        if not acceptsAnyKeyword:
+            kwargs = { key : value for key, value in kwargs.items() if key in parameters }
+
+        return self.userScript.getTideData( **kwargs )
+
+
+    def __setAlerts( self, tidalReadings ):
+        if self.alertScheduler is None:
+            self.alertScheduler = TideAlertScheduler( self.showNotification, self.getLogging() )
+
+        self.alertScheduler.setRules( self.alerts )
+        self.alertScheduler.setReadings( tidalReadings )
+
+
+    # Show the upcoming tides of the current view (as precomputed by __buildViews()) in the label countdown
+    # and start the ticker if not already running.
+    # The view shown before the update is kept if still present; otherwise all readings are shown.
+    def __setCountdown( self ):
+        self.stateIntervals = tidecurve.getIntervals( self.views[ 0 ][ 1 ] )
+        titles = [ view[ 0 ] for view in self.views ]
+        self.__showView( titles.index( self.viewTitle ) if self.viewTitle in titles else 0 )
+
+
+    # A single timer, aligned to the next minute boundary.
+    # Only ever updates the label and icon; never the menu nor the tidal data.
+    def __scheduleCountdownTick( self ):
+        millisecondsToNextMinute = int( ( 60 - time.time() % 60 ) * 1000 ) + 1
+        self.countdownTimerID = GLib.timeout_add( millisecondsToNextMinute, self.__onCountdownTick )
+
+
+    def __onCountdownTick( self ):
+        self.countdownTimerID = None
+        if self.__updateCountdownLabel():
+            self.__scheduleCountdownTick()
+
+        return False
+
+
+    # Set the label to the next tide and the time remaining, such as "High 02:32 PM in 1h05m",
+    # preceded by the title of the view (if any).
+    #
+    # Returns True if there is a next tide; False otherwise.
+    def __updateCountdownLabel( self ):
+        now = time.time()
+        if self.countdownIndex < len( self.countdownTimestamps ) and self.countdownTimestamps[ self.countdownIndex ] <= now:
+            self.countdownIndex = bisect.bisect_right( self.countdownTimestamps, now, self.countdownIndex )
+
+        if self.countdownIndex < len( self.countdownReadings ):
+            tide = self.countdownReadings[ self.countdownIndex ]
+            minutes = int( ( tide.getTimestamp() - now ) // 60 )
+            label = _( "{0} {1} in {2}h{3:02d}m" ).format(
+                _( "High" ) if tide.isHigh() else _( "Low" ),
+                tide.getTime(),
+                minutes // 60,
+                minutes % 60 )
+
+            self.setLabel( _( "{0}: {1}" ).format( self.viewTitle, label ) if self.viewTitle else label )
+
+            self.__updateStateIcon( now, tide.getLocation() )
+            hasNext = True
+
+        else:
+            self.setLabel( self.viewTitle if self.viewTitle else self.portName )
+            self.setIcon( self.icon )
+            hasNext = False
+
+        return hasNext
+
+
+    # Set the icon to the state of the tide (phase and level) at the location, switching between pre-rendered icons.
+    def __updateStateIcon( self, now, location ):
+        if self.iconUpdateSupported:
+            icon = self.icon
+            state = tideicons.getState( self.stateIntervals, now, location )
+            if state:
+                icons = self.__getStateIcons()
+                if icons:
+                    icon = icons[ state ]
+
+            self.setIcon( icon )
+
+
+    # Returns the state icons for the current theme colour, writing them to the cache if not already present;
+    # None on error.
+    def __getStateIcons( self ):
+        colour = self.getIconThemeColour( IndicatorTide.ICON_DEFAULT_COLOUR )
+        if colour != self.stateIconsColour:
+            self.stateIconsColour = colour
+            try:
+                self.stateIcons = tideicons.createIcons( self.getCacheDirectory(), colour )
+
+            except Exception as e:
+                self.stateIcons = None
+                self.getLogging().error( "Error creating tide state icons: {}".format( e ) )
+
+        return self.stateIcons
+
+
     def onPreferences( self, dialog ):
         # The dialog is already created and passed from the base class's __onPreferencesInternal.
         # Removed recursive call and redundant dialog property settings.
@@ -346,36 +963,109 @@ class IndicatorTide( IndicatorBase ):
         grid.attach( self.userScriptClassNameEntry, 1, current_row, 1, 1 )
         current_row += 1
 
-        # Seaport ID ComboBox.
+        # Location, in lieu of a seaport.
+        locationLabel = Gtk.Label( label = _( "Location:" ), xalign = 0 )
+        self.locationEntry = Gtk.Entry()
+        self.locationEntry.set_hexpand( True )
+        self.locationEntry.set_text( self.location )
+        self.locationEntry.set_placeholder_text( _( "latitude, longitude" ) )
+        self.locationEntry.set_tooltip_text( _(
+            "Your location, as decimal degrees latitude, longitude,\n" +
+            "such as 50.10, -5.54\n\n" +
+            "When set, tides for the nearest seaports are shown\n" +
+            "rather than for the seaport selected below." ) )
+        grid.attach( locationLabel, 0, current_row, 1, 1 )
+        grid.attach( self.locationEntry, 1, current_row, 1, 1 )
+        current_row += 1
+
+        nearbySeaportCountLabel = Gtk.Label( label = _( "Nearby seaports:" ), xalign = 0 )
+        self.nearbySeaportCountSpinButton = self.createSpinButton(
+            initialValue = self.nearbySeaportCount,
+            minimumValue = 1,
+            maximumValue = 10,
+            toolTip = _( "The number of seaports nearest your location to show." ) )
+        grid.attach( nearbySeaportCountLabel, 0, current_row, 1, 1 )
+        grid.attach( self.nearbySeaportCountSpinButton, 1, current_row, 1, 1 )
+        current_row += 1
+
+        # Seaport: type-ahead search over the station list.
         seaportIdLabel = Gtk.Label( label = _( "Seaport:" ), xalign = 0 )
-        self.seaportIdComboBox = Gtk.ComboBoxText()
-        self.seaportIdComboBox.set_hexpand(True)
+        seaportIdLabel.set_valign( Gtk.Align.START )
+        self.seaportSearchEntry = Gtk.SearchEntry()
+        self.seaportSearchEntry.set_hexpand( True )
+        self.seaportSearchEntry.set_tooltip_text( _( "Search by seaport name or ID." ) )
+
+        # Shown whilst the station list downloads.
+        stationsSpinner = Gtk.Spinner()
+        stationsSpinner.set_tooltip_text( _( "Updating the list of seaports..." ) )
+        stationsSpinner.set_no_show_all( True )
+
+        seaportSearchBox = Gtk.Box( orientation = Gtk.Orientation.HORIZONTAL, spacing = 5 )
+        seaportSearchBox.pack_start( self.seaportSearchEntry, True, True, 0 )
+        seaportSearchBox.pack_start( stationsSpinner, False, False, 0 )
+
+        self.seaportTreeView = Gtk.TreeView()
+        self.seaportTreeView.set_headers_visible( False )
+        self.seaportTreeView.append_column( Gtk.TreeViewColumn( "", Gtk.CellRendererText(), text = IndicatorTide.COLUMN_SEAPORT_LABEL ) )
+        self.seaportTreeView.set_enable_search( False )
+
+        scrolledWindow = Gtk.ScrolledWindow()
+        scrolledWindow.set_policy( Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC )
+        scrolledWindow.set_min_content_height( 150 )
+        scrolledWindow.set_vexpand( True )
+        scrolledWindow.add( self.seaportTreeView )
+
+        seaportBox = Gtk.Box( orientation = Gtk.Orientation.VERTICAL, spacing = 5 )
+        seaportBox.pack_start( seaportSearchBox, False, False, 0 )
+        seaportBox.pack_start( scrolledWindow, True, True, 0 )
         grid.attach( seaportIdLabel, 0, current_row, 1, 1 )
-        grid.attach( self.seaportIdComboBox, 1, current_row, 1, 1 )
+        grid.attach( seaportBox, 1, current_row, 1, 1 )
         current_row += 1
-        
-        try:
-            import requests
-            stations_url = "https://admiraltyapi.azure-api.net/uktidalapi/api/V1/Stations"
-            headers = {"Ocp-Apim-Subscription-Key": config.API_KEY}
-            response = requests.get(stations_url, headers=headers, timeout=10)
-            response.raise_for_status()
-            stations_data = response.json()
-            
-            stations = sorted(stations_data['features'], key=lambda x: x['properties']['Name'])
-            
-            for station in stations:
-                station_id = station['properties']['Id']
-                station_name = station['properties']['Name']
-                self.seaportIdComboBox.append(station_id, f"{station_name} ({station_id})")
-            
-            self.seaportIdComboBox.set_active_id(self.seaportId)
 
-        except Exception as e:
-            self.getLogging().error(f"Failed to fetch or process station list: {e}")
-            self.seaportIdComboBox.append(self.seaportId, f"Could not load stations (ID: {self.seaportId})")
-            self.seaportIdComboBox.set_active(0)
+        self.selectedSeaportId = self.seaportId
+        self.seaportTreeView.get_selection().connect( "changed", self.__onSeaportSelected )
+        self.seaportSearchEntry.connect( "search-changed", self.__onSeaportSearchChanged )
+        self.locationEntry.connect( "changed", lambda entry: self.__filterSeaports( self.seaportSearchEntry.get_text() ) )
+        self.__filterSeaports( "" ) # From the cached list, if any, else just the current seaport.
+
+        # The station list is refreshed in the background; the dialog closing cancels the download and refill.
+        stationsCancellation = CancellationToken()
+        if self.__isStationListStale():
+            stationsSpinner.show()
+            stationsSpinner.start()
+            threading.Thread( target = self.__loadStations, args = ( stationsCancellation, stationsSpinner ), name = "Stations", daemon = True ).start()
+
+
+        # Time zone.
+        timezoneLabel = Gtk.Label( label = _( "Time zone:" ), xalign = 0 )
+        self.timezoneEntry = Gtk.Entry()
+        self.timezoneEntry.set_hexpand( True )
+        self.timezoneEntry.set_text( self.timezone )
+        self.timezoneEntry.set_placeholder_text( tidetimezone.getSystemTimezoneName() )
+        self.timezoneEntry.set_tooltip_text( _( "The time zone in which to show tide times,\nsuch as Europe/London.\n\nLeave empty to use the system time zone." ) )
+        grid.attach( timezoneLabel, 0, current_row, 1, 1 )
+        grid.attach( self.timezoneEntry, 1, current_row, 1, 1 )
+        current_row += 1
 
+        # Store events locally.
+        storeEventsLabel = Gtk.Label( label = _( "Store tide events locally?" ), xalign = 0 )
+        storeEventsSwitch = Gtk.Switch()
+        storeEventsSwitch.set_halign( Gtk.Align.END )
+        storeEventsSwitch.set_active( self.storeEvents )
+        storeEventsSwitch.set_tooltip_text( _( "Keep all fetched tide events in a local database,\nused when the tidal information cannot be obtained." ) )
+        grid.attach( storeEventsLabel, 0, current_row, 1, 1 )
+        grid.attach( storeEventsSwitch, 1, current_row, 1, 1 )
+        current_row += 1
+
+        # Publish readings to other processes.
+        publishReadingsLabel = Gtk.Label( label = _( "Share tide data with other programs?" ), xalign = 0 )
+        publishReadingsSwitch = Gtk.Switch()
+        publishReadingsSwitch.set_halign( Gtk.Align.END )
+        publishReadingsSwitch.set_active( self.publishReadings )
+        publishReadingsSwitch.set_tooltip_text( _( "Serve the current tide data on a local socket,\nso other programs need not fetch it again." ) )
+        grid.attach( publishReadingsLabel, 0, current_row, 1, 1 )
+        grid.attach( publishReadingsSwitch, 1, current_row, 1, 1 )
+        current_row += 1
 
         # Duration Days (preference control)
         durationDaysLabel = Gtk.Label( label = _( "Duration (days):" ), xalign = 0 )
@@ -387,7 +1077,6 @@ class IndicatorTide( IndicatorBase ):
             pageIncrement = 7,
             toolTip = _( "Number of days for which to fetch tidal information." )
         )
-        self.durationDaysSpinButton.connect( "value-changed", self.__onDurationChanged )
         grid.attach( durationDaysLabel, 0, current_row, 1, 1 )
         grid.attach( self.durationDaysSpinButton, 1, current_row, 1, 1 )
         current_row += 1
@@ -395,6 +1084,7 @@ class IndicatorTide( IndicatorBase ):
 
         dialog.show_all()
         response = dialog.run()
+        stationsCancellation.cancel( "Preferences closed" )
 
 
         # Update instance attributes if OK was clicked.
@@ -404,8 +1094,15 @@ class IndicatorTide( IndicatorBase ):
             self.showAsSubMenusExceptFirstDay = showAsSubMenusExceptFirstDaySwitch.get_active()
             self.userScriptClassName = self.userScriptClassNameEntry.get_text().strip()
             self.userScriptPathAndFilename = self.userScriptPathAndFilenameEntry.get_text().strip()
-            self.seaportId = self.seaportIdComboBox.get_active_id()
-            # self.durationDays is already updated by __onDurationChanged
+            if self.selectedSeaportId:
+                self.seaportId = self.selectedSeaportId
+
+            self.location = self.locationEntry.get_text().strip()
+            self.nearbySeaportCount = self.nearbySeaportCountSpinButton.get_value_as_int()
+            self.storeEvents = storeEventsSwitch.get_active()
+            self.publishReadings = publishReadingsSwitch.get_active()
+            self.timezone = self.timezoneEntry.get_text().strip()
+            self.durationDays = self.durationDaysSpinButton.get_value_as_int()
 
 
             # Invalidate user script so it is reloaded with potentially new path/class name.
@@ -414,6 +1111,119 @@ class IndicatorTide( IndicatorBase ):
         return response
 
 
+    # Return the index over the station list, built once from the cached list of stations.
+    # The list is downloaded when the cache is missing or stale; None if no list can be obtained.
+    #
+    # May access the network, so must not be called on the main loop; see __getCachedStationIndex().
+    def __getStationIndex( self, cancellation ):
+        with self.stationIndexLock: # Only one download at a time (fetch and Preferences).
+            if self.__isStationListStale():
+                stations = None
+                if self.isCacheStale( datetime.datetime.utcnow(), IndicatorTide.STATIONS_CACHE_BASENAME, IndicatorTide.STATIONS_CACHE_MAXIMUM_AGE_HOURS ):
+                    try:
+                        stations_url = "https://admiraltyapi.azure-api.net/uktidalapi/api/V1/Stations"
+                        headers = {"Ocp-Apim-Subscription-Key": config.API_KEY}
+                        response = self.__getTransport().get(stations_url, headers, 10, cancellation)
+                        response.raise_for_status()
+                        stations = tidestations.parseStations( response.text )
+                        self.flushCache( IndicatorTide.STATIONS_CACHE_BASENAME, 0 )
+                        self.writeCacheBinary( tiderecords.encodeStations( stations ), IndicatorTide.STATIONS_CACHE_BASENAME )
+
+                    except Exception as e:
+                        self.getLogging().error( f"Failed to fetch station list: {e}" )
+
+                if stations:
+                    self.__setStations( stations )
+
+                else:
+                    self.__getCachedStationIndex() # May be stale, but better than nothing.
+
+        return self.stationIndex
+
+
+    # Return the index over the station list, from memory or else the cache (however old), without network access;
+    # None if there is no cached list.
+    def __getCachedStationIndex( self ):
+        if self.stationIndex is None:
+            stationRecords = self.readCacheBinary( IndicatorTide.STATIONS_CACHE_BASENAME )
+            if stationRecords:
+                try:
+                    self.__setStations( tiderecords.decodeStations( stationRecords )[ 0 ] )
+
+                except ValueError as e:
+                    self.getLogging().error( f"Failed to process station list: {e}" )
+
+        return self.stationIndex
+
+
+    def __setStations( self, stations ):
+        stationSpatialIndex = tidestations.StationSpatialIndex( stations )
+        self.stationIndex = tidestations.StationIndex( stations )
+        self.stationSpatialIndex = stationSpatialIndex
+
+
+    def __isStationListStale( self ):
+        return \
+            self.stationIndex is None or \
+            self.isCacheStale( datetime.datetime.utcnow(), IndicatorTide.STATIONS_CACHE_BASENAME, IndicatorTide.STATIONS_CACHE_MAXIMUM_AGE_HOURS )
+
+
+    # Download the station list if stale, on a background thread, then refill the seaport list unless the dialog has closed.
+    def __loadStations( self, cancellation, spinner ):
+        if not cancellation.isCancelled():
+            self.__getStationIndex( cancellation )
+
+        GLib.idle_add( self.__onStationsLoaded, cancellation, spinner )
+
+
+    def __onStationsLoaded( self, cancellation, spinner ):
+        if not cancellation.isCancelled():
+            spinner.stop()
+            spinner.hide()
+            self.__filterSeaports( self.seaportSearchEntry.get_text() )
+
+
+    # Refill the seaport list with the stations matching the search text, in a single batch.
+    # With no search text and a location, the nearest seaports are listed first.
+    def __filterSeaports( self, searchText ):
+        stationIndex = self.__getCachedStationIndex()
+        location = tidestations.parseLocation( self.locationEntry.get_text() )
+        if stationIndex and not searchText.strip() and location and self.stationSpatialIndex:
+            nearest = self.stationSpatialIndex.getNearest( *location, len( stationIndex.getStations() ) )
+            stations = [ ( station.id, "{} - {:.0f} km".format( station.getLabel(), distance ) ) for distance, station in nearest ]
+            nearestIds = { station.id for distance, station in nearest }
+            stations.extend( ( station.id, station.getLabel() ) for station in stationIndex.getStations() if station.id not in nearestIds )
+
+        elif stationIndex:
+            stations = [ ( station.id, station.getLabel() ) for station in stationIndex.search( searchText ) ]
+
+        else:
+            stations = [ ( self.seaportId, _( "Could not load stations (ID: {})" ).format( self.seaportId ) ) ]
+
+        listStore = Gtk.ListStore( str, str )
+        selectedIter = None
+        for station in stations:
+            treeIter = listStore.append( station )
+            if station[ IndicatorTide.COLUMN_SEAPORT_ID ] == self.selectedSeaportId:
+                selectedIter = treeIter
+
+        # Attach the model only once filled, so the view does not redraw per row.
+        self.seaportTreeView.set_model( listStore )
+        if selectedIter:
+            self.seaportTreeView.get_selection().select_iter( selectedIter )
+            self.seaportTreeView.scroll_to_cell( listStore.get_path( selectedIter ), None, False, 0, 0 )
+
+
+    def __onSeaportSearchChanged( self, searchEntry ):
+        self.__filterSeaports( searchEntry.get_text() )
+
+
+    def __onSeaportSelected( self, treeSelection ):
+        model, treeIter = treeSelection.get_selected()
+        if treeIter:
+            self.selectedSeaportId = model[ treeIter ][ IndicatorTide.COLUMN_SEAPORT_ID ]
+
+
     def __loadUserScript( self ):
         self.getLogging().debug( "Loading user script: {} | {}.".format( self.userScriptPathAndFilename, self.userScriptClassName ) )
         userScriptModule = None
@@ -496,8 +1306,49 @@ class IndicatorTide( IndicatorBase ):
             self.userScriptClassNameEntry.grab_focus()
             responseType = False
 
+        elif self.locationEntry.get_text().strip() and not tidestations.parseLocation( self.locationEntry.get_text() ):
+            self.showMessage( dialog, _( "The location must be latitude, longitude in decimal degrees." ) )
+            self.locationEntry.grab_focus()
+            responseType = False
+
+        elif self.timezoneEntry.get_text().strip():
+            try:
+                tidetimezone.getTimezone( self.timezoneEntry.get_text().strip() )
+
+            except Exception:
+                self.showMessage( dialog, _( "The time zone is not recognised." ) )
+                self.timezoneEntry.grab_focus()
+                responseType = False
+
         return responseType
 
 if __name__ == "__main__":
+    # Soak test: python3 indicator-tide.py --soak CYCLES
+    # Runs the update repeatedly against recorded responses (run once with "transport" set to "record" to make them)
+    # and exits with a non-zero status if memory grows, or if there are no recorded responses to exercise.
+    # The readings are neither served nor saved, so those of the user are left alone.
+    if len( sys.argv ) == 3 and sys.argv[ 1 ] == "--soak":
+        indicator = IndicatorTide()
+        indicator.transport = tidetransport.ReplayTransport( indicator.getCacheDirectory() )
+        indicator.publishReadings = False
+        indicator.saveSnapshot = False
+        seaportId = None if indicator.location else indicator.seaportId # Nearby seaports are not known until fetched.
+        if not tidetransport.listRecordings( indicator.getCacheDirectory(), seaportId ):
+            sys.exit( "No recorded responses" + ( " for seaport " + seaportId if seaportId else "" ) + "; run with \"transport\" set to \"record\" to make some." )
+
+        indicator.fetch( CancellationToken( indicator.updateTimeoutInSeconds ) )
+        if not indicator.fetchedReadings:
+            sys.exit( "No readings from the recorded responses; check the log." )
+
+        sys.exit( 0 if indicator.soak( int( sys.argv[ 2 ] ) ) else 1 )
+
+    # Replay: python3 indicator-tide.py --replay
+    # Runs the indicator against recorded responses, without the network.
+    if len( sys.argv ) == 2 and sys.argv[ 1 ] == "--replay":
+        indicator = IndicatorTide()
+        indicator.transport = tidetransport.ReplayTransport( indicator.getCacheDirectory() )
+        indicator.main()
+        sys.exit()
+
     IndicatorTide().main()
 
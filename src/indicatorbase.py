@@ -14,7 +14,8 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
-# to see more logging look at logging.basicConfig() on line 148
+# To see more logging, set the environment variable INDICATOR_DEBUG=1,
+# or toggle debug logging at runtime by sending SIGUSR1 to the indicator process.
 
 # Base class for application indicators.
 #
@@ -67,13 +68,16 @@ from bisect import bisect_right
 from gi.repository import GLib, Gtk, Notify
 from urllib.request import urlopen
 
-import datetime, gzip, json, logging.handlers, os, pickle, shutil, subprocess
+import atexit, copy, datetime, gc, gzip, json, logging.handlers, mmap, os, queue, resource, shutil, signal, subprocess, threading, time, tracemalloc
 
 
 class IndicatorBase( ABC ):
 
     __CACHE_DATE_TIME_FORMAT_YYYYMMDDHHMMSS = "%Y%m%d%H%M%S"
 
+    __LOG_BACKUP_COUNT = 3 # Rotated logs kept, as .log.1 (newest) to .log.3.
+    __LOG_MAXIMUM_BYTES = 256 * 1024
+
     __CONFIG_VERSION = "version"
 
     __DESKTOP_LXQT = "LXQt"
@@ -85,6 +89,10 @@ class IndicatorBase( ABC ):
 
     __EXTENSION_JSON = ".json"
 
+    __STATE_ICON = "icon"
+    __STATE_LABEL = "label"
+    __STATE_MENU = "menu"
+
     __ICON_THEMES = {
         "Adwaita"                   : "bebebe",
         "Ambiant-MATE"              : "dfdbd2",
@@ -117,6 +125,8 @@ class IndicatorBase( ABC ):
 
     URL_TIMEOUT_IN_SECONDS = 20
 
+    UPDATE_TIMEOUT_IN_SECONDS = 60 # Default overall time allowed for a fetch; see CancellationToken.
+
 
     def __init__( self,
                   indicatorName,
@@ -147,15 +157,41 @@ class IndicatorBase( ABC ):
         self.log = os.getenv( "HOME" ) + '/' + self.indicatorName + ".log"
         self.secondaryActivateTarget = None
         self.updateTimerID = None
-
-        logging.basicConfig(
-            format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-            #level = logging.DEBUG,
-            level = logging.WARNING, 
-            handlers = [ TruncatedFileHandler( self.log ) ] )
+        self.nextUpdateTime = None # UTC; None if no update is scheduled.
+        self.updateCount = 0
+        self.fetchThread = None
+        self.fetchCancellation = None # Cancellation token of the fetch underway (or cancelled before completing); None once complete.
+        self.updatePending = False # An update was requested whilst a fetch was underway.
+        self.updateTimeoutInSeconds = IndicatorBase.UPDATE_TIMEOUT_IN_SECONDS
+        self.configListeners = { } # Config key to callbacks; see connectConfig().
+        self.menuViews = [ ] # Menus of the most recent update, the first being that passed to update(); see createMenuView().
+        self.menuViewsPending = [ ] # Menus of the update underway.
+        self.menuViewIndex = 0 # The view shown.
+
+        # Records are queued on the calling (GTK) thread and written to the log on a background thread.
+        # The log is rotated by size, keeping the most recent files as history.
+        logQueue = queue.SimpleQueue()
+        fileHandler = logging.handlers.RotatingFileHandler(
+            self.log, 'a', IndicatorBase.__LOG_MAXIMUM_BYTES, IndicatorBase.__LOG_BACKUP_COUNT, None, True )
+
+        fileHandler.setFormatter( StructuredFormatter() )
+        self.logListener = logging.handlers.QueueListener( logQueue, fileHandler, respect_handler_level = True )
+        self.logListener.start()
+        atexit.register( self.logListener.stop ) # Drain the queue before exit.
+
+        queueHandler = logging.handlers.QueueHandler( logQueue )
+        queueHandler.setFormatter( logging.Formatter( "%(message)s" ) ) # Message and any exception; the rest is structured.
+        logging.basicConfig( handlers = [ queueHandler ], force = True )
+        self.setDebugLogging( self.debug or os.getenv( "INDICATOR_DEBUG", "" ) == "1" )
+        GLib.unix_signal_add( GLib.PRIORITY_DEFAULT, signal.SIGUSR1, self.__onToggleDebugLogging )
 
         Notify.init( self.indicatorName )
 
+        # Memory instrumentation, enabled by setting the environment variable INDICATOR_MEMORY_TRACE
+        # to "1" (RSS and object counts per update) or "tracemalloc" (also the top allocation sites).
+        memoryTrace = os.getenv( "INDICATOR_MEMORY_TRACE", "" )
+        self.memoryMonitor = MemoryMonitor( memoryTrace == "tracemalloc" ) if memoryTrace else None
+
         menu = Gtk.Menu()
         menu.append( Gtk.MenuItem.new_with_label( _( "Initialising..." ) ) )
         menu.show_all()
@@ -166,62 +202,253 @@ class IndicatorBase( ABC ):
             AppIndicator.IndicatorCategory.APPLICATION_STATUS )
 
         self.indicator.set_status( AppIndicator.IndicatorStatus.ACTIVE )
-        self.indicator.set_menu( menu )
+
+        # Label, icon and menu as last sent to the indicator and as pending.
+        # Each change to the indicator is a D-Bus round trip to the panel,
+        # so unchanged values are dropped and changes are sent together once per main loop iteration.
+        self.indicatorState = { IndicatorBase.__STATE_ICON : self.indicatorName, IndicatorBase.__STATE_LABEL : None, IndicatorBase.__STATE_MENU : None }
+        self.indicatorStatePending = { }
+        self.indicatorStateFlushID = None
+        self.__setMenu( menu )
+        self.menuViews = [ menu ]
 
         self.__loadConfig()
 
 
     def main( self ):
+        # Show whatever was cached by the previous run (if anything) ahead of any network access.
+        menu = Gtk.Menu()
+        self.menuViewsPending = [ menu ]
+        if self.updateFromCache( menu ): # Call to implementation in indicator.
+            self.__replaceMenus()
+
+        else:
+            for menu in self.menuViewsPending:
+                menu.destroy()
+
+            self.menuViewsPending = [ ]
+
         GLib.idle_add( self.__update )
         Gtk.main()
 
 
+    # Obtain the data for the following call to update(), such as from the network.
+    # Runs on a background thread, so must not touch the user interface; to be overridden as required.
+    #
+    # cancellation: CancellationToken, to be checked between steps and passed to network requests;
+    #               once cancelled, update() is not called, so the data from the previous fetch should be kept.
+    def fetch( self, cancellation ):
+        pass
+
+
+    # Populate the menu from data saved by a previous run, without network access,
+    # shown at startup until the first update completes; to be overridden as required.
+    #
+    # Returns True if the menu was populated; False otherwise.
+    def updateFromCache( self, menu ):
+        return False
+
+
+    # Switch between debug and warning logging; may be called at any time.
+    def setDebugLogging( self, enabled ):
+        logging.getLogger().setLevel( logging.DEBUG if enabled else logging.WARNING )
+
+
+    def isDebugLogging( self ):
+        return logging.getLogger().isEnabledFor( logging.DEBUG )
+
+
+    def __onToggleDebugLogging( self ):
+        self.setDebugLogging( not self.isDebugLogging() )
+        logging.warning( "Debug logging " + ( "enabled." if self.isDebugLogging() else "disabled." ) )
+        return True
+
+
+    # The fetch runs on a thread so the main loop (and the menu currently shown) remains responsive;
+    # once done, the menu is built on the main loop.
+    # The menu remains usable meanwhile: opening Preferences cancels the fetch.
+    #
+    # A fetch underway is cancelled in favour of this newer update, which starts once the cancelled fetch returns.
     def __update( self ):
-        # If the About/Preferences menu items are disabled as the update kicks off,
-        # the user interface will not reflect the change until the update completes.
-        # Therefore, disable the About/Preferences menu items and run the remaining update in a new and delayed thread.
-        self.__setMenuSensitivity( False )
-        GLib.timeout_add_seconds( 1, self.__updateInternal )
+        if self.fetchThread and self.fetchThread.is_alive():
+            self.__cancelFetch( "Superseded by a newer update" )
+            self.updatePending = True
+
+        else:
+            self.fetchCancellation = CancellationToken( self.updateTimeoutInSeconds )
+            self.fetchThread = threading.Thread( target = self.__fetchInternal, args = ( self.fetchCancellation, ), name = "Fetch", daemon = True )
+            self.fetchThread.start()
+
+
+    def __fetchInternal( self, cancellation ):
+        try:
+            self.fetch( cancellation ) # Call to implementation in indicator.
+
+        except Exception as e:
+            logging.exception( e )
+
+        GLib.idle_add( self.__onFetchComplete, cancellation )
+
+
+    # A fetch which runs past its deadline is shown (as whatever it obtained); a cancelled fetch is not.
+    def __onFetchComplete( self, cancellation ):
+        if cancellation.isCancelled():
+            logging.debug( "Update cancelled: " + cancellation.getReason() )
+            if self.updatePending:
+                self.updatePending = False
+                self.__update()
+
+        else:
+            if cancellation.isExpired():
+                logging.warning( "Update exceeded " + str( self.updateTimeoutInSeconds ) + " seconds." )
+
+            self.fetchCancellation = None
+            self.__updateInternal()
+
+
+    def __cancelFetch( self, reason ):
+        if self.fetchCancellation:
+            self.fetchCancellation.cancel( reason )
+
+
+    def __onQuit( self, menuItem ):
+        self.__cancelFetch( "Quit" )
+        Gtk.main_quit()
 
 
     def __updateInternal( self ):
+        nextUpdateInSeconds = self.__render()
+        if nextUpdateInSeconds: # Some indicators don't return a next update time.
+            self.updateTimerID = GLib.timeout_add_seconds( nextUpdateInSeconds, self.__update )
+            self.nextUpdateTime = datetime.datetime.utcnow() + datetime.timedelta( seconds = nextUpdateInSeconds )
+
+        else:
+            self.nextUpdateTime = None
+
+        self.updateCount += 1
+        logging.debug( "Update " + str( self.updateCount ) + " complete; next update in " + str( nextUpdateInSeconds ) + " seconds." )
+        if self.memoryMonitor:
+            self.memoryMonitor.sample( "update " + str( self.updateCount ) )
+
+        if self.updatePending:
+            self.updatePending = False
+            GLib.idle_add( self.__update )
+
+
+    # Build the menu from the data of the most recent fetch, without fetching.
+    #
+    # Returns the number of seconds to the next update, as returned by update().
+    def __render( self ):
         menu = Gtk.Menu()
+        self.menuViewsPending = [ menu ]
         self.secondaryActivateTarget = None
         nextUpdateInSeconds = self.update( menu ) # Call to implementation in indicator.
 
-        if self.debug:
+        if self.debug and nextUpdateInSeconds:
             nextUpdateDateTime = datetime.datetime.now() + datetime.timedelta( seconds = nextUpdateInSeconds )
             label = "Next update: " + str( nextUpdateDateTime ).split( '.' )[ 0 ] # Remove fractional seconds.
             menu.prepend( Gtk.MenuItem.new_with_label( label ) )
 
-        if len( menu.get_children() ) > 0:
-            menu.append( Gtk.SeparatorMenuItem() )
+        self.__replaceMenus()
 
-        # Add in common menu items.
-        menuItem = Gtk.MenuItem.new_with_label( _( "Preferences" ) )
-        menuItem.connect( "activate", self.__onPreferences )
-        menu.append( menuItem )
+        if self.secondaryActivateTarget:
+            self.indicator.set_secondary_activate_target( self.secondaryActivateTarget )
 
-        menuItem = Gtk.MenuItem.new_with_label( _( "About" ) )
-        menuItem.connect( "activate", self.__onAbout )
-        menu.append( menuItem )
+        return nextUpdateInSeconds
 
-        menuItem = Gtk.MenuItem.new_with_label( _( "Quit" ) )
-        menuItem.connect( "activate", Gtk.main_quit )
-        menu.append( menuItem )
 
-        self.indicator.set_menu( menu )
-        menu.show_all()
+    # Add the common menu items to each menu of the update and show the current view in place of the current menu.
+    def __replaceMenus( self ):
+        menus = self.menuViewsPending
+        self.menuViewsPending = [ ]
+        for menu in menus:
+            if len( menu.get_children() ) > 0:
+                menu.append( Gtk.SeparatorMenuItem() )
 
-        if self.secondaryActivateTarget:
-            self.indicator.set_secondary_activate_target( self.secondaryActivateTarget )
+            # Add in common menu items.
+            menuItem = Gtk.MenuItem.new_with_label( _( "Preferences" ) )
+            menuItem.connect( "activate", self.__onPreferences )
+            menu.append( menuItem )
 
-        if nextUpdateInSeconds: # Some indicators don't return a next update time.
-            self.updateTimerID = GLib.timeout_add_seconds( nextUpdateInSeconds, self.__update )
-            self.nextUpdateTime = datetime.datetime.utcnow() + datetime.timedelta( seconds = nextUpdateInSeconds )
+            menuItem = Gtk.MenuItem.new_with_label( _( "About" ) )
+            menuItem.connect( "activate", self.__onAbout )
+            menu.append( menuItem )
 
-        else:
-            self.nextUpdateTime = None
+            menuItem = Gtk.MenuItem.new_with_label( _( "Quit" ) )
+            menuItem.connect( "activate", self.__onQuit )
+            menu.append( menuItem )
+
+            menu.show_all()
+
+        if self.menuViewIndex >= len( menus ):
+            self.menuViewIndex = 0
+
+        # Replace the previous menus and destroy them, otherwise each update leaks the entire menu tree.
+        previousMenus = self.menuViews
+        self.menuViews = menus
+        self.__setMenu( menus[ self.menuViewIndex ] )
+        for previousMenu in previousMenus:
+            previousMenu.destroy()
+
+
+    # Create a further menu for the update underway, to be populated by the indicator
+    # and shown in lieu of the menu passed to update() by showMenuView(), such as for cycling with the mouse wheel.
+    # The common menu items are added as for the menu passed to update().
+    # To be called only from update() or updateFromCache().
+    #
+    # Returns the index of the view and its menu.
+    def createMenuView( self ):
+        menu = Gtk.Menu()
+        self.menuViewsPending.append( menu )
+        return len( self.menuViewsPending ) - 1, menu
+
+
+    # Show the menu of the view, as already built, in place of the current menu; 0 is the menu passed to update().
+    # Called from update(), the view is shown once the update completes;
+    # a view which the update does not create reverts to 0.
+    def showMenuView( self, index ):
+        self.menuViewIndex = index
+        if not self.menuViewsPending and index < len( self.menuViews ):
+            self.__setMenu( self.menuViews[ index ] )
+
+
+    # Run the update repeatedly, outside of the main loop, and check memory does not grow.
+    # Intended for use with recorded data, so that no network access takes place.
+    #
+    # cycles: The number of updates to run, after the warm up.
+    # warmUpCycles: Updates run before the baseline is taken, to fill caches and the like.
+    # toleranceInKiB: Allowed growth in resident memory.
+    # toleranceInObjects: Allowed growth in the count of Python objects tracked by the garbage collector.
+    #
+    # Returns True if memory did not grow beyond the tolerances; False otherwise.
+    def soak( self, cycles, warmUpCycles = 50, toleranceInKiB = 2048, toleranceInObjects = 1000 ):
+        monitor = self.memoryMonitor if self.memoryMonitor else MemoryMonitor( False )
+        for cycle in range( warmUpCycles + cycles ):
+            if cycle == warmUpCycles:
+                baseline = monitor.sample( "soak baseline" )
+
+            self.fetch( CancellationToken( self.updateTimeoutInSeconds ) )
+            self.__updateInternal()
+            if self.updateTimerID:
+                GLib.source_remove( self.updateTimerID )
+                self.updateTimerID = None
+
+            while Gtk.events_pending():
+                Gtk.main_iteration()
+
+        final = monitor.sample( "soak final" )
+        growthInKiB = final[ MemoryMonitor.RSS_IN_KIB ] - baseline[ MemoryMonitor.RSS_IN_KIB ]
+        growthInObjects = final[ MemoryMonitor.OBJECTS ] - baseline[ MemoryMonitor.OBJECTS ]
+        passed = growthInKiB <= toleranceInKiB and growthInObjects <= toleranceInObjects
+        print(
+            "Soak " + ( "PASSED" if passed else "FAILED" ) + " after " + str( cycles ) + " cycles: " +
+            "RSS growth " + str( growthInKiB ) + " KiB (tolerance " + str( toleranceInKiB ) + "), " +
+            "object growth " + str( growthInObjects ) + " (tolerance " + str( toleranceInObjects ) + ")." )
+
+        if monitor.isTracing():
+            print( monitor.getReport() )
+
+        return passed
 
 
     def requestUpdate( self, delay = 0 ):
@@ -229,8 +456,70 @@ class IndicatorBase( ABC ):
 
 
     def setLabel( self, text ):
-        self.indicator.set_label( text, text )  # Second parameter is a hint for the typical length.
-        self.indicator.set_title( text ) # Needed for Lubuntu/Xubuntu, although on Lubuntu of old, this used to work.    
+        self.__setIndicatorState( IndicatorBase.__STATE_LABEL, text )
+
+
+    # icon: The icon name or full path to the icon file.
+    def setIcon( self, icon ):
+        self.__setIndicatorState( IndicatorBase.__STATE_ICON, icon )
+
+
+    # A new menu is sent immediately (along with any pending label/icon),
+    # as the menu is queried directly thereafter (sensitivity of Preferences/About/Quit).
+    def __setMenu( self, menu ):
+        self.__setIndicatorState( IndicatorBase.__STATE_MENU, menu )
+        self.__flushIndicatorState()
+
+
+    def __setIndicatorState( self, key, value ):
+        if value == self.indicatorState[ key ]:
+            self.indicatorStatePending.pop( key, None ) # Reverted to what the indicator already shows.
+
+        else:
+            self.indicatorStatePending[ key ] = value
+            if self.indicatorStateFlushID is None:
+                self.indicatorStateFlushID = GLib.idle_add( self.__onFlushIndicatorState )
+
+
+    def __onFlushIndicatorState( self ):
+        self.indicatorStateFlushID = None
+        self.__flushIndicatorState()
+        return False
+
+
+    def __flushIndicatorState( self ):
+        if self.indicatorStateFlushID is not None:
+            GLib.source_remove( self.indicatorStateFlushID )
+            self.indicatorStateFlushID = None
+
+        pending = self.indicatorStatePending
+        self.indicatorStatePending = { }
+        if IndicatorBase.__STATE_ICON in pending:
+            self.indicator.set_icon_full( pending[ IndicatorBase.__STATE_ICON ], pending[ IndicatorBase.__STATE_ICON ] )
+
+        if IndicatorBase.__STATE_LABEL in pending:
+            text = pending[ IndicatorBase.__STATE_LABEL ]
+            self.indicator.set_label( text, text )  # Second parameter is a hint for the typical length.
+            self.indicator.set_title( text ) # Needed for Lubuntu/Xubuntu, although on Lubuntu of old, this used to work.    
+
+        if IndicatorBase.__STATE_MENU in pending:
+            self.indicator.set_menu( pending[ IndicatorBase.__STATE_MENU ] )
+
+        self.indicatorState.update( pending )
+
+
+    # Show a desktop notification; may be called from any thread.
+    def showNotification( self, summary, body ):
+        if threading.current_thread() is not threading.main_thread():
+            GLib.idle_add( self.showNotification, summary, body )
+            return
+
+        try:
+            Notify.Notification.new( summary, body, self.icon ).show()
+
+        except Exception as e:
+            logging.error( "Error showing notification: " + summary )
+            logging.exception( e )
 
 
     def requestMouseWheelScrollEvents( self ):
@@ -238,8 +527,8 @@ class IndicatorBase( ABC ):
 
 
     def __onMouseWheelScroll( self, indicator, delta, scrollDirection ):
-        # Need to ignore events when Preferences is open or an update is underway.
-        # Do so by checking the sensitivity of the Preferences menu item.
+        # Need to ignore events when Preferences is open.
+        # Do so by checking the sensitivity of the Preferences menu item (a fetch underway does not change it).
         # A side effect is the event will be ignored when About is showing...oh well.
         if self.__getMenuSensitivity():
             self.onMouseWheelScroll( indicator, delta, scrollDirection )
@@ -306,29 +595,70 @@ class IndicatorBase( ABC ):
             GLib.source_remove( self.updateTimerID )
             self.updateTimerID = None
 
+        self.__cancelFetch( "Preferences opened" )
+
         self.__setMenuSensitivity( False )
         GLib.idle_add( self.__onPreferencesInternal, widget )
 
 
+    # Once the user clicks OK, only changes to options affecting the data trigger a fetch;
+    # changes only to display options re-render from the data already fetched.
     def __onPreferencesInternal( self, widget ):
+        previousConfig = copy.deepcopy( self.saveConfig() )
         dialog = self.createDialog( widget, _( "Preferences" ) )
         responseType = self.onPreferences( dialog ) # Call to implementation in indicator.
         dialog.destroy()
         self.__setMenuSensitivity( True )
 
+        changedKeys = [ ]
         if responseType == Gtk.ResponseType.OK:
             self.__saveConfig()
+            changedKeys = self.__notifyConfigListeners( previousConfig, self.saveConfig() )
+
+        displayKeys = { option.key for option in self.getConfigOptions() if option.display }
+        if any( key not in displayKeys for key in changedKeys ):
+            GLib.idle_add( self.__update )
+
+        else:
+            if changedKeys:
+                logging.debug( "Display options changed: " + ", ".join( changedKeys ) )
+                if self.updateCount: # Otherwise there is nothing yet to re-render; the fetch resumed below shows the change.
+                    self.__render()
+
+            self.__resumeUpdates()
+
+
+    # Reschedule the update which was pending when Preferences was opened,
+    # or fetch again now if opening Preferences cancelled a fetch before it completed (such as the first).
+    def __resumeUpdates( self ):
+        if self.fetchCancellation and self.fetchCancellation.isCancelled():
             GLib.idle_add( self.__update )
 
-        elif self.nextUpdateTime: # User cancelled and there is a next update time present...
+        elif self.nextUpdateTime:
             secondsToNextUpdate = ( self.nextUpdateTime - datetime.datetime.utcnow() ).total_seconds()
             if secondsToNextUpdate > 10: # Scheduled update is still in the future (10 seconds or more), so reschedule...
-                GLib.timeout_add_seconds( int( secondsToNextUpdate ), self.__update )
+                self.updateTimerID = GLib.timeout_add_seconds( int( secondsToNextUpdate ), self.__update )
 
             else: # Scheduled update would have already happened, so kick one off now.
                 GLib.idle_add( self.__update )
 
 
+    # Call the listeners of each key whose value differs.
+    #
+    # Returns the changed keys.
+    def __notifyConfigListeners( self, previousConfig, config ):
+        changedKeys = [ key for key in config if previousConfig.get( key ) != config[ key ] ]
+        for key in changedKeys:
+            for callback in self.configListeners.get( key, [ ] ):
+                try:
+                    callback( key, previousConfig.get( key ), config[ key ] )
+
+                except Exception as e:
+                    logging.exception( e )
+
+        return changedKeys
+
+
     def __setMenuSensitivity( self, toggle, allMenuItems = False ):
         if allMenuItems:
             for menuItem in self.indicator.get_menu().get_children():
@@ -699,6 +1029,33 @@ class IndicatorBase( ABC ):
         return downloaded
 
 
+    # The options held in the configuration file; to be overridden as required.
+    #
+    # Returns a list of ConfigOption.
+    def getConfigOptions( self ):
+        return [ ]
+
+
+    # Set the indicator attributes from the configuration, for each config option;
+    # values which are absent or of the wrong type take the default.
+    def loadConfig( self, config ):
+        for option in self.getConfigOptions():
+            setattr( self, option.attribute, option.fromConfig( config ) )
+
+
+    # Returns the configuration, for each config option, from the indicator attributes.
+    def saveConfig( self ):
+        return { option.key : getattr( self, option.attribute ) for option in self.getConfigOptions() }
+
+
+    # Call back when the user changes the value of the key in Preferences,
+    # once the new configuration is in place and before any update.
+    #
+    # callback: Function taking ( key, previous value, value ).
+    def connectConfig( self, key, callback ):
+        self.configListeners.setdefault( key, [ ] ).append( callback )
+
+
     def requestSaveConfig( self, delay = 0 ):
         GLib.timeout_add_seconds( delay, self.__saveConfig, False )
 
@@ -876,7 +1233,8 @@ class IndicatorBase( ABC ):
     #
     # Files which pass the filter are sorted by date/time and the most recent file is read.
     #
-    # Returns the binary object; None when no suitable cache file exists; None on error and logs.
+    # Returns the contents as a read only mmap (bytes-like, mapped rather than read);
+    # None when no suitable cache file exists (or is empty); None on error and logs.
     def readCacheBinary( self, basename ):
         data = None
         theFile = ""
@@ -887,8 +1245,9 @@ class IndicatorBase( ABC ):
         if theFile: # A value of "" evaluates to False.
             filename = self.__getCacheDirectory() + theFile
             try:
-                with open( filename, 'rb' ) as fIn:
-                    data = pickle.load( fIn )
+                if os.path.getsize( filename ) > 0: # An empty file cannot be mapped.
+                    with open( filename, 'rb' ) as fIn:
+                        data = mmap.mmap( fIn.fileno(), 0, access = mmap.ACCESS_READ ) # Remains valid once the file is closed.
 
             except Exception as e:
                 data = None
@@ -898,9 +1257,9 @@ class IndicatorBase( ABC ):
         return data
 
 
-    # Writes an object as a binary file to the cache.
+    # Writes binary data to the cache.
     #
-    # binaryData: The object to write.
+    # binaryData: A bytes-like object.
     # basename: The text used to form the file name, typically the name of the calling application.
     # extension: Added to the end of the basename and date/time.
     #
@@ -919,8 +1278,11 @@ class IndicatorBase( ABC ):
             extension
 
         try:
-            with open( cacheFile, 'wb' ) as fIn:
-                pickle.dump( binaryData, fIn )
+            temporaryFile = self.__getTemporaryFilename( cacheFile )
+            with open( temporaryFile, 'wb' ) as fIn:
+                fIn.write( binaryData )
+
+            os.replace( temporaryFile, cacheFile )
 
         except Exception as e:
             logging.exception( e )
@@ -1015,11 +1377,16 @@ class IndicatorBase( ABC ):
         return self.__writeCacheText( text, cacheFile )
 
 
+    # Written to a temporary file then renamed, so a reader (or another instance writing the same file)
+    # never sees a partially written file.
     def __writeCacheText( self, text, cacheFile ):
         try:
-            with open( cacheFile, 'w' ) as fIn:
+            temporaryFile = self.__getTemporaryFilename( cacheFile )
+            with open( temporaryFile, 'w' ) as fIn:
                 fIn.write( text )
 
+            os.replace( temporaryFile, cacheFile )
+
         except Exception as e:
             logging.exception( e )
             logging.error( "Error writing to cache: " + cacheFile )
@@ -1028,6 +1395,12 @@ class IndicatorBase( ABC ):
         return cacheFile
 
 
+    # A hidden file, unique to this process, alongside the given file,
+    # which will not match any basename when searching the cache.
+    def __getTemporaryFilename( self, filename ):
+        return os.path.join( os.path.dirname( filename ), "." + os.path.basename( filename ) + "." + str( os.getpid() ) + ".tmp" )
+
+
     # Return the full directory path to the user cache directory for the current indicator.
     def getCacheDirectory( self ):
         return self.__getCacheDirectory()
@@ -1103,22 +1476,168 @@ class IndicatorBase( ABC ):
         return result
 
 
-# Log file handler which truncates the file when the file size limit is reached.
-#
-# References:
-#     http://stackoverflow.com/questions/24157278/limit-python-log-file
-#     http://svn.python.org/view/python/trunk/Lib/logging/handlers.py?view=markup
-class TruncatedFileHandler( logging.handlers.RotatingFileHandler ):
-    def __init__( self, filename, maxBytes = 10000 ):
-        super().__init__( filename, 'a', maxBytes, 0, None, True )
+# Cancellation of, and an overall deadline for, work on a background thread (such as a fetch),
+# checked between steps and passed to each network request to bound its timeout.
+class CancellationToken( object ):
+
+    # timeoutInSeconds: The overall time allowed, from now; None for no deadline.
+    def __init__( self, timeoutInSeconds = None ):
+        self.deadline = None if timeoutInSeconds is None else time.monotonic() + timeoutInSeconds
+        self.cancelled = threading.Event()
+        self.reason = None
+
 
+    # May be called from any thread; the first reason is kept.
+    def cancel( self, reason ):
+        if not self.cancelled.is_set():
+            self.reason = reason
+            self.cancelled.set()
 
-    def doRollover( self ):
-        if self.stream:
-            self.stream.close()
 
-        if os.path.exists( self.baseFilename ):
-            os.remove( self.baseFilename )
+    def isCancelled( self ):
+        return self.cancelled.is_set()
 
-        self.mode = 'a'
-        self.stream = self._open()
+
+    def isExpired( self ):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+
+    # Returns True if cancelled or past the deadline; the work should stop.
+    def isStopped( self ):
+        return self.isCancelled() or self.isExpired()
+
+
+    def getReason( self ):
+        return self.reason if self.isCancelled() else "Deadline exceeded" if self.isExpired() else None
+
+
+    # Returns the seconds until the deadline (0 if past); None if there is no deadline.
+    def getRemainingInSeconds( self ):
+        return None if self.deadline is None else max( 0.0, self.deadline - time.monotonic() )
+
+
+    # Wait for the seconds, or less if cancelled or the deadline is reached first.
+    #
+    # Returns True if stopped; False otherwise.
+    def wait( self, seconds ):
+        remaining = self.getRemainingInSeconds()
+        self.cancelled.wait( seconds if remaining is None else min( seconds, remaining ) )
+        return self.isStopped()
+
+
+# An option held in the configuration file, mapped to an attribute of the indicator.
+class ConfigOption( object ):
+
+    # key: The key in the configuration file.
+    # attribute: The name of the indicator attribute holding the value.
+    # default: The value when absent or invalid; the type of the default is the type of the option.
+    # display: True if the option only affects how data is shown, so a change re-renders without fetching;
+    #          False if the option affects the data itself.
+    def __init__( self, key, attribute, default, display = False ):
+        self.key = key
+        self.attribute = attribute
+        self.default = default
+        self.display = display
+
+
+    # Returns the value of the option from the configuration, or a copy of the default if absent or of the wrong type.
+    def fromConfig( self, config ):
+        value = config.get( self.key, self.default )
+        if type( value ) is not type( self.default ): # Not isinstance(): a bool is an int.
+            if type( value ) is int and type( self.default ) is float:
+                value = float( value )
+
+            else:
+                logging.warning( "Config '{}' expected {} but found {}; using the default.".format( self.key, type( self.default ).__name__, type( value ).__name__ ) )
+                value = self.default
+
+        return copy.deepcopy( value )
+
+
+# Samples memory use: resident set size, Python objects tracked by the garbage collector
+# and optionally (tracemalloc) the allocation sites which grew the most since the previous sample.
+class MemoryMonitor( object ):
+
+    OBJECTS = "objects"
+    RSS_IN_KIB = "rssInKiB"
+
+    TOP_ALLOCATION_SITES = 10
+
+
+    def __init__( self, trace ):
+        self.logger = logging.getLogger( "memory" )
+        self.logger.setLevel( logging.INFO )
+        self.previousSnapshot = None
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start( 10 )
+
+
+    def isTracing( self ):
+        return tracemalloc.is_tracing()
+
+
+    # Log and return a dictionary of the current memory use.
+    def sample( self, description ):
+        gc.collect()
+        statistics = {
+            MemoryMonitor.RSS_IN_KIB : MemoryMonitor.getRSSInKiB(),
+            MemoryMonitor.OBJECTS : len( gc.get_objects() ) }
+
+        self.logger.info(
+            description + ": RSS " + str( statistics[ MemoryMonitor.RSS_IN_KIB ] ) + " KiB, " +
+            str( statistics[ MemoryMonitor.OBJECTS ] ) + " objects." )
+
+        if self.isTracing():
+            snapshot = tracemalloc.take_snapshot()
+            if self.previousSnapshot:
+                for statistic in snapshot.compare_to( self.previousSnapshot, "lineno" )[ : MemoryMonitor.TOP_ALLOCATION_SITES ]:
+                    self.logger.info( "    " + str( statistic ) )
+
+            self.previousSnapshot = snapshot
+
+        return statistics
+
+
+    # Return the top allocation sites (by size) of the current snapshot as text; empty if not tracing.
+    def getReport( self ):
+        report = ""
+        if self.isTracing():
+            statistics = tracemalloc.take_snapshot().statistics( "traceback" )[ : MemoryMonitor.TOP_ALLOCATION_SITES ]
+            lines = [ "Top allocation sites:" ]
+            for statistic in statistics:
+                lines.append( str( statistic ) )
+                lines.extend( "    " + line for line in statistic.traceback.format() )
+
+            report = '\n'.join( lines )
+
+        return report
+
+
+    # The current resident set size in KiB; the peak if the current size cannot be determined.
+    @staticmethod
+    def getRSSInKiB():
+        try:
+            with open( "/proc/self/statm", 'r' ) as fIn:
+                rssInKiB = int( fIn.read().split()[ 1 ] ) * os.sysconf( "SC_PAGE_SIZE" ) // 1024
+
+        except Exception:
+            rssInKiB = resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss
+
+        return rssInKiB
+
+
+# Log formatter which writes each record as a single line of JSON, such as
+#
+#    {"time": "2024-08-03T04:07:00.123", "level": "ERROR", "logger": "root", "thread": "MainThread", "message": "..."}
+#
+# Any exception/stack trace is part of the message (records are formatted before being queued).
+class StructuredFormatter( logging.Formatter ):
+    def format( self, record ):
+        structured = {
+            "time" : datetime.datetime.fromtimestamp( record.created ).isoformat( timespec = "milliseconds" ),
+            "level" : record.levelname,
+            "logger" : record.name,
+            "thread" : record.threadName,
+            "message" : record.getMessage() }
+
+        return json.dumps( structured )
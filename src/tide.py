@@ -26,13 +26,15 @@ class Reading( object ):
     # level: The tide level, as a string.
     # isHigh: True if the tide is high; false otherwise.
     # url: The URL used to source the tide information.
-    def __init__( self, date, time, location, isHigh, level, url ):
+    # timestamp: Seconds since the epoch (UTC) of the reading; None if unknown.
+    def __init__( self, date, time, location, isHigh, level, url, timestamp = None ):
         self.date = date
         self.time = time
         self.location = location
         self._isHigh = isHigh
         self.level = level
         self.url = url
+        self.timestamp = timestamp
 
 
     def getDate( self ):
@@ -61,6 +63,11 @@ class Reading( object ):
         return self.url
 
 
+    # Returns the seconds since the epoch (UTC) of this tide; None if unknown.
+    def getTimestamp( self ):
+        return self.timestamp
+
+
     def __str__( self ):
         return \
             self.date + " | " + \
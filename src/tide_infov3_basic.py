@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 
+import json
 import requests
 import datetime
-import pytz
 import tide  # You need to import the tide module to use tide.Reading
 # You might need to adjust the path to indicatorbase.py and tidedatagetterbase.py
 # if they are not in the same directory or accessible via PYTHONPATH
@@ -22,6 +22,10 @@ class MyCustomTideGetter(TideDataGetterBase):
         # Set the API endpoint URL with placeholders for station and duration
         from tidedatagetterbase import TideDataGetterBase
 import config
+import numpy
+import tidearchive
+import tidetimezone
+import tidetransport
 
 
 class MyCustomTideGetter(TideDataGetterBase):
@@ -29,7 +33,9 @@ class MyCustomTideGetter(TideDataGetterBase):
     @staticmethod
     # IMPORTANT: Remove @abstractmethod from here! (This comment is for initial setup, keep it for context)
     # --- START: Add 'durationDays' and 'seaportId' parameters to method signature ---
-    def getTideData(logging=None, urlTimeoutInSeconds=20, durationDays=7, seaportId="0536"):
+    # cancellation: Optional token (see indicatorbase.CancellationToken) bounding the whole call;
+    # each request's timeout is capped by the time remaining and a cancellation aborts the request in flight.
+    def getTideData(logging=None, urlTimeoutInSeconds=20, durationDays=7, seaportId="0536", cacheDirectory=None, eventStore=None, timezoneName=None, transport=None, cancellation=None):
     # --- END: Add 'durationDays' and 'seaportId' parameters to method signature ---
         if logging:
             logging.info("MyCustomTideGetter.getTideData called.")
@@ -55,70 +61,36 @@ class MyCustomTideGetter(TideDataGetterBase):
             logging.info(f"API Call Parameters: station='{station}', duration='{duration}' (from GUI preference)") # Debugging line to check duration
 
         tidalReadings = [] # This will store the tide.Reading objects
-        location = "Unknown" # Default location
+
+        # All HTTP access goes through the transport, so responses may be recorded/replayed.
+        if transport is None:
+            transport = tidetransport.LiveTransport()
 
         try:
             # First, get the station name
             station_details_url = station_details_endpoint_url.format(station=station)
-            station_response = requests.get(station_details_url, headers=headers, timeout=urlTimeoutInSeconds)
+            station_response = transport.get(station_details_url, headers, urlTimeoutInSeconds, cancellation)
             station_response.raise_for_status()
-            station_data = station_response.json()
-            location = station_data.get("properties", {}).get("Name", "Unknown")
 
             # Build the API request URL for events
             api_url = events_endpoint_url.format(station=station, duration=duration)
 
             # Send the API request and fetch the response data
-            response = requests.get(api_url, headers=headers, timeout=urlTimeoutInSeconds)
+            response = transport.get(api_url, headers, urlTimeoutInSeconds, cancellation)
             response.raise_for_status() # Raise an exception for HTTP errors (e.g., 400, 401, 404, 500)
-            response_data = response.json()
 
-            if logging:
-                # Log the full response data for debugging (can be very verbose for large responses)
-                pass
-                #logging.info(f"Full Raw API response data: {response_data}")
-                #logging.info(f"Number of events in raw API response: {len(response_data)}")
+            # Keep a compressed copy of the raw responses so they may be reparsed later without the API.
+            if cacheDirectory:
+                MyCustomTideGetter.archiveResponses(logging, cacheDirectory, station, duration, timezoneName, station_response.content, response.content)
 
-            # Set up timezone awareness
-            utc_timezone = pytz.utc
-            local_timezone = pytz.timezone('Europe/London')  # Handles BST (British Summer Time) automatically
+            station_data = station_response.json()
+            response_data = response.json()
 
-            # Get the current time in local timezone
-            now_utc = datetime.datetime.now(datetime.UTC).astimezone(utc_timezone)
-            now_local = now_utc.astimezone(local_timezone)
+            # Keep every event fetched (not just those in the window) for offline queries.
+            if eventStore:
+                MyCustomTideGetter.storeEvents(logging, eventStore, station, station_data, response_data)
 
-            # --- START: Corrected filtering logic for displaying all requested days ---
-            # Calculate the start date (today) and end date (today + duration days) for filtering
-            start_date = now_local.date()
-            # Ensure duration is an integer for timedelta calculation
-            end_date = start_date + datetime.timedelta(days=int(duration))
-
-            # Iterate through each event in the API response
-            for event in response_data:
-                event_type = event["EventType"]
-                tidal_height = event["Height"]
-                tidal_time_str = event["DateTime"]
-
-                # Convert the API's UTC time string to a timezone-aware local datetime object
-                # The timestamp may contain fractional seconds, which are ignored.
-                tidal_time_utc = datetime.datetime.strptime(tidal_time_str.split('.')[0], "%Y-%m-%dT%H:%M:%S")
-                tidal_time_local = utc_timezone.localize(tidal_time_utc).astimezone(local_timezone)
-                event_date = tidal_time_local.date()
-
-                # Filter events to include only those within the requested duration (e.g., 7 days)
-                # This condition checks if the event date is from 'start_date' (inclusive)
-                # up to 'end_date' (exclusive).
-                if start_date <= event_date < end_date:
-                    is_high = (event_type == "HighWater")
-                    date_str = tidal_time_local.strftime("%A %B %d") # e.g., "Tuesday August 3rd"
-                    time_str = tidal_time_local.strftime("%I:%M %p") # e.g., "4:07 AM"
-                    level = f"{round(tidal_height, 2)}m" # Format height as string with 'm'
-                    source_url = api_url # Or a more specific URL if the API provides it
-
-                    tidalReadings.append(
-                        tide.Reading(date_str, time_str, location, is_high, level, source_url)
-                    )
-            # --- END: Corrected filtering logic for displaying all requested days ---
+            tidalReadings = MyCustomTideGetter.parseTideData(logging, station_data, response_data, duration, api_url, timezoneName=timezoneName)
 
         except requests.exceptions.RequestException as e:
             if logging:
@@ -129,11 +101,120 @@ class MyCustomTideGetter(TideDataGetterBase):
             if logging:
                 logging.error(f"An unexpected error occurred during data processing: {e}")
 
-        # Sort the readings by time before returning
-        # This ensures the events are displayed in chronological order
-        # The key extracts the date and time string from the tide.Reading object,
-        # combines them, and converts to a datetime object for proper sorting.
-        tidalReadings.sort(key=lambda reading: datetime.datetime.strptime(f"{reading.getDate()} {reading.getTime()}", "%A %B %d %I:%M %p"))
+        return tidalReadings
+
+
+    # Reparse tide data from a raw response archive written by getTideData.
+    # Useful when the parser changes, or for testing without the API.
+    @staticmethod
+    def getTideDataFromArchive(filename, logging=None, timezoneName=None):
+        header, parts = tidearchive.readParts(filename)
+        station_data = json.loads(parts["station"])
+        response_data = json.loads(parts["events"])
+        api_url = "https://admiraltyapi.azure-api.net/uktidalapi/api/V1/Stations/{station}/TidalEvents?duration={duration}".format(
+            station=header["station"], duration=header["windowDays"])
+
+        start_date = datetime.date.fromisoformat(header["windowStart"])
+
+        return MyCustomTideGetter.parseTideData(logging, station_data, response_data, header["windowDays"], api_url, start_date, timezoneName)
+
+
+    @staticmethod
+    def archiveResponses(logging, cacheDirectory, station, duration, timezoneName, station_content, events_content):
+        try:
+            now_utc = datetime.datetime.now(datetime.UTC)
+            filename = tidearchive.writeArchive(
+                cacheDirectory,
+                station,
+                now_utc,
+                now_utc.astimezone(tidetimezone.getTimezone(timezoneName)).date(),
+                int(duration),
+                [("station", station_content), ("events", events_content)])
+
+            if logging:
+                logging.debug(f"Archived raw responses to {filename}")
+
+        except Exception as e:
+            # Archiving is a convenience; never lose the readings because of it.
+            if logging:
+                logging.error(f"Error archiving raw responses: {e}")
+
+
+    @staticmethod
+    def storeEvents(logging, eventStore, station, station_data, response_data):
+        try:
+            location = station_data.get("properties", {}).get("Name", "Unknown")
+            tidal_times_utc = tidetimezone.parseUTCTimestamps([event["DateTime"] for event in response_data])
+            events = [
+                (tidal_time_utc, event["EventType"] == "HighWater", event["Height"])
+                for tidal_time_utc, event in zip(tidal_times_utc.tolist(), response_data)]
+
+            count = eventStore.upsertEvents(station, location, events)
+            if logging:
+                logging.debug(f"Stored {count} events for station {station}")
+
+        except Exception as e:
+            if logging:
+                logging.error(f"Error storing events: {e}")
+
+
+    # Convert the station details and tidal events (as decoded JSON) into a sorted list of tide.Reading.
+    # Events are kept from start_date (defaults to today) for duration days,
+    # with dates/times shown in the given timezone (defaults to the system timezone).
+    @staticmethod
+    def parseTideData(logging, station_data, response_data, duration, api_url, start_date=None, timezoneName=None):
+        tidalReadings = []
+        location = station_data.get("properties", {}).get("Name", "Unknown")
+
+        if logging:
+            # Log the full response data for debugging (can be very verbose for large responses)
+            pass
+            #logging.info(f"Full Raw API response data: {response_data}")
+            #logging.info(f"Number of events in raw API response: {len(response_data)}")
+
+        # Convert all of the API's UTC time strings to seconds since the epoch in one go.
+        # The timestamps may contain fractional seconds, which are ignored.
+        now_utc = int(datetime.datetime.now(datetime.UTC).timestamp())
+        tidal_times_utc = tidetimezone.parseUTCTimestamps([event["DateTime"] for event in response_data])
+
+        # Set up timezone awareness: the offset transitions (daylight saving) over the window are computed once,
+        # then every event is converted to local time in a single vectorised lookup.
+        window_start = min(now_utc, int(tidal_times_utc.min())) if len(tidal_times_utc) else now_utc
+        window_end = max(now_utc, int(tidal_times_utc.max())) if len(tidal_times_utc) else now_utc
+        converter = tidetimezone.TimezoneConverter(timezoneName, window_start, window_end)
+        tidal_times_local = converter.toLocalDateTimes(tidal_times_utc)
+        now_local = converter.toLocalDateTimes([now_utc])[0]
+
+        # --- START: Corrected filtering logic for displaying all requested days ---
+        # Calculate the start date (today) and end date (today + duration days) for filtering
+        if start_date is None:
+            start_date = now_local.date()
+        # Ensure duration is an integer for timedelta calculation
+        end_date = start_date + datetime.timedelta(days=int(duration))
+
+        # Iterate through each event in the API response, in chronological order
+        # so the events are displayed in chronological order.
+        for index in numpy.argsort(tidal_times_utc, kind="stable"):
+            event = response_data[index]
+            event_type = event["EventType"]
+            tidal_height = event["Height"]
+            tidal_time_local = tidal_times_local[index]
+            event_date = tidal_time_local.date()
+
+            # Filter events to include only those within the requested duration (e.g., 7 days)
+            # This condition checks if the event date is from 'start_date' (inclusive)
+            # up to 'end_date' (exclusive).
+            if start_date <= event_date < end_date:
+                is_high = (event_type == "HighWater")
+                date_str = tidal_time_local.strftime("%A %B %d") # e.g., "Tuesday August 3rd"
+                time_str = tidal_time_local.strftime("%I:%M %p") # e.g., "4:07 AM"
+                level = f"{round(tidal_height, 2)}m" # Format height as string with 'm'
+                source_url = api_url # Or a more specific URL if the API provides it
+
+                tidalReadings.append(
+                    tide.Reading(date_str, time_str, location, is_high, level, source_url, int(tidal_times_utc[index]))
+                )
+        # --- END: Corrected filtering logic for displaying all requested days ---
 
         return tidalReadings
 
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# Daily and per station summaries of tidal readings, computed in a single vectorised pass.
+#
+# For each ( location, date ):
+#
+#    the highest high water and lowest low water;
+#    the tidal range (highest high less lowest low);
+#    the spring/neap index: the range relative to the smallest (0, neaps) and largest (1, springs)
+#    daily range for the location over the window.
+#
+# Heights which are unknown, or days without both a high and a low, give NaN.
+
+
+import numpy, tidecurve
+
+
+class TideAggregates( object ):
+
+    # Spring/neap index at or above/below which a day is described as springs/neaps.
+    SPRINGS_THRESHOLD = 2 / 3
+    NEAPS_THRESHOLD = 1 / 3
+
+
+    # readings: tide.Reading, in any order, for any number of locations.
+    def __init__( self, readings ):
+        locations = numpy.array( [ reading.getLocation() for reading in readings ], dtype = str )
+        dates = numpy.array( [ reading.getDate() for reading in readings ], dtype = str )
+        heights = numpy.array( [ tidecurve.getHeight( reading ) for reading in readings ], dtype = float )
+        isHigh = numpy.array( [ reading.isHigh() for reading in readings ], dtype = bool )
+
+        # Group by location then date; each group is a contiguous run after sorting.
+        order = numpy.lexsort( ( dates, locations ) )
+        locations, dates, heights, isHigh = locations[ order ], dates[ order ], heights[ order ], isHigh[ order ]
+        if len( order ):
+            changes = ( locations[ 1 : ] != locations[ : -1 ] ) | ( dates[ 1 : ] != dates[ : -1 ] )
+            starts = numpy.concatenate( ( [ 0 ], numpy.flatnonzero( changes ) + 1 ) )
+
+        else:
+            starts = numpy.zeros( 0, dtype = int )
+
+        # fmax/fmin ignore NaN, so lows (and unknown heights) do not affect the highest high and vice versa.
+        self.locations = locations[ starts ]
+        self.dates = dates[ starts ]
+        self.maximumHighs = TideAggregates.__reduce( numpy.fmax, numpy.where( isHigh, heights, numpy.nan ), starts )
+        self.minimumLows = TideAggregates.__reduce( numpy.fmin, numpy.where( isHigh, numpy.nan, heights ), starts )
+        self.ranges = self.maximumHighs - self.minimumLows
+
+        # Per location: the smallest/largest daily range, then each day's range relative to those.
+        locationStarts = numpy.flatnonzero( numpy.concatenate( ( [ True ], self.locations[ 1 : ] != self.locations[ : -1 ] ) ) ) if len( starts ) else starts
+        self.stationLocations = self.locations[ locationStarts ]
+        self.stationMinimumRanges = TideAggregates.__reduce( numpy.fmin, self.ranges, locationStarts )
+        self.stationMaximumRanges = TideAggregates.__reduce( numpy.fmax, self.ranges, locationStarts )
+        self.stationMaximumHighs = TideAggregates.__reduce( numpy.fmax, self.maximumHighs, locationStarts )
+        self.stationMinimumLows = TideAggregates.__reduce( numpy.fmin, self.minimumLows, locationStarts )
+
+        dayCounts = numpy.diff( numpy.append( locationStarts, len( starts ) ) )
+        minimumRanges = numpy.repeat( self.stationMinimumRanges, dayCounts )
+        spans = numpy.repeat( self.stationMaximumRanges - self.stationMinimumRanges, dayCounts )
+        with numpy.errstate( invalid = "ignore", divide = "ignore" ):
+            self.springNeapIndices = numpy.where( spans > 0, ( self.ranges - minimumRanges ) / spans, numpy.nan )
+
+        self.dayIndices = { ( location, date ) : index for index, ( location, date ) in enumerate( zip( self.locations.tolist(), self.dates.tolist() ) ) }
+        self.stationIndices = { location : index for index, location in enumerate( self.stationLocations.tolist() ) }
+
+
+    # Return ( maximum high, minimum low, range, spring/neap index ) for the location on the date
+    # (each a float, possibly NaN); None if there are no readings.
+    def getDay( self, location, date ):
+        summary = None
+        index = self.dayIndices.get( ( location, date ) )
+        if index is not None:
+            summary = (
+                float( self.maximumHighs[ index ] ),
+                float( self.minimumLows[ index ] ),
+                float( self.ranges[ index ] ),
+                float( self.springNeapIndices[ index ] ) )
+
+        return summary
+
+
+    # Return ( maximum high, minimum low, smallest daily range, largest daily range ) for the location
+    # over the window (each a float, possibly NaN); None if there are no readings.
+    def getStation( self, location ):
+        summary = None
+        index = self.stationIndices.get( location )
+        if index is not None:
+            summary = (
+                float( self.stationMaximumHighs[ index ] ),
+                float( self.stationMinimumLows[ index ] ),
+                float( self.stationMinimumRanges[ index ] ),
+                float( self.stationMaximumRanges[ index ] ) )
+
+        return summary
+
+
+    # Apply a NaN ignoring ufunc over each run of values beginning at the starts.
+    @staticmethod
+    def __reduce( ufunc, values, starts ):
+        return ufunc.reduceat( values, starts ) if len( starts ) else numpy.zeros( 0, dtype = float )
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# Tide alerts, compiled from the current readings into a priority queue of fire times.
+#
+# An alert rule is a dictionary (as held in the configuration), such as
+#
+#    { "event" : "high", "minutesBefore" : 30, "location" : "Newlyn" }
+#    { "event" : "below", "height" : 0.5 }
+#
+# event: One of "high", "low" (high/low water) or "below", "above" (height falls below/rises above "height" metres).
+# minutesBefore: Optional; alert this many minutes before the event.
+# location: Optional; only for readings at this location (an empty or missing location matches all).
+#
+# Exactly one GLib timeout is armed at any time, for the earliest pending alert.
+# When the readings change, only alerts which have appeared/disappeared are added to/removed from the queue;
+# alerts already fired are remembered so they are not fired again.
+
+
+import heapq, time, tidecurve
+
+from gi.repository import GLib
+
+
+class TideAlertScheduler( object ):
+
+    EVENT_ABOVE = "above"
+    EVENT_BELOW = "below"
+    EVENT_HIGH = "high"
+    EVENT_LOW = "low"
+
+    RULE_EVENT = "event"
+    RULE_HEIGHT = "height"
+    RULE_LOCATION = "location"
+    RULE_MINUTES_BEFORE = "minutesBefore"
+
+    # Alerts which become due more than this late (say after a suspend) are dropped rather than shown.
+    LATE_TOLERANCE_IN_SECONDS = 5 * 60
+
+
+    # notify: Function taking a summary and body, called when an alert fires.
+    def __init__( self, notify, logging ):
+        self.notify = notify
+        self.logging = logging
+        self.rules = [ ]
+        self.queue = [ ] # Heap of [ fireTime, key, summary, body, removed ].
+        self.entries = { } # Key to queue entry, for pending alerts.
+        self.fired = set() # Keys of alerts already fired.
+        self.timerID = None
+        self.timerFireTime = None
+
+
+    # Set the alert rules; all alerts are recompiled on the next call to setReadings().
+    def setRules( self, rules ):
+        if rules != self.rules:
+            self.rules = list( rules )
+            for entry in self.entries.values():
+                entry[ -1 ] = True
+
+            self.entries = { }
+
+
+    # Compile the alerts for the readings and merge into the queue.
+    def setReadings( self, readings ):
+        now = time.time()
+        alerts = { }
+        for ruleIndex, rule in enumerate( self.rules ):
+            try:
+                for key, fireTime, summary, body in self.__compile( ruleIndex, rule, readings ):
+                    if fireTime > now and key not in self.fired:
+                        alerts[ key ] = ( fireTime, summary, body )
+
+            except Exception as e:
+                self.logging.error( "Invalid tide alert rule {}: {}".format( rule, e ) )
+
+        # Remove alerts no longer present (or whose time has changed); lazily deleted from the heap.
+        for key in list( self.entries ):
+            if key not in alerts or alerts[ key ][ 0 ] != self.entries[ key ][ 0 ]:
+                self.entries.pop( key )[ -1 ] = True
+
+        for key, ( fireTime, summary, body ) in alerts.items():
+            if key not in self.entries:
+                entry = [ fireTime, key, summary, body, False ]
+                self.entries[ key ] = entry
+                heapq.heappush( self.queue, entry )
+
+        # Forget fired alerts whose events have passed; they can no longer recur.
+        self.fired = { key for key in self.fired if key[ -1 ] > now - 24 * 60 * 60 }
+
+        self.__arm()
+
+
+    def cancel( self ):
+        if self.timerID:
+            GLib.source_remove( self.timerID )
+            self.timerID = None
+            self.timerFireTime = None
+
+
+    # Returns a list of ( key, fireTime, summary, body ) for a rule.
+    # The key identifies the alert: ( rule index, location, event timestamp ).
+    def __compile( self, ruleIndex, rule, readings ):
+        event = rule[ TideAlertScheduler.RULE_EVENT ]
+        location = rule.get( TideAlertScheduler.RULE_LOCATION, "" )
+        secondsBefore = float( rule.get( TideAlertScheduler.RULE_MINUTES_BEFORE, 0 ) ) * 60
+        before = _( " in {} minutes" ).format( rule[ TideAlertScheduler.RULE_MINUTES_BEFORE ] ) if secondsBefore else ""
+        alerts = [ ]
+
+        if event in ( TideAlertScheduler.EVENT_HIGH, TideAlertScheduler.EVENT_LOW ):
+            isHigh = event == TideAlertScheduler.EVENT_HIGH
+            for reading in readings:
+                if reading.getTimestamp() is not None and reading.isHigh() == isHigh and location in ( "", reading.getLocation() ):
+                    summary = ( _( "High water" ) if isHigh else _( "Low water" ) ) + before
+                    body = "{}: {} ({})".format( reading.getLocation(), reading.getTime(), reading.getLevel() )
+                    key = ( ruleIndex, reading.getLocation(), reading.getTimestamp() )
+                    alerts.append( ( key, reading.getTimestamp() - secondsBefore, summary, body ) )
+
+        elif event in ( TideAlertScheduler.EVENT_BELOW, TideAlertScheduler.EVENT_ABOVE ):
+            height = float( rule[ TideAlertScheduler.RULE_HEIGHT ] )
+            falling = event == TideAlertScheduler.EVENT_BELOW
+            for reading0, t0, h0, reading1, t1, h1 in tidecurve.getIntervals( readings ):
+                if ( h0 > h1 ) == falling and location in ( "", reading0.getLocation() ):
+                    crossingTime = tidecurve.getCrossingTime( t0, h0, t1, h1, height )
+                    if crossingTime is not None:
+                        summary = ( _( "Tide below {}m" ) if falling else _( "Tide above {}m" ) ).format( height ) + before
+                        body = "{}: {} {}".format(
+                            reading0.getLocation(),
+                            _( "falling to" ) if falling else _( "rising to" ),
+                            "{} ({})".format( reading1.getTime(), reading1.getLevel() ) )
+
+                        key = ( ruleIndex, reading0.getLocation(), int( crossingTime ) )
+                        alerts.append( ( key, crossingTime - secondsBefore, summary, body ) )
+
+        else:
+            raise ValueError( "unknown event '{}'".format( event ) )
+
+        return alerts
+
+
+    # Ensure a single timeout is armed for the earliest pending alert.
+    def __arm( self ):
+        while self.queue and self.queue[ 0 ][ -1 ]:
+            heapq.heappop( self.queue )
+
+        fireTime = self.queue[ 0 ][ 0 ] if self.queue else None
+        if fireTime != self.timerFireTime:
+            self.cancel()
+            if fireTime is not None:
+                delayInMilliseconds = max( 0, int( ( fireTime - time.time() ) * 1000 ) )
+                self.timerID = GLib.timeout_add( delayInMilliseconds, self.__onTimer )
+                self.timerFireTime = fireTime
+
+
+    def __onTimer( self ):
+        self.timerID = None
+        self.timerFireTime = None
+        now = time.time()
+        while self.queue and self.queue[ 0 ][ 0 ] <= now:
+            fireTime, key, summary, body, removed = heapq.heappop( self.queue )
+            if not removed:
+                del self.entries[ key ]
+                self.fired.add( key )
+                if now - fireTime <= TideAlertScheduler.LATE_TOLERANCE_IN_SECONDS:
+                    self.notify( summary, body )
+
+        self.__arm()
+        return False
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# Compressed archive of raw API responses, kept in the cache directory.
+#
+# Each archive file is a single compressed stream (gzip, or zstd when the
+# zstandard module is installed) holding:
+#
+#    a header, one line of JSON: station, fetch time, window, parts and content hash;
+#    the raw payload: each part (response body) concatenated in the order listed in the header.
+#
+# The file name follows the cache convention of IndicatorBase,
+#
+#    tide-archive-STATION-YYYYMMDDHHMMSS.gz
+#
+# so that IndicatorBase.flushCache() may be used to discard old archives.
+# Regardless, writing an archive discards those of the station fetched more than a maximum age before it.
+#
+# Reading back is streamed: the header is obtained by decompressing only the first line
+# and a single part is obtained by skipping (without retaining) the parts before it.
+
+
+import datetime, gzip, hashlib, io, json, os
+
+try:
+    import zstandard
+
+except ImportError:
+    zstandard = None
+
+
+ARCHIVE_BASENAME = "tide-archive-"
+
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_ZSTD = "zstd"
+
+EXTENSION_GZIP = ".gz"
+EXTENSION_ZSTD = ".zst"
+
+FORMAT_NAME = "tide-archive"
+FORMAT_VERSION = 1
+
+MAXIMUM_AGE_IN_DAYS = 90 # Archives kept per station, relative to the latest; months, so responses may be reparsed.
+
+_CACHE_DATE_TIME_FORMAT_YYYYMMDDHHMMSS = "%Y%m%d%H%M%S"
+_CHUNK_SIZE = 64 * 1024
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+# Return the archive basename for a station, suitable for IndicatorBase cache functions.
+def getBasename( station ):
+    return ARCHIVE_BASENAME + str( station ) + '-'
+
+
+# Write raw responses to a new compressed archive in the given directory.
+#
+# directory: The cache directory, ending in '/'.
+# station: The station/seaport ID.
+# fetchTime: The UTC datetime at which the responses were fetched.
+# windowStart: The first date (datetime.date) of the requested window.
+# windowDays: The number of days in the requested window.
+# parts: A list of ( name, bytes ) pairs, typically ( "station", ... ), ( "events", ... ).
+# compression: COMPRESSION_GZIP or COMPRESSION_ZSTD; None selects zstd if available, otherwise gzip.
+# maximumAgeInDays: Archives of the station fetched this many days before fetchTime are removed; None keeps all.
+#
+# Returns the filename written.
+def writeArchive( directory, station, fetchTime, windowStart, windowDays, parts, compression = None, maximumAgeInDays = MAXIMUM_AGE_IN_DAYS ):
+    if compression is None:
+        compression = COMPRESSION_ZSTD if zstandard else COMPRESSION_GZIP
+
+    if compression == COMPRESSION_ZSTD and zstandard is None:
+        raise ValueError( "zstd compression requested but the zstandard module is not installed." )
+
+    contentHash = hashlib.sha256()
+    for name, payload in parts:
+        contentHash.update( payload )
+
+    header = {
+        "format" : FORMAT_NAME,
+        "version" : FORMAT_VERSION,
+        "station" : str( station ),
+        "fetchTime" : fetchTime.strftime( "%Y-%m-%dT%H:%M:%SZ" ),
+        "windowStart" : windowStart.isoformat(),
+        "windowDays" : int( windowDays ),
+        "parts" : [ { "name" : name, "length" : len( payload ) } for name, payload in parts ],
+        "sha256" : contentHash.hexdigest() }
+
+    filename = \
+        directory + \
+        getBasename( station ) + \
+        fetchTime.strftime( _CACHE_DATE_TIME_FORMAT_YYYYMMDDHHMMSS ) + \
+        ( EXTENSION_ZSTD if compression == COMPRESSION_ZSTD else EXTENSION_GZIP )
+
+    # Write to a temporary file and rename, so a reader never sees a partial archive.
+    # The temporary file is unique to the process, as the indicator and the command line may write at once,
+    # and hidden, so is never taken for an archive.
+    temporaryFilename = directory + '.' + os.path.basename( filename ) + '.' + str( os.getpid() ) + ".tmp"
+    try:
+        with _openForWriting( temporaryFilename, compression ) as fOut:
+            fOut.write( json.dumps( header, separators = ( ',', ':' ) ).encode() + b'\n' )
+            for name, payload in parts:
+                fOut.write( payload )
+
+        os.replace( temporaryFilename, filename )
+
+    except Exception:
+        if os.path.exists( temporaryFilename ):
+            os.remove( temporaryFilename )
+
+        raise
+
+    if maximumAgeInDays is not None:
+        pruneArchives( directory, station, fetchTime - datetime.timedelta( days = maximumAgeInDays ) )
+
+    return filename
+
+
+# Remove the archives of the station fetched before the cutoff (a UTC datetime), as given by the file name.
+#
+# Returns the filenames removed.
+def pruneArchives( directory, station, cutoff ):
+    cutoff = cutoff.strftime( _CACHE_DATE_TIME_FORMAT_YYYYMMDDHHMMSS )
+    start = len( directory + getBasename( station ) )
+    removed = [ filename for filename in listArchives( directory, station ) if filename[ start : start + len( cutoff ) ] < cutoff ]
+    for filename in removed:
+        try:
+            os.remove( filename )
+
+        except FileNotFoundError:
+            pass # Removed by another process.
+
+    return removed
+
+
+# Read the header of an archive, decompressing only as far as the end of the header line.
+#
+# Returns the header as a dictionary.
+def readHeader( filename ):
+    with _openForReading( filename ) as fIn:
+        return _readHeader( fIn )
+
+
+# Read the raw bytes of one named part of an archive.
+#
+# Parts preceding the requested part are decompressed in chunks and discarded;
+# decompression stops once the requested part has been read.
+#
+# Returns the bytes of the part; None if no such part exists.
+def readPart( filename, name ):
+    data = None
+    with _openForReading( filename ) as fIn:
+        header = _readHeader( fIn )
+        for part in header[ "parts" ]:
+            if part[ "name" ] == name:
+                data = _read( fIn, part[ "length" ] )
+                break
+
+            _skip( fIn, part[ "length" ] )
+
+    return data
+
+
+# Read all parts of an archive, verifying the content hash.
+#
+# Returns the header and a dictionary of part name to bytes.
+# Raises ValueError if the content hash does not match.
+def readParts( filename ):
+    with _openForReading( filename ) as fIn:
+        header = _readHeader( fIn )
+        contentHash = hashlib.sha256()
+        parts = { }
+        for part in header[ "parts" ]:
+            payload = _read( fIn, part[ "length" ] )
+            contentHash.update( payload )
+            parts[ part[ "name" ] ] = payload
+
+    if contentHash.hexdigest() != header[ "sha256" ]:
+        raise ValueError( "Content hash mismatch in archive: " + filename )
+
+    return header, parts
+
+
+# Return the archive filenames in the directory, oldest first.
+#
+# station: If not None, only archives for that station are returned.
+def listArchives( directory, station = None ):
+    basename = ARCHIVE_BASENAME if station is None else getBasename( station )
+    return sorted(
+        directory + file
+        for file in os.listdir( directory )
+        if file.startswith( basename ) and file.endswith( ( EXTENSION_GZIP, EXTENSION_ZSTD ) ) )
+
+
+def _openForWriting( filename, compression ):
+    if compression == COMPRESSION_ZSTD:
+        return zstandard.ZstdCompressor().stream_writer( open( filename, "wb" ), closefd = True )
+
+    return gzip.open( filename, "wb" )
+
+
+def _openForReading( filename ):
+    with open( filename, "rb" ) as fIn:
+        magic = fIn.read( len( _ZSTD_MAGIC ) )
+
+    if magic == _ZSTD_MAGIC:
+        if zstandard is None:
+            raise ValueError( "Archive is zstd compressed but the zstandard module is not installed: " + filename )
+
+        return io.BufferedReader( zstandard.ZstdDecompressor().stream_reader( open( filename, "rb" ), closefd = True ) )
+
+    return gzip.open( filename, "rb" )
+
+
+def _readHeader( fIn ):
+    header = json.loads( fIn.readline() )
+    if header.get( "format" ) != FORMAT_NAME:
+        raise ValueError( "Not a tide archive." )
+
+    if header.get( "version", 0 ) > FORMAT_VERSION:
+        raise ValueError( "Unsupported tide archive version: " + str( header.get( "version" ) ) )
+
+    return header
+
+
+def _read( fIn, length ):
+    data = fIn.read( length )
+    if len( data ) != length:
+        raise ValueError( "Truncated tide archive." )
+
+    return data
+
+
+def _skip( fIn, length ):
+    while length > 0:
+        chunk = fIn.read( min( length, _CHUNK_SIZE ) )
+        if not chunk:
+            raise ValueError( "Truncated tide archive." )
+
+        length -= len( chunk )
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# Tide height between high/low water events.
+#
+# Between consecutive events ( t0, h0 ) and ( t1, h1 ) the height follows a half cosine,
+#
+#    h( t ) = h0 + ( h1 - h0 ) * ( 1 - cos( pi * ( t - t0 ) / ( t1 - t0 ) ) ) / 2
+#
+# which is the usual approximation (close to the rule of twelfths) when only the events are known.
+
+
+import math, numpy
+
+
+# Return the height in metres of a tide.Reading as a float; None if the level is not a number.
+#
+# The level may be a number or a string such as "1.23m".
+def getHeight( reading ):
+    try:
+        height = float( str( reading.getLevel() ).strip().rstrip( "mM" ) )
+
+    except ValueError:
+        height = None
+
+    return height
+
+
+# Return the time at which the curve between ( t0, h0 ) and ( t1, h1 ) passes through the given height;
+# None if the height is not passed through ( t0, t1 ].
+def getCrossingTime( t0, h0, t1, h1, height ):
+    crossingTime = None
+    if h0 != h1 and min( h0, h1 ) <= height <= max( h0, h1 ) and height != h0:
+        fraction = math.acos( 1 - 2 * ( height - h0 ) / ( h1 - h0 ) ) / math.pi
+        crossingTime = t0 + ( t1 - t0 ) * fraction
+
+    return crossingTime
+
+
+# Return the consecutive pairs of readings, per location, which have both timestamp and height,
+# as a list of ( reading0, t0, h0, reading1, t1, h1 ) in time order.
+def getIntervals( readings ):
+    readingsByLocation = { }
+    for reading in readings:
+        height = getHeight( reading )
+        if reading.getTimestamp() is not None and height is not None:
+            readingsByLocation.setdefault( reading.getLocation(), [ ] ).append( ( reading, reading.getTimestamp(), height ) )
+
+    intervals = [ ]
+    for locationReadings in readingsByLocation.values():
+        locationReadings.sort( key = lambda readingTimestampHeight: readingTimestampHeight[ 1 ] )
+        for first, second in zip( locationReadings, locationReadings[ 1 : ] ):
+            intervals.append( first + second )
+
+    intervals.sort( key = lambda interval: interval[ 1 ] )
+    return intervals
+
+
+# Return the height at each timestamp (a numpy array of float) along the curve through the intervals;
+# NaN where a timestamp is not within an interval.
+#
+# intervals: As returned by getIntervals(), for a single location.
+def getHeights( intervals, timestamps ):
+    columns = list( zip( *intervals ) ) # ( reading0s, t0s, h0s, reading1s, t1s, h1s )
+    return getHeightsFromEvents(
+        list( columns[ 1 ] ) + [ columns[ 4 ][ -1 ] ] if intervals else [ ],
+        list( columns[ 2 ] ) + [ columns[ 5 ][ -1 ] ] if intervals else [ ],
+        timestamps )
+
+
+# Return the height at each timestamp (a numpy array of float) along the curve through consecutive events;
+# NaN where a timestamp is before the first or after the last event.
+#
+# eventTimestamps: Times of high/low water events (seconds since the epoch), in ascending order.
+# eventHeights: Heights in metres of the events.
+def getHeightsFromEvents( eventTimestamps, eventHeights, timestamps ):
+    timestamps = numpy.asarray( timestamps, dtype = float )
+    heights = numpy.full( timestamps.shape, numpy.nan )
+    if len( eventTimestamps ) > 1:
+        t = numpy.asarray( eventTimestamps, dtype = float )
+        h = numpy.asarray( eventHeights, dtype = float )
+        indices = numpy.clip( numpy.searchsorted( t, timestamps, side = "right" ) - 1, 0, len( t ) - 2 )
+        t0, t1 = t[ indices ], t[ indices + 1 ]
+        h0, h1 = h[ indices ], h[ indices + 1 ]
+        valid = ( timestamps >= t0 ) & ( timestamps <= t1 )
+        heights = numpy.where( valid, h0 + ( h1 - h0 ) * ( 1 - numpy.cos( numpy.pi * ( timestamps - t0 ) / ( t1 - t0 ) ) ) / 2, numpy.nan )
+
+    return heights
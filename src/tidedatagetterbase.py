@@ -29,12 +29,22 @@ class TideDataGetterBase( ABC ):
 
     # Returns a list of tidal readings.
     #
+    # cacheDirectory: If not None, the directory (ending in '/') in which the raw responses may be archived (see tidearchive).
+    # eventStore: If not None, a tidestore.TideEventStore into which all fetched events should be upserted.
+    # timezoneName: IANA time zone name in which to express dates/times; empty or None for the system time zone (see tidetimezone).
+    # transport: If not None, a tidetransport.Transport through which all HTTP requests should be made.
+    # cancellation: If not None, an indicatorbase.CancellationToken bounding the whole call;
+    #               pass to each transport.get() and return promptly once cancelled.
+    #
+    # Only those parameters named in the implementation's signature are passed by Indicator Tide,
+    # so older scripts lacking newer parameters continue to work.
+    #
     # This function is abstract and must be implemented by the end user.
     # In the users's implementation, remove the @abstractmethod from the function header.
     @staticmethod
     @abstractmethod
     # --- START: Add new 'durationDays' parameter to method signature ---
-    def getTideData( logging = None, urlTimeoutInSeconds = 20, durationDays = 7 ):
+    def getTideData( logging = None, urlTimeoutInSeconds = 20, durationDays = 7, cacheDirectory = None, eventStore = None, timezoneName = None, transport = None, cancellation = None ):
     # --- END: Add new 'durationDays' parameter to method signature ---
         # Example data returned by this function, to be implemented by the end user in the own script and class.
         return [
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# Export of tide height at a fixed resolution, from the events in the local event store (see tidestore).
+#
+# Heights are evaluated along the half cosine curve between consecutive events (see tidecurve),
+# one chunk of samples at a time, so memory is bounded regardless of the range and number of stations.
+#
+# CSV: a header line of utc,timestamp then each station ID, followed by a line per sample time
+# with the height (metres, to the millimetre) at each station; empty where unknown.
+#
+# Binary (columnar): a single line of JSON header, such as
+#
+#    {"format": "tide-heights", "version": 1, "start": 1735689600, "step": 60, "count": 525600, "dtype": "<f4", "stations": ["0001", "0536"]}
+#
+# followed by, for each station in turn, count heights (NaN where unknown) for the timestamps start + i * step.
+# Use readBinary() to read, which maps the heights without loading them.
+#
+# Command line usage (run with --help for details):
+#
+#    python3 tideexport.py 2025-01-01 2026-01-01 --resolution 60 --output heights.csv
+#    python3 tideexport.py 2025-01-01 2026-01-01 --station 0536 --format binary --output heights.bin
+
+
+import argparse, datetime, json, numpy, os, sys, tidecurve
+
+from tidestore import TideEventStore, getDefaultFilename
+
+
+FORMAT_BINARY = "binary"
+FORMAT_CSV = "csv"
+
+BINARY_FORMAT = "tide-heights"
+BINARY_VERSION = 1
+BINARY_DTYPE = "<f4"
+
+CHUNK_SAMPLES = 64 * 1024
+
+# Events this far either side of the range are read, so the curve is known at the ends of the range.
+EVENT_MARGIN_IN_SECONDS = 24 * 60 * 60
+
+
+# Return ( event timestamps, event heights ) numpy arrays for the station, covering start (inclusive) to end (exclusive).
+def getEvents( store, station, start, end ):
+    events = store.getEvents( start - EVENT_MARGIN_IN_SECONDS, end + EVENT_MARGIN_IN_SECONDS, station )
+    return \
+        numpy.array( [ event[ 1 ] for event in events ], dtype = numpy.int64 ), \
+        numpy.array( [ event[ 4 ] for event in events ], dtype = float )
+
+
+# Yield numpy arrays of timestamps, in chunks of at most CHUNK_SAMPLES, from start (inclusive) to end (exclusive) every step seconds.
+def getTimestampChunks( start, end, step ):
+    for chunkStart in range( int( start ), int( end ), step * CHUNK_SAMPLES ):
+        yield numpy.arange( chunkStart, min( int( end ), chunkStart + step * CHUNK_SAMPLES ), step, dtype = numpy.int64 )
+
+
+def writeCSV( store, stations, start, end, step, fOut ):
+    events = [ getEvents( store, station, start, end ) for station in stations ]
+
+    # Heights along the curve never exceed the events, so each is formatted by lookup (in millimetres)
+    # rather than formatting every sample; the last entry (index -1) is for unknown heights.
+    allHeights = numpy.concatenate( [ eventHeights for eventTimestamps, eventHeights in events ] + [ numpy.zeros( 1 ) ] )
+    lowest = int( numpy.floor( allHeights.min() * 1000 ) )
+    highest = int( numpy.ceil( allHeights.max() * 1000 ) )
+    levels = numpy.array( [ "{:.3f}".format( millimetres / 1000 ) for millimetres in range( lowest, highest + 1 ) ] + [ "" ], dtype = object )
+
+    fOut.write( "utc,timestamp," + ",".join( stations ) + '\n' )
+    for timestamps in getTimestampChunks( start, end, step ):
+        columns = [ timestamps.astype( "datetime64[s]" ).astype( str ).tolist(), timestamps.astype( str ).tolist() ]
+        for eventTimestamps, eventHeights in events:
+            heights = tidecurve.getHeightsFromEvents( eventTimestamps, eventHeights, timestamps )
+            indices = numpy.where( numpy.isnan( heights ), -1, numpy.rint( numpy.nan_to_num( heights ) * 1000 ).astype( numpy.int64 ) - lowest )
+            columns.append( levels[ indices ].tolist() )
+
+        fOut.write( '\n'.join( map( ','.join, zip( *columns ) ) ) + '\n' )
+
+
+# fOut: Opened in binary mode.
+def writeBinary( store, stations, start, end, step, fOut ):
+    header = {
+        "format" : BINARY_FORMAT,
+        "version" : BINARY_VERSION,
+        "start" : int( start ),
+        "step" : step,
+        "count" : len( range( int( start ), int( end ), step ) ),
+        "dtype" : BINARY_DTYPE,
+        "stations" : stations }
+
+    fOut.write( ( json.dumps( header ) + '\n' ).encode() )
+    for station in stations:
+        eventTimestamps, eventHeights = getEvents( store, station, start, end )
+        for timestamps in getTimestampChunks( start, end, step ):
+            fOut.write( tidecurve.getHeightsFromEvents( eventTimestamps, eventHeights, timestamps ).astype( BINARY_DTYPE ).tobytes() )
+
+
+# Returns ( header, heights ) where heights is a read only numpy.memmap of shape ( stations, count ).
+def readBinary( filename ):
+    with open( filename, 'rb' ) as fIn:
+        header = json.loads( fIn.readline() )
+        offset = fIn.tell()
+
+    if header.get( "format" ) != BINARY_FORMAT or header.get( "version" ) != BINARY_VERSION:
+        raise ValueError( "Not a tide heights file: " + filename )
+
+    heights = numpy.memmap( filename, dtype = header[ "dtype" ], mode = 'r', offset = offset, shape = ( len( header[ "stations" ] ), header[ "count" ] ) )
+    return header, heights
+
+
+def _parseDate( text ):
+    return datetime.datetime.strptime( text, "%Y-%m-%d" ).timestamp() # Local midnight.
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser( description = "Export tide heights at a fixed resolution from the local store of tidal events." )
+    parser.add_argument( "start", help = "YYYY-MM-DD, inclusive." )
+    parser.add_argument( "end", help = "YYYY-MM-DD, exclusive." )
+    parser.add_argument( "--database", default = getDefaultFilename(), help = "Path to the event store." )
+    parser.add_argument( "--station", action = "append", help = "Station ID; may be repeated. Defaults to all stations in the store." )
+    parser.add_argument( "--resolution", type = int, default = 60, help = "Seconds between samples." )
+    parser.add_argument( "--format", choices = [ FORMAT_CSV, FORMAT_BINARY ], default = FORMAT_CSV )
+    parser.add_argument( "--output", default = '-', help = "Output file; '-' (the default) for standard output (CSV only)." )
+
+    arguments = parser.parse_args()
+    if not os.path.isfile( arguments.database ):
+        parser.error( "No event store at " + arguments.database )
+
+    if arguments.resolution < 1:
+        parser.error( "The resolution must be at least one second." )
+
+    if arguments.format == FORMAT_BINARY and arguments.output == '-':
+        parser.error( "Binary output requires --output." )
+
+    store = TideEventStore( arguments.database )
+    stations = arguments.station if arguments.station else [ station for station, location in store.getStations() ]
+    start = _parseDate( arguments.start )
+    end = _parseDate( arguments.end )
+
+    if arguments.format == FORMAT_BINARY:
+        with open( arguments.output, 'wb' ) as fOut:
+            writeBinary( store, stations, start, end, arguments.resolution, fOut )
+
+    elif arguments.output == '-':
+        writeCSV( store, stations, start, end, arguments.resolution, sys.stdout )
+
+    else:
+        with open( arguments.output, 'w' ) as fOut:
+            writeCSV( store, stations, start, end, arguments.resolution, fOut )
+
+    store.close()
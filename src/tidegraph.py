@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# Window showing the tide height curve for each location, with a marker for now.
+#
+# The curve is sampled once per pixel of the plot width (vectorised, see tidecurve.getHeights()).
+# Everything other than the now marker is drawn to an image surface,
+# which is reused until the window size leaves its size bucket;
+# within a bucket the surface is scaled to fit.
+
+
+import cairo, datetime, math, numpy, tidecurve, tidetimezone, time
+
+from gi.repository import GLib, Gtk
+
+
+class TideCurveWindow( Gtk.Window ):
+
+    # The background is rendered at the window size rounded up to a multiple of this.
+    SIZE_BUCKET_IN_PIXELS = 32
+
+    MARGIN_BOTTOM = 24
+    MARGIN_LEFT = 48
+    MARGIN_RIGHT = 12
+    MARGIN_TOP = 24
+
+    # RGB colour of the curve for each location, in turn.
+    COLOURS = [ ( 0.20, 0.40, 0.80 ), ( 0.80, 0.30, 0.20 ), ( 0.20, 0.60, 0.30 ), ( 0.60, 0.30, 0.70 ), ( 0.90, 0.60, 0.10 ) ]
+
+    NOW_MARKER_INTERVAL_IN_SECONDS = 60
+
+
+    # readings: tide.Reading; those without a timestamp or height are ignored.
+    # startTimestamp, endTimestamp: The time (seconds since the epoch, UTC) spanned by the graph.
+    # timezoneName: IANA time zone name for the day boundaries and labels; empty or None for the system time zone.
+    def __init__( self, title, readings, startTimestamp, endTimestamp, timezoneName ):
+        super().__init__( title = title )
+        self.set_default_size( 800, 300 )
+
+        self.startTimestamp = startTimestamp
+        self.endTimestamp = endTimestamp
+        self.timezone = tidetimezone.getTimezone( timezoneName )
+
+        self.intervalsByLocation = { }
+        heights = [ ]
+        for interval in tidecurve.getIntervals( readings ):
+            self.intervalsByLocation.setdefault( interval[ 0 ].getLocation(), [ ] ).append( interval )
+            heights.extend( ( interval[ 2 ], interval[ 5 ] ) )
+
+        self.minimumHeight = math.floor( min( heights ) ) if heights else 0
+        self.maximumHeight = math.ceil( max( heights ) ) if heights else 1
+        if self.maximumHeight == self.minimumHeight:
+            self.maximumHeight += 1
+
+        self.background = None
+        self.backgroundSize = None
+
+        drawingArea = Gtk.DrawingArea()
+        drawingArea.connect( "draw", self.__onDraw )
+        self.add( drawingArea )
+
+        self.timerID = GLib.timeout_add_seconds( TideCurveWindow.NOW_MARKER_INTERVAL_IN_SECONDS, self.__onTimer, drawingArea )
+        self.connect( "destroy", self.__onDestroy )
+
+
+    def __onTimer( self, drawingArea ):
+        drawingArea.queue_draw() # Only the now marker moves; the background is reused.
+        return True
+
+
+    def __onDestroy( self, window ):
+        GLib.source_remove( self.timerID )
+        self.background = None
+
+
+    def __onDraw( self, drawingArea, context ):
+        width = drawingArea.get_allocated_width()
+        height = drawingArea.get_allocated_height()
+        size = ( TideCurveWindow.__getBucket( width ), TideCurveWindow.__getBucket( height ) )
+        if size != self.backgroundSize:
+            self.background = self.__createBackground( *size )
+            self.backgroundSize = size
+
+        # Draw in the coordinates of the background, so the marker lines up with the (scaled) curves.
+        context.scale( width / size[ 0 ], height / size[ 1 ] )
+        context.set_source_surface( self.background, 0, 0 )
+        context.paint()
+
+        now = time.time()
+        if self.startTimestamp <= now <= self.endTimestamp:
+            x = self.__toX( now, size[ 0 ] )
+            context.set_source_rgb( 0.85, 0.0, 0.0 )
+            context.set_line_width( 1.5 )
+            context.move_to( x, TideCurveWindow.MARGIN_TOP )
+            context.line_to( x, size[ 1 ] - TideCurveWindow.MARGIN_BOTTOM )
+            context.stroke()
+            context.set_font_size( 10 )
+            context.move_to( x + 3, TideCurveWindow.MARGIN_TOP + 12 )
+            context.show_text( _( "Now" ) )
+
+        return False
+
+
+    def __createBackground( self, width, height ):
+        surface = cairo.ImageSurface( cairo.FORMAT_ARGB32, width, height )
+        context = cairo.Context( surface )
+        context.set_source_rgb( 1, 1, 1 )
+        context.paint()
+        context.set_font_size( 10 )
+        context.set_line_width( 1 )
+
+        top = TideCurveWindow.MARGIN_TOP
+        bottom = height - TideCurveWindow.MARGIN_BOTTOM
+        left = TideCurveWindow.MARGIN_LEFT
+        right = width - TideCurveWindow.MARGIN_RIGHT
+
+        # Height grid, every metre.
+        context.set_source_rgb( 0.85, 0.85, 0.85 )
+        for metre in range( self.minimumHeight, self.maximumHeight + 1 ):
+            y = self.__toY( metre, height )
+            context.move_to( left, y )
+            context.line_to( right, y )
+            context.stroke()
+
+        context.set_source_rgb( 0.3, 0.3, 0.3 )
+        for metre in range( self.minimumHeight, self.maximumHeight + 1 ):
+            context.move_to( 4, self.__toY( metre, height ) + 4 )
+            context.show_text( "{}m".format( metre ) )
+
+        # Day boundaries, at local midnight.
+        day = datetime.datetime.fromtimestamp( self.startTimestamp, self.timezone ).date()
+        midnight = datetime.datetime.combine( day, datetime.time(), self.timezone ).timestamp()
+        while midnight < self.endTimestamp:
+            if midnight >= self.startTimestamp:
+                x = self.__toX( midnight, width )
+                context.set_source_rgb( 0.85, 0.85, 0.85 )
+                context.move_to( x, top )
+                context.line_to( x, bottom )
+                context.stroke()
+
+                context.set_source_rgb( 0.3, 0.3, 0.3 )
+                context.move_to( x + 2, height - 8 )
+                context.show_text( day.strftime( "%a %d" ) )
+
+            day += datetime.timedelta( days = 1 )
+            midnight = datetime.datetime.combine( day, datetime.time(), self.timezone ).timestamp()
+
+        # A curve for each location, one sample per pixel; gaps (no readings) are not drawn.
+        plotWidth = max( 2, int( right - left ) )
+        timestamps = numpy.linspace( self.startTimestamp, self.endTimestamp, plotWidth )
+        xs = numpy.linspace( left, right, plotWidth )
+        legendX = left
+        context.set_line_width( 1.5 )
+        for index, ( location, intervals ) in enumerate( sorted( self.intervalsByLocation.items() ) ):
+            context.set_source_rgb( *TideCurveWindow.COLOURS[ index % len( TideCurveWindow.COLOURS ) ] )
+            ys = self.__toY( tidecurve.getHeights( intervals, timestamps ), height )
+            penDown = False
+            for x, y in zip( xs.tolist(), ys.tolist() ):
+                if math.isnan( y ):
+                    penDown = False
+
+                elif penDown:
+                    context.line_to( x, y )
+
+                else:
+                    context.move_to( x, y )
+                    penDown = True
+
+            context.stroke()
+
+            context.move_to( legendX, top - 8 )
+            context.show_text( location )
+            legendX += context.text_extents( location ).x_advance + 16
+
+        return surface
+
+
+    def __toX( self, timestamp, width ):
+        plotWidth = width - TideCurveWindow.MARGIN_LEFT - TideCurveWindow.MARGIN_RIGHT
+        return TideCurveWindow.MARGIN_LEFT + ( timestamp - self.startTimestamp ) / ( self.endTimestamp - self.startTimestamp ) * plotWidth
+
+
+    # heights: A height or numpy array of heights.
+    def __toY( self, heights, height ):
+        plotHeight = height - TideCurveWindow.MARGIN_TOP - TideCurveWindow.MARGIN_BOTTOM
+        return height - TideCurveWindow.MARGIN_BOTTOM - ( heights - self.minimumHeight ) / ( self.maximumHeight - self.minimumHeight ) * plotHeight
+
+
+    @staticmethod
+    def __getBucket( size ):
+        return max( 1, math.ceil( size / TideCurveWindow.SIZE_BUCKET_IN_PIXELS ) ) * TideCurveWindow.SIZE_BUCKET_IN_PIXELS
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# Tray icons showing the state of the tide: the phase (high, low, rising, falling) and approximate level.
+#
+# The full set of icons for a colour is written once to the cache directory;
+# thereafter the icon is switched by file name, so changing the icon never generates an image.
+#
+# Icon file names are of the form
+#
+#    icon-tide-v1-COLOUR-PHASE-LEVEL.svg
+#
+# where LEVEL is 0 (low water) to LEVELS - 1 (high water).
+
+
+import math, os
+
+
+PHASE_FALLING = "falling"
+PHASE_HIGH = "high"
+PHASE_LOW = "low"
+PHASE_RISING = "rising"
+
+LEVELS = 5
+
+# Within this time of high/low water, the tide is considered to be at high/low water (slack water).
+SLACK_IN_SECONDS = 30 * 60
+
+ICON_BASENAME = "icon-tide-"
+ICON_VERSION = "v1" # Change when the drawing changes, so that stale icon sets are not used.
+ICON_EXTENSION = ".svg"
+
+
+# Return the ( phase, level ) of the tide at the given time; None if the time is not between two readings.
+#
+# intervals: As returned by tidecurve.getIntervals().
+# location: The location of the readings; None for the location of the first interval.
+def getState( intervals, timestamp, location = None ):
+    state = None
+    for reading0, t0, h0, reading1, t1, h1 in intervals:
+        if location is None:
+            location = reading0.getLocation()
+
+        if reading0.getLocation() == location and t0 <= timestamp < t1:
+            if timestamp - t0 < SLACK_IN_SECONDS:
+                phase = PHASE_HIGH if h0 > h1 else PHASE_LOW
+
+            elif t1 - timestamp < SLACK_IN_SECONDS:
+                phase = PHASE_HIGH if h1 > h0 else PHASE_LOW
+
+            else:
+                phase = PHASE_RISING if h1 > h0 else PHASE_FALLING
+
+            if phase == PHASE_HIGH:
+                level = LEVELS - 1
+
+            elif phase == PHASE_LOW:
+                level = 0
+
+            else:
+                # Fraction of the way from low to high water, along the half cosine.
+                fraction = ( 1 - math.cos( math.pi * ( timestamp - t0 ) / ( t1 - t0 ) ) ) / 2
+                if h1 < h0:
+                    fraction = 1 - fraction
+
+                level = min( LEVELS - 1, max( 0, int( round( fraction * ( LEVELS - 1 ) ) ) ) )
+
+            state = ( phase, level )
+            break
+
+    return state
+
+
+# Return the file name (without directory) of the icon for a state.
+def getIconFilename( colour, phase, level ):
+    return ICON_BASENAME + ICON_VERSION + '-' + colour.lower() + '-' + phase + '-' + str( level ) + ICON_EXTENSION
+
+
+# Return each state for which there is an icon, as a list of ( phase, level ).
+def getStates():
+    states = [ ( PHASE_HIGH, LEVELS - 1 ), ( PHASE_LOW, 0 ) ]
+    for level in range( LEVELS ):
+        states.append( ( PHASE_RISING, level ) )
+        states.append( ( PHASE_FALLING, level ) )
+
+    return states
+
+
+# Return the SVG for a state.
+#
+# A rounded square, filled with water to the level, with an arrow (rising/falling) or bar (high/low) above.
+def getIconSVG( colour, phase, level ):
+    waterTop = 20 - 2 * ( level + 1 ) # Level 0 is two pixels of water; the top level is ten.
+    if phase == PHASE_RISING:
+        marker = '<polygon points="11,2 16,7 13,7 13,9 9,9 9,7 6,7" fill="#{0}"/>'
+
+    elif phase == PHASE_FALLING:
+        marker = '<polygon points="11,9 16,4 13,4 13,2 9,2 9,4 6,4" fill="#{0}"/>'
+
+    else:
+        marker = '<rect x="5" y="4" width="12" height="2" fill="#{0}"/>'
+
+    svg = \
+        '<svg xmlns="http://www.w3.org/2000/svg" width="22" height="22" viewBox="0 0 22 22">' + \
+        '<rect x="1.75" y="1.75" width="18.5" height="18.5" rx="3" fill="none" stroke="#{0}" stroke-width="1.5"/>' + \
+        '<rect x="3" y="{1}" width="16" height="{2}" fill="#{0}" fill-opacity="0.6"/>' + \
+        marker + \
+        '</svg>'
+
+    return svg.format( colour, waterTop, 19 - waterTop )
+
+
+# Write any missing icons for the colour to the directory.
+#
+# Returns a dictionary of ( phase, level ) to full icon path.
+def createIcons( directory, colour ):
+    icons = { }
+    for phase, level in getStates():
+        filename = directory + getIconFilename( colour, phase, level )
+        if not os.path.isfile( filename ):
+            # Hidden and unique to the process, as another process sharing the cache may write the same icon.
+            temporaryFilename = directory + '.' + os.path.basename( filename ) + '.' + str( os.getpid() ) + ".tmp"
+            try:
+                with open( temporaryFilename, 'w' ) as fOut:
+                    fOut.write( getIconSVG( colour, phase, level ) )
+
+                os.replace( temporaryFilename, filename )
+
+            except Exception:
+                if os.path.exists( temporaryFilename ):
+                    os.remove( temporaryFilename )
+
+                raise
+
+        icons[ ( phase, level ) ] = filename
+
+    return icons
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# Compact binary serialisation of tide readings and stations, in lieu of pickle.
+#
+# Layout (little endian throughout):
+#
+#    header        magic "TIDR", version, header size, kind, record size, record count,
+#                  string count, metadata string (index; NONE if absent)
+#    records       record count fixed width records of record size bytes
+#    string table  string count + 1 offsets (uint32) into the string data, then the UTF-8 string data
+#
+# Strings in records are indices into the string table, from 1 (0 is None); each distinct string is stored once.
+# Numbers which may be unknown are stored as NaN.
+#
+# Readers accept any file of the same version with a header and records at least as large as they know,
+# skipping trailing fields added by later writers; a change which older readers cannot skip bumps the version.
+#
+# Metadata is a JSON object, for whatever the caller needs to keep alongside the records.
+
+
+import array, json, math, struct, sys, tide, tidestations
+
+
+MAGIC = b"TIDR"
+VERSION = 1
+
+KIND_READINGS = 1
+KIND_STATIONS = 2
+
+NONE = 0 # String index for an absent string.
+
+_HEADER = struct.Struct( "<4sHHHHIII" )
+
+# date, time, location, level, url, isHigh, timestamp.
+_READING = struct.Struct( "<IIIIIB3xd" )
+
+# id, name, latitude, longitude.
+_STATION = struct.Struct( "<IIdd" )
+
+
+# A level which is not a string (user scripts may return a number) is stored, and so decoded, as text.
+#
+# Returns bytes.
+def encodeReadings( readings, metadata = None ):
+    strings = _StringTable()
+    records = bytearray( _READING.size * len( readings ) )
+    for index, reading in enumerate( readings ):
+        _READING.pack_into(
+            records,
+            index * _READING.size,
+            strings.add( reading.getDate() ),
+            strings.add( reading.getTime() ),
+            strings.add( reading.getLocation() ),
+            strings.add( None if reading.getLevel() is None else str( reading.getLevel() ) ),
+            strings.add( reading.getURL() ),
+            1 if reading.isHigh() else 0,
+            _fromOptional( reading.getTimestamp() ) )
+
+    return _encode( KIND_READINGS, _READING, len( readings ), records, strings, metadata )
+
+
+# buffer: Any bytes-like object, such as bytes or an mmap.
+#
+# Returns ( readings, metadata ); metadata is None if absent.
+def decodeReadings( buffer ):
+    recordSize, count, strings, metadata, offset = _decode( buffer, KIND_READINGS, _READING )
+    readings = [
+        tide.Reading(
+            strings[ date ],
+            strings[ time ],
+            strings[ location ],
+            isHigh == 1,
+            strings[ level ],
+            strings[ url ],
+            _toOptional( timestamp ) )
+        for date, time, location, level, url, isHigh, timestamp in _iterateRecords( buffer, offset, recordSize, count, _READING ) ]
+
+    return readings, metadata
+
+
+# stations: tidestations.Station.
+#
+# Returns bytes.
+def encodeStations( stations, metadata = None ):
+    strings = _StringTable()
+    records = bytearray( _STATION.size * len( stations ) )
+    for index, station in enumerate( stations ):
+        _STATION.pack_into(
+            records,
+            index * _STATION.size,
+            strings.add( station.id ),
+            strings.add( station.name ),
+            _fromOptional( station.latitude ),
+            _fromOptional( station.longitude ) )
+
+    return _encode( KIND_STATIONS, _STATION, len( stations ), records, strings, metadata )
+
+
+# Returns ( stations, metadata ); metadata is None if absent.
+def decodeStations( buffer ):
+    recordSize, count, strings, metadata, offset = _decode( buffer, KIND_STATIONS, _STATION )
+    stations = [
+        tidestations.Station( strings[ id ], strings[ name ], _toOptional( latitude ), _toOptional( longitude ) )
+        for id, name, latitude, longitude in _iterateRecords( buffer, offset, recordSize, count, _STATION ) ]
+
+    return stations, metadata
+
+
+# Return the metadata alone, without decoding the records; None if absent.
+def decodeMetadata( buffer ):
+    return _decode( buffer, None, None )[ 3 ]
+
+
+class _StringTable( object ):
+
+    def __init__( self ):
+        self.indices = { }
+        self.strings = [ ]
+
+
+    # Returns the index of the string, adding it if new; None is NONE.
+    def add( self, string ):
+        if string is None:
+            index = NONE
+
+        else:
+            index = self.indices.get( string )
+            if index is None:
+                index = len( self.strings ) + 1
+                self.indices[ string ] = index
+                self.strings.append( string )
+
+        return index
+
+
+    def toBytes( self ):
+        data = [ string.encode() for string in self.strings ]
+        offsets = array.array( 'I', [ 0 ] )
+        for encoded in data:
+            offsets.append( offsets[ -1 ] + len( encoded ) )
+
+        if sys.byteorder != "little":
+            offsets.byteswap()
+
+        return offsets.tobytes() + b"".join( data )
+
+
+def _encode( kind, recordStruct, count, records, strings, metadata ):
+    metadataIndex = NONE if metadata is None else strings.add( json.dumps( metadata ) )
+    header = _HEADER.pack( MAGIC, VERSION, _HEADER.size, kind, recordStruct.size, count, len( strings.strings ), metadataIndex )
+    return header + bytes( records ) + strings.toBytes()
+
+
+# Validate the header and decode the string table.
+#
+# kind, recordStruct: Expected kind and record layout; None to skip the checks (metadata only).
+#
+# Returns ( record size, record count, strings, metadata, offset of the first record ).
+# Raises ValueError if not a valid file of the expected kind.
+def _decode( buffer, kind, recordStruct ):
+    view = memoryview( buffer )
+    if len( view ) < _HEADER.size:
+        raise ValueError( "Too short for a header." )
+
+    magic, version, headerSize, actualKind, recordSize, count, stringCount, metadataIndex = _HEADER.unpack_from( view )
+    if magic != MAGIC or version != VERSION or headerSize < _HEADER.size:
+        raise ValueError( "Not a version {} tide records file.".format( VERSION ) )
+
+    if kind is not None and ( actualKind != kind or recordSize < recordStruct.size ):
+        raise ValueError( "Unexpected kind {} or record size {}.".format( actualKind, recordSize ) )
+
+    stringsOffset = headerSize + recordSize * count
+    dataOffset = stringsOffset + ( stringCount + 1 ) * 4
+    if len( view ) < dataOffset:
+        raise ValueError( "Truncated." )
+
+    offsets = array.array( 'I' )
+    offsets.frombytes( view[ stringsOffset : dataOffset ] )
+    if sys.byteorder != "little":
+        offsets.byteswap()
+
+    if len( view ) < dataOffset + offsets[ -1 ]:
+        raise ValueError( "Truncated." )
+
+    # Indexed by string index, so NONE (0) is None.
+    data = view[ dataOffset : dataOffset + offsets[ -1 ] ]
+    strings = [ None ] + [ str( data[ start : end ], "utf-8" ) for start, end in zip( offsets, offsets[ 1 : ] ) ]
+    metadata = None if metadataIndex == NONE else json.loads( strings[ metadataIndex ] )
+    return recordSize, count, strings, metadata, headerSize
+
+
+# Yield the fields of each record known to the record struct, skipping any trailing fields of a later version.
+def _iterateRecords( buffer, offset, recordSize, count, recordStruct ):
+    view = memoryview( buffer )[ offset : offset + recordSize * count ]
+    if recordSize == recordStruct.size:
+        return recordStruct.iter_unpack( view )
+
+    return ( recordStruct.unpack_from( view, index * recordSize ) for index in range( count ) )
+
+
+def _fromOptional( number ):
+    return math.nan if number is None else number
+
+
+def _toOptional( number ):
+    return None if math.isnan( number ) else number
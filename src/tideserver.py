@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# Read only HTTP/JSON server, on a Unix socket, publishing the readings of the running indicator
+# so that other processes on the host need not fetch the same data.
+#
+#    GET /readings                    The current readings, stations and next update time.
+#    GET /stations                    The stations only.
+#    GET /changes?since=N&timeout=S   Long poll: responds as /readings once the version exceeds N
+#                                     (immediately if it already does), or 204 after S seconds (default 60).
+#
+# Every response to /readings carries "version", which increases with each publish.
+# Responses are serialised once per publish and served from memory.
+#
+# The socket is created with permissions for the current user only.
+# A socket left by a process which has gone is replaced; one on which another process is serving is not.
+#
+# Command line client (run with --help for details):
+#
+#    python3 tideserver.py readings
+#    python3 tideserver.py changes --since 3
+
+
+import argparse, errno, http.client, http.server, json, os, socket, socketserver, threading, time, urllib.parse
+
+
+SOCKET_FILENAME = "indicator-tide.sock"
+
+PATH_CHANGES = "/changes"
+PATH_READINGS = "/readings"
+PATH_STATIONS = "/stations"
+
+CHANGES_TIMEOUT_IN_SECONDS = 60
+CHANGES_MAXIMUM_TIMEOUT_IN_SECONDS = 300
+
+
+class TideReadingsServer( object ):
+
+    # socketPath: Path of the Unix socket; an existing socket at the path is replaced unless in use.
+    def __init__( self, socketPath, logging ):
+        self.socketPath = socketPath
+        self.logging = logging
+        self.condition = threading.Condition()
+        self.version = 0
+        self.readingsBody = TideReadingsServer.__toBody( { "version" : 0, "readings" : [ ], "stations" : [ ], "published" : None, "nextUpdate" : None } )
+        self.stationsBody = TideReadingsServer.__toBody( { "version" : 0, "stations" : [ ] } )
+        self.server = None
+        self.thread = None
+
+
+    # Raises OSError (EADDRINUSE) if another server is listening on the socket;
+    # OSError if the socket cannot be checked or created.
+    def start( self ):
+        if os.path.exists( self.socketPath ):
+            if TideReadingsServer.__isListening( self.socketPath ):
+                raise OSError( errno.EADDRINUSE, "Readings are already published by another process", self.socketPath )
+
+            os.remove( self.socketPath ) # Left by a process which has gone.
+
+        previousUmask = os.umask( 0o177 ) # Socket is created as 0600.
+        try:
+            self.server = _UnixHTTPServer( self.socketPath, _RequestHandler )
+
+        finally:
+            os.umask( previousUmask )
+
+        self.server.owner = self
+        self.thread = threading.Thread( target = self.server.serve_forever, name = "TideReadingsServer", daemon = True )
+        self.thread.start()
+        self.logging.info( "Publishing readings on " + self.socketPath )
+
+
+    def stop( self ):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            with self.condition:
+                self.condition.notify_all()
+
+            if os.path.exists( self.socketPath ):
+                os.remove( self.socketPath )
+
+
+    # Publish new readings, waking any clients waiting on changes.
+    #
+    # readings: tide.Reading.
+    # stations: List of dictionaries of station metadata (id, name, latitude, longitude).
+    # nextUpdateTimestamp: When the readings are next refreshed (seconds since the epoch, UTC); None if unknown.
+    def publish( self, readings, stations, nextUpdateTimestamp ):
+        with self.condition:
+            self.version += 1
+            self.readingsBody = TideReadingsServer.__toBody( {
+                "version" : self.version,
+                "published" : time.time(),
+                "nextUpdate" : nextUpdateTimestamp,
+                "stations" : stations,
+                "readings" : [ {
+                    "date" : reading.getDate(),
+                    "time" : reading.getTime(),
+                    "location" : reading.getLocation(),
+                    "isHigh" : reading.isHigh(),
+                    "level" : reading.getLevel(),
+                    "timestamp" : reading.getTimestamp(),
+                    "url" : reading.getURL() } for reading in readings ] } )
+
+            self.stationsBody = TideReadingsServer.__toBody( { "version" : self.version, "stations" : stations } )
+            self.condition.notify_all()
+
+
+    # Returns ( status, body ) for a request path.
+    def getResponse( self, path ):
+        url = urllib.parse.urlsplit( path )
+        if url.path == PATH_READINGS:
+            response = ( 200, self.readingsBody )
+
+        elif url.path == PATH_STATIONS:
+            response = ( 200, self.stationsBody )
+
+        elif url.path == PATH_CHANGES:
+            query = urllib.parse.parse_qs( url.query )
+            try:
+                since = int( query.get( "since", [ "0" ] )[ 0 ] )
+                timeout = min( float( query.get( "timeout", [ CHANGES_TIMEOUT_IN_SECONDS ] )[ 0 ] ), CHANGES_MAXIMUM_TIMEOUT_IN_SECONDS )
+
+            except ValueError:
+                response = ( 400, TideReadingsServer.__toBody( { "error" : "Invalid since/timeout." } ) )
+
+            else:
+                with self.condition:
+                    changed = self.condition.wait_for( lambda: self.version > since or self.server is None, timeout )
+                    response = ( 200, self.readingsBody ) if changed and self.server else ( 204, b"" )
+
+        else:
+            response = ( 404, TideReadingsServer.__toBody( { "error" : "Unknown path: " + url.path } ) )
+
+        return response
+
+
+    @staticmethod
+    def __isListening( socketPath ):
+        with socket.socket( socket.AF_UNIX, socket.SOCK_STREAM ) as clientSocket:
+            clientSocket.settimeout( 1 )
+            try:
+                clientSocket.connect( socketPath )
+                listening = True
+
+            except ConnectionRefusedError: # Nothing listening (also the case for a file which is not a socket).
+                listening = False
+
+        return listening
+
+
+    @staticmethod
+    def __toBody( dictionary ):
+        return json.dumps( dictionary ).encode()
+
+
+class _UnixHTTPServer( socketserver.ThreadingMixIn, socketserver.UnixStreamServer ):
+    daemon_threads = True
+
+
+    # Clients which go away (such as whilst waiting for changes) are expected; not worth a stack trace.
+    def handle_error( self, request, client_address ):
+        self.owner.logging.debug( "Readings server: client error.", exc_info = True )
+
+
+class _RequestHandler( http.server.BaseHTTPRequestHandler ):
+
+    def do_GET( self ):
+        status, body = self.server.owner.getResponse( self.path )
+        self.send_response( status )
+        if body:
+            self.send_header( "Content-Type", "application/json" )
+            self.send_header( "Content-Length", str( len( body ) ) )
+
+        self.end_headers()
+        if body:
+            self.wfile.write( body )
+
+
+    # Unix socket clients have no address, which the default implementations assume.
+    def address_string( self ):
+        return self.server.server_address
+
+
+    def log_message( self, format, *args ):
+        self.server.owner.logging.debug( "Readings server: " + ( format % args ) )
+
+
+class _UnixHTTPConnection( http.client.HTTPConnection ):
+
+    def __init__( self, socketPath, timeout ):
+        super().__init__( "localhost", timeout = timeout )
+        self.socketPath = socketPath
+
+
+    def connect( self ):
+        self.sock = socket.socket( socket.AF_UNIX, socket.SOCK_STREAM )
+        self.sock.settimeout( self.timeout )
+        self.sock.connect( self.socketPath )
+
+
+# Client: GET the path from the server at the socket.
+#
+# Returns ( status, dictionary ); the dictionary is None for a response without a body.
+def request( socketPath, path, timeout = CHANGES_MAXIMUM_TIMEOUT_IN_SECONDS + 5 ):
+    connection = _UnixHTTPConnection( socketPath, timeout )
+    try:
+        connection.request( "GET", path )
+        response = connection.getresponse()
+        body = response.read()
+        return response.status, json.loads( body ) if body else None
+
+    finally:
+        connection.close()
+
+
+# The default location of the socket: the user runtime directory if available, otherwise the indicator cache directory.
+def getDefaultSocketPath( indicatorName = "tide" ):
+    if "XDG_RUNTIME_DIR" in os.environ:
+        directory = os.environ[ "XDG_RUNTIME_DIR" ] + '/'
+
+    elif "XDG_CACHE_HOME" in os.environ:
+        directory = os.environ[ "XDG_CACHE_HOME" ] + '/' + indicatorName + '/'
+
+    else:
+        directory = os.path.expanduser( '~' ) + "/.cache/" + indicatorName + '/'
+
+    return directory + SOCKET_FILENAME
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser( description = "Query the readings published by the running tide indicator." )
+    parser.add_argument( "--socket", default = getDefaultSocketPath(), help = "Path to the indicator socket." )
+    subparsers = parser.add_subparsers( dest = "command", required = True )
+    subparsers.add_parser( "readings", help = "The current readings, stations and next update time." )
+    subparsers.add_parser( "stations", help = "The stations of the current readings." )
+    changesParser = subparsers.add_parser( "changes", help = "Wait for readings newer than a version." )
+    changesParser.add_argument( "--since", type = int, default = 0 )
+    changesParser.add_argument( "--timeout", type = float, default = CHANGES_TIMEOUT_IN_SECONDS )
+
+    arguments = parser.parse_args()
+    if arguments.command == "changes":
+        path = PATH_CHANGES + "?" + urllib.parse.urlencode( { "since" : arguments.since, "timeout" : arguments.timeout } )
+
+    else:
+        path = PATH_READINGS if arguments.command == "readings" else PATH_STATIONS
+
+    status, dictionary = request( arguments.socket, path )
+    print( json.dumps( dictionary, indent = 4 ) if dictionary else status )
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# A cache directory shared between processes (and users), with single flight fetching.
+#
+# Each entry is a file, replaced atomically (written to a temporary file then renamed),
+# so readers never see a partial entry and need no lock.
+#
+# Filling an entry takes an exclusive fcntl lock on the entry's lock file.
+# A process finding an entry missing or stale takes the lock, then checks again:
+# if another process filled the entry whilst the lock was awaited, that result is used;
+# otherwise this process fetches and writes the entry, whilst others wait.
+#
+# For several users to share a directory, each must be able to write to it
+# (such as a directory owned by a common group, with the setgid bit set).
+# The sticky bit must not be set, as it prevents replacing another user's entries.
+
+
+import fcntl, hashlib, os, time
+
+
+class SharedCache( object ):
+
+    LOCK_POLL_INTERVAL_IN_SECONDS = 0.05
+
+    __EXTENSION_LOCK = ".lock"
+
+
+    # directory: The shared directory, ending in '/'; created if not present.
+    def __init__( self, directory, logging ):
+        self.directory = directory
+        self.logging = logging
+        os.makedirs( directory, exist_ok = True )
+
+
+    # Return the entry for the key as bytes if written within the maximum age, otherwise call fetch to obtain it.
+    #
+    # key: Any text identifying the entry, such as a URL.
+    # fetch: Function returning bytes to be cached, or None if nothing is to be cached.
+    # lockTimeoutInSeconds: How long to wait for another process fetching the same entry;
+    #                       thereafter fetch is called regardless.
+    # isCancelled: Function returning True to stop waiting for the lock (fetch is then called regardless,
+    #              so should itself check for cancellation); None to always wait.
+    #
+    # Returns the bytes, or None if the entry could not be obtained.
+    def get( self, key, maximumAgeInSeconds, fetch, lockTimeoutInSeconds = 60, isCancelled = None ):
+        filename = self.getFilename( key )
+        content = self.__read( filename, maximumAgeInSeconds )
+        if content is None:
+            lockFile = self.__lock( filename + SharedCache.__EXTENSION_LOCK, lockTimeoutInSeconds, isCancelled )
+            try:
+                content = self.__read( filename, maximumAgeInSeconds ) # Fetched by another process whilst waiting?
+                if content is None:
+                    content = fetch()
+                    if content is not None:
+                        self.__write( filename, content )
+
+                else:
+                    self.logging.debug( "Shared cache entry written by another process: " + filename )
+
+            finally:
+                if lockFile is not None:
+                    os.close( lockFile ) # Releases the lock.
+
+        return content
+
+
+    def getFilename( self, key ):
+        return self.directory + hashlib.sha256( key.encode() ).hexdigest()[ : 32 ]
+
+
+    # Returns the content of the file if no older than the maximum age; None otherwise.
+    def __read( self, filename, maximumAgeInSeconds ):
+        content = None
+        try:
+            with open( filename, 'rb' ) as fIn:
+                if time.time() - os.fstat( fIn.fileno() ).st_mtime <= maximumAgeInSeconds:
+                    content = fIn.read()
+
+        except FileNotFoundError:
+            pass
+
+        return content
+
+
+    def __write( self, filename, content ):
+        temporaryFilename = filename + "." + str( os.getpid() ) + ".tmp"
+        try:
+            fileDescriptor = os.open( temporaryFilename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o664 )
+            with os.fdopen( fileDescriptor, 'wb' ) as fOut:
+                fOut.write( content )
+
+            os.replace( temporaryFilename, filename )
+
+        except Exception as e:
+            self.logging.error( "Error writing to shared cache: {} {}".format( filename, e ) )
+            if os.path.exists( temporaryFilename ):
+                os.remove( temporaryFilename )
+
+
+    # Take an exclusive lock on the lock file, waiting at most the timeout or until cancelled.
+    #
+    # Returns the file descriptor holding the lock; None if the lock could not be taken.
+    def __lock( self, lockFilename, timeoutInSeconds, isCancelled ):
+        fileDescriptor = None
+        try:
+            fileDescriptor = os.open( lockFilename, os.O_RDWR | os.O_CREAT, 0o666 )
+            deadline = time.monotonic() + timeoutInSeconds
+            while True:
+                try:
+                    fcntl.flock( fileDescriptor, fcntl.LOCK_EX | fcntl.LOCK_NB )
+                    break
+
+                except BlockingIOError:
+                    if time.monotonic() > deadline:
+                        raise TimeoutError( "Timed out waiting for " + lockFilename )
+
+                    if isCancelled and isCancelled():
+                        raise TimeoutError( "Cancelled waiting for " + lockFilename )
+
+                    time.sleep( SharedCache.LOCK_POLL_INTERVAL_IN_SECONDS )
+
+        except Exception as e:
+            self.logging.warning( "Shared cache lock not taken; fetching regardless: {}".format( e ) )
+            if fileDescriptor is not None:
+                os.close( fileDescriptor )
+                fileDescriptor = None
+
+        return fileDescriptor
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# Tide stations (seaports) and in-memory indices over them.
+#
+# StationIndex, for type-ahead search, is built once from the station list and answers a query with:
+#
+#    stations whose ID or any word of whose name starts with the query (prefix index, by bisection);
+#    then stations sharing the most trigrams with the query (trigram index), to tolerate typos and partial words.
+#
+# StationSpatialIndex answers nearest stations to a location (k-d tree) and stations within a bounding box.
+
+
+import bisect, heapq, json, math
+
+
+class Station( object ):
+
+    # id: The station ID, such as "0536".
+    # name: The name of the station.
+    # latitude, longitude: Decimal degrees; None if unknown.
+    def __init__( self, id, name, latitude = None, longitude = None ):
+        self.id = id
+        self.name = name
+        self.latitude = latitude
+        self.longitude = longitude
+
+
+    def getLabel( self ):
+        return "{} ({})".format( self.name, self.id )
+
+
+    def __repr__( self ):
+        return self.getLabel()
+
+
+# Parse the GeoJSON returned by the /Stations endpoint (as text) into a list of Station, sorted by name.
+def parseStations( geoJSONText ):
+    stations = [ ]
+    for feature in json.loads( geoJSONText ).get( "features", [ ] ):
+        properties = feature.get( "properties", { } )
+        coordinates = ( feature.get( "geometry" ) or { } ).get( "coordinates" ) or [ None, None ]
+        stations.append(
+            Station(
+                properties[ "Id" ],
+                properties[ "Name" ],
+                coordinates[ 1 ], # GeoJSON is longitude, latitude.
+                coordinates[ 0 ] ) )
+
+    stations.sort( key = lambda station: station.name.lower() )
+    return stations
+
+
+class StationIndex( object ):
+
+    # Trigram matches must share at least this fraction of the query's trigrams, and no fewer than this many:
+    # a single trigram may be no more than a shared first character (such as "  0"), which would match far too much.
+    MINIMUM_TRIGRAM_SIMILARITY = 0.3
+    MINIMUM_SHARED_TRIGRAMS = 2
+
+
+    def __init__( self, stations ):
+        self.stations = stations
+
+        # Sorted ( key, station index ) for prefix search, where a key is the ID or a word of the name.
+        self.prefixes = [ ]
+        self.trigrams = { } # Trigram to set of station indices.
+        for index, station in enumerate( stations ):
+            self.prefixes.append( ( station.id.lower(), index ) )
+            for word in StationIndex.__normalise( station.name ).split():
+                self.prefixes.append( ( word, index ) )
+
+            for trigram in StationIndex.__getTrigrams( station.name + ' ' + station.id ):
+                self.trigrams.setdefault( trigram, set() ).add( index )
+
+        self.prefixes.sort()
+        self.prefixKeys = [ key for key, index in self.prefixes ]
+
+
+    def getStations( self ):
+        return self.stations
+
+
+    # Return the stations matching the query, best matches first; all stations for an empty query.
+    def search( self, query, limit = None ):
+        query = StationIndex.__normalise( query )
+        if not query:
+            return self.stations[ : limit ]
+
+        # Prefix matches, on the first word of the query, must also contain every other word of the query.
+        words = query.split()
+        matches = [ ]
+        seen = set()
+        start = bisect.bisect_left( self.prefixKeys, words[ 0 ] )
+        for key, index in self.prefixes[ start : ]:
+            if not key.startswith( words[ 0 ] ):
+                break
+
+            if index not in seen:
+                seen.add( index )
+                name = StationIndex.__normalise( self.stations[ index ].name )
+                if all( word in name for word in words[ 1 : ] ):
+                    matches.append( index )
+
+        matches.sort( key = lambda index: self.stations[ index ].name.lower() )
+
+        # Trigram matches, ranked by the number of trigrams shared.
+        queryTrigrams = StationIndex.__getTrigrams( query )
+        counts = { }
+        for trigram in queryTrigrams:
+            for index in self.trigrams.get( trigram, ( ) ):
+                if index not in seen:
+                    counts[ index ] = counts.get( index, 0 ) + 1
+
+        minimum = max( StationIndex.MINIMUM_SHARED_TRIGRAMS, len( queryTrigrams ) * StationIndex.MINIMUM_TRIGRAM_SIMILARITY )
+        similar = [ index for index, count in counts.items() if count >= minimum ]
+        similar.sort( key = lambda index: ( -counts[ index ], self.stations[ index ].name.lower() ) )
+
+        return [ self.stations[ index ] for index in matches + similar ][ : limit ]
+
+
+    @staticmethod
+    def __normalise( text ):
+        return ''.join( character if character.isalnum() else ' ' for character in text.lower() ).strip()
+
+
+    @staticmethod
+    def __getTrigrams( text ):
+        trigrams = set()
+        for word in StationIndex.__normalise( text ).split():
+            padded = "  " + word + ' '
+            trigrams.update( padded[ i : i + 3 ] for i in range( len( padded ) - 2 ) )
+
+        return trigrams
+
+
+# Parse a location such as "50.103, -5.543" (latitude, longitude in decimal degrees).
+#
+# Returns ( latitude, longitude ); None if the text is not a valid location.
+def parseLocation( text ):
+    location = None
+    try:
+        latitude, longitude = ( float( part ) for part in text.replace( ',', ' ' ).split() )
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            location = ( latitude, longitude )
+
+    except ValueError:
+        pass
+
+    return location
+
+
+class StationSpatialIndex( object ):
+
+    EARTH_RADIUS_IN_KM = 6371.0
+
+
+    # Stations without coordinates are ignored.
+    def __init__( self, stations ):
+        self.stations = [ station for station in stations if station.latitude is not None and station.longitude is not None ]
+
+        # Nearest neighbour: a k-d tree over points on the unit sphere,
+        # where straight line (chord) distance orders the same as great circle distance.
+        points = [ ( StationSpatialIndex.__toPoint( station.latitude, station.longitude ), index ) for index, station in enumerate( self.stations ) ]
+        self.tree = StationSpatialIndex.__build( points, 0 )
+
+        # Bounding box: stations sorted by latitude, for bisection.
+        self.byLatitude = sorted( range( len( self.stations ) ), key = lambda index: self.stations[ index ].latitude )
+        self.latitudes = [ self.stations[ index ].latitude for index in self.byLatitude ]
+
+
+    # Return the count nearest stations to the location as a list of ( distance in km, station ), nearest first.
+    def getNearest( self, latitude, longitude, count = 1 ):
+        target = StationSpatialIndex.__toPoint( latitude, longitude )
+        best = [ ] # Max heap (negated squared distance) of the best found so far.
+        pending = [ self.tree ]
+        while pending:
+            node = pending.pop()
+            if node is None:
+                continue
+
+            point, index, axis, left, right = node
+            distanceSquared = sum( ( a - b ) ** 2 for a, b in zip( point, target ) )
+            if len( best ) < count:
+                heapq.heappush( best, ( -distanceSquared, index ) )
+
+            elif distanceSquared < -best[ 0 ][ 0 ]:
+                heapq.heapreplace( best, ( -distanceSquared, index ) )
+
+            difference = target[ axis ] - point[ axis ]
+            near, far = ( left, right ) if difference < 0 else ( right, left )
+            if len( best ) < count or difference ** 2 < -best[ 0 ][ 0 ]:
+                pending.append( far )
+
+            pending.append( near ) # Visited first.
+
+        nearest = [ ]
+        for negativeDistanceSquared, index in sorted( best, reverse = True ):
+            chord = math.sqrt( -negativeDistanceSquared )
+            distance = 2 * math.asin( min( 1.0, chord / 2 ) ) * StationSpatialIndex.EARTH_RADIUS_IN_KM
+            nearest.append( ( distance, self.stations[ index ] ) )
+
+        return nearest
+
+
+    # Return the stations within the box, sorted by latitude.
+    # The box may span the antimeridian, in which case west > east.
+    def getWithinBox( self, south, west, north, east ):
+        start = bisect.bisect_left( self.latitudes, south )
+        end = bisect.bisect_right( self.latitudes, north )
+        stations = [ ]
+        for index in self.byLatitude[ start : end ]:
+            longitude = self.stations[ index ].longitude
+            if ( west <= longitude <= east ) if west <= east else ( longitude >= west or longitude <= east ):
+                stations.append( self.stations[ index ] )
+
+        return stations
+
+
+    @staticmethod
+    def __toPoint( latitude, longitude ):
+        latitude = math.radians( latitude )
+        longitude = math.radians( longitude )
+        return (
+            math.cos( latitude ) * math.cos( longitude ),
+            math.cos( latitude ) * math.sin( longitude ),
+            math.sin( latitude ) )
+
+
+    # Each node is ( point, station index, axis, left node, right node ); None for an empty subtree.
+    @staticmethod
+    def __build( points, depth ):
+        node = None
+        if points:
+            axis = depth % 3
+            points.sort( key = lambda pointAndIndex: pointAndIndex[ 0 ][ axis ] )
+            median = len( points ) // 2
+            node = (
+                points[ median ][ 0 ],
+                points[ median ][ 1 ],
+                axis,
+                StationSpatialIndex.__build( points[ : median ], depth + 1 ),
+                StationSpatialIndex.__build( points[ median + 1 : ], depth + 1 ) )
+
+        return node
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# Local SQLite store of every tidal event fetched, for offline range queries.
+#
+# Events are keyed on ( station, timestamp ), where timestamp is seconds since the epoch (UTC).
+# The database runs in WAL mode so the indicator may write whilst the command line reads.
+#
+# Command line usage (run with --help for details):
+#
+#    python3 tidestore.py next --count 3 --high
+#    python3 tidestore.py range 2025-03-01 2025-04-01
+
+
+import argparse, datetime, os, sqlite3, tide, tidetimezone
+
+
+class TideEventStore( object ):
+
+    FILENAME = "tide-events.sqlite"
+
+    __SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS events ( " +
+            "station TEXT NOT NULL, " +
+            "timestamp INTEGER NOT NULL, " +
+            "location TEXT NOT NULL, " +
+            "isHigh INTEGER NOT NULL, " +
+            "height REAL NOT NULL, " +
+            "PRIMARY KEY ( station, timestamp ) ) WITHOUT ROWID",
+        "CREATE INDEX IF NOT EXISTS eventsByTimestamp ON events ( timestamp, station )" ]
+
+    __UPSERT = \
+        "INSERT INTO events ( station, timestamp, location, isHigh, height ) VALUES ( ?, ?, ?, ?, ? ) " + \
+        "ON CONFLICT ( station, timestamp ) DO UPDATE SET " + \
+        "location = excluded.location, isHigh = excluded.isHigh, height = excluded.height"
+
+
+    # filename: Full path to the database file; created if absent.
+    def __init__( self, filename ):
+        self.filename = filename
+        self.connection = sqlite3.connect( filename, check_same_thread = False ) # Used from one thread at a time, though not always the same thread.
+        self.connection.execute( "PRAGMA journal_mode = WAL" )
+        self.connection.execute( "PRAGMA synchronous = NORMAL" )
+        with self.connection:
+            for statement in TideEventStore.__SCHEMA:
+                self.connection.execute( statement )
+
+
+    def close( self ):
+        self.connection.close()
+
+
+    # Insert or update events for a station in a single transaction.
+    #
+    # station: The station/seaport ID.
+    # location: The name of the station.
+    # events: Iterable of ( timestamp, isHigh, height ), timestamp in seconds since the epoch (UTC).
+    #
+    # Returns the number of events written.
+    def upsertEvents( self, station, location, events ):
+        rows = [ ( str( station ), int( timestamp ), location, 1 if isHigh else 0, float( height ) ) for timestamp, isHigh, height in events ]
+        with self.connection:
+            self.connection.executemany( TideEventStore.__UPSERT, rows )
+
+        return len( rows )
+
+
+    # Return events within [ start, end ), ordered by time then station.
+    #
+    # start, end: Seconds since the epoch (UTC).
+    # station: If not None, restrict to this station.
+    # isHigh: If not None, restrict to high (True) or low (False) tides.
+    #
+    # Each event is a tuple ( station, timestamp, location, isHigh, height ).
+    def getEvents( self, start, end, station = None, isHigh = None ):
+        sql = "SELECT station, timestamp, location, isHigh, height FROM events WHERE timestamp >= ? AND timestamp < ?"
+        parameters = [ int( start ), int( end ) ]
+        sql, parameters = TideEventStore.__addFilters( sql, parameters, station, isHigh )
+        sql += " ORDER BY timestamp, station"
+        return [ TideEventStore.__toEvent( row ) for row in self.connection.execute( sql, parameters ) ]
+
+
+    # Return, for each station, the next count events at or after the given time,
+    # ordered by station then time.
+    #
+    # fromTimestamp: Seconds since the epoch (UTC); None for now.
+    # station: If not None, restrict to this station.
+    # isHigh: If not None, restrict to high (True) or low (False) tides.
+    #
+    # Each event is a tuple ( station, timestamp, location, isHigh, height ).
+    def getNextEvents( self, count, fromTimestamp = None, station = None, isHigh = None ):
+        if fromTimestamp is None:
+            fromTimestamp = datetime.datetime.now( datetime.timezone.utc ).timestamp()
+
+        sql = "SELECT station, timestamp, location, isHigh, height, ROW_NUMBER() OVER ( PARTITION BY station ORDER BY timestamp ) AS n FROM events WHERE timestamp >= ?"
+        parameters = [ int( fromTimestamp ) ]
+        sql, parameters = TideEventStore.__addFilters( sql, parameters, station, isHigh )
+        sql = "SELECT station, timestamp, location, isHigh, height FROM ( " + sql + " ) WHERE n <= ? ORDER BY station, timestamp"
+        parameters.append( int( count ) )
+        return [ TideEventStore.__toEvent( row ) for row in self.connection.execute( sql, parameters ) ]
+
+
+    # Return a list of ( station, location ) for all stations in the store.
+    def getStations( self ):
+        return self.connection.execute( "SELECT station, MAX( location ) FROM events GROUP BY station ORDER BY station" ).fetchall()
+
+
+    # Return events within [ start, end ) for a station as a list of tide.Reading,
+    # formatted as per the user script: local date/time and level in metres.
+    #
+    # url: Assigned to each tide.Reading.
+    # timezoneName: IANA time zone name for the date/time; empty or None for the system time zone.
+    def getReadings( self, start, end, station, url, timezoneName = None ):
+        readings = [ ]
+        events = self.getEvents( start, end, station )
+        converter = tidetimezone.TimezoneConverter( timezoneName, start, end )
+        dateTimes = converter.toLocalDateTimes( [ event[ 1 ] for event in events ] )
+        for ( station, timestamp, location, isHigh, height ), dateTime in zip( events, dateTimes ):
+            readings.append(
+                tide.Reading(
+                    dateTime.strftime( "%A %B %d" ),
+                    dateTime.strftime( "%I:%M %p" ),
+                    location,
+                    isHigh,
+                    f"{round( height, 2 )}m",
+                    url,
+                    timestamp ) )
+
+        return readings
+
+
+    @staticmethod
+    def __addFilters( sql, parameters, station, isHigh ):
+        if station is not None:
+            sql += " AND station = ?"
+            parameters.append( str( station ) )
+
+        if isHigh is not None:
+            sql += " AND isHigh = ?"
+            parameters.append( 1 if isHigh else 0 )
+
+        return sql, parameters
+
+
+    @staticmethod
+    def __toEvent( row ):
+        return ( row[ 0 ], row[ 1 ], row[ 2 ], bool( row[ 3 ] ), row[ 4 ] )
+
+
+# The default location of the store, matching the cache directory of the indicator.
+def getDefaultFilename( indicatorName = "tide" ):
+    if "XDG_CACHE_HOME" in os.environ:
+        directory = os.environ[ "XDG_CACHE_HOME" ] + '/' + indicatorName + '/'
+
+    else:
+        directory = os.path.expanduser( '~' ) + "/.cache/" + indicatorName + '/'
+
+    return directory + TideEventStore.FILENAME
+
+
+def _printEvents( events ):
+    for station, timestamp, location, isHigh, height in events:
+        dateTime = datetime.datetime.fromtimestamp( timestamp ).strftime( "%Y-%m-%d %H:%M" )
+        print( f"{dateTime}  {station:>6}  {location:<30}  {'High' if isHigh else 'Low ':<4}  {height:6.2f}m" )
+
+
+def _parseDate( text ):
+    return datetime.datetime.strptime( text, "%Y-%m-%d" ).timestamp() # Local midnight.
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser( description = "Query the local store of tidal events." )
+    parser.add_argument( "--database", default = getDefaultFilename(), help = "Path to the event store." )
+    parser.add_argument( "--station", default = None, help = "Restrict to a station ID." )
+    highOrLow = parser.add_mutually_exclusive_group()
+    highOrLow.add_argument( "--high", dest = "isHigh", action = "store_const", const = True, help = "High tides only." )
+    highOrLow.add_argument( "--low", dest = "isHigh", action = "store_const", const = False, help = "Low tides only." )
+    subparsers = parser.add_subparsers( dest = "command", required = True )
+
+    nextParser = subparsers.add_parser( "next", help = "Next events at each station." )
+    nextParser.add_argument( "--count", type = int, default = 3 )
+
+    rangeParser = subparsers.add_parser( "range", help = "Events between two local dates, START inclusive, END exclusive." )
+    rangeParser.add_argument( "start", help = "YYYY-MM-DD" )
+    rangeParser.add_argument( "end", help = "YYYY-MM-DD" )
+
+    subparsers.add_parser( "stations", help = "Stations held in the store." )
+
+    arguments = parser.parse_args()
+    if not os.path.isfile( arguments.database ):
+        parser.error( "No event store at " + arguments.database )
+
+    store = TideEventStore( arguments.database )
+    if arguments.command == "next":
+        _printEvents( store.getNextEvents( arguments.count, station = arguments.station, isHigh = arguments.isHigh ) )
+
+    elif arguments.command == "range":
+        _printEvents( store.getEvents( _parseDate( arguments.start ), _parseDate( arguments.end ), arguments.station, arguments.isHigh ) )
+
+    else:
+        for station, location in store.getStations():
+            print( f"{station:>6}  {location}" )
+
+    store.close()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# Bulk conversion of UTC timestamps to local time for a given time zone.
+#
+# The UTC offset transitions (daylight saving changes) within a window are found once,
+# after which any number of timestamps are converted with a single vectorised lookup,
+# rather than localising each timestamp in turn.
+
+
+import datetime, numpy, os, zoneinfo
+
+
+# Return the IANA name of the system time zone, such as "Europe/London".
+#
+# Checked in order: the TZ environment variable, the /etc/localtime symbolic link, /etc/timezone.
+# Returns "UTC" if no name can be determined.
+def getSystemTimezoneName():
+    name = os.environ.get( "TZ", "" ).lstrip( ':' )
+
+    if not name and os.path.islink( "/etc/localtime" ):
+        target = os.path.realpath( "/etc/localtime" )
+        if "zoneinfo/" in target:
+            name = target.split( "zoneinfo/", 1 )[ 1 ]
+
+    if not name and os.path.isfile( "/etc/timezone" ):
+        with open( "/etc/timezone", 'r' ) as fIn:
+            name = fIn.read().strip()
+
+    return name if name else "UTC"
+
+
+# Return the zoneinfo time zone for the given name; an empty name or None gives the system time zone.
+def getTimezone( timezoneName = None ):
+    return zoneinfo.ZoneInfo( timezoneName if timezoneName else getSystemTimezoneName() )
+
+
+# Parse ISO 8601 UTC date/time strings, such as "2024-08-03T04:07:00.123", into seconds since the epoch.
+# Fractional seconds are ignored.
+def parseUTCTimestamps( dateTimeStrings ):
+    return numpy.array( [ dateTimeString[ : 19 ] for dateTimeString in dateTimeStrings ], dtype = "datetime64[s]" ).astype( numpy.int64 )
+
+
+class TimezoneConverter( object ):
+
+    # The search for transitions samples the offset at this interval.
+    # Transitions are never closer together than this in practice.
+    __SAMPLE_INTERVAL_IN_SECONDS = 24 * 60 * 60
+
+
+    # timezoneName: IANA time zone name; empty or None for the system time zone.
+    # startTimestamp, endTimestamp: The window (seconds since the epoch, UTC) over which conversions will be made.
+    #                               Timestamps outside the window are converted using the offset at the nearest end.
+    def __init__( self, timezoneName, startTimestamp, endTimestamp ):
+        self.timezone = getTimezone( timezoneName )
+        self.startTimestamp = int( startTimestamp )
+        self.endTimestamp = int( endTimestamp )
+
+        transitionTimestamps = [ self.startTimestamp ]
+        offsets = [ self.__getOffset( self.startTimestamp ) ]
+        previous = self.startTimestamp
+        while previous < self.endTimestamp:
+            current = min( previous + TimezoneConverter.__SAMPLE_INTERVAL_IN_SECONDS, self.endTimestamp )
+            offset = self.__getOffset( current )
+            if offset != offsets[ -1 ]:
+                transitionTimestamps.append( self.__findTransition( previous, current, offsets[ -1 ] ) )
+                offsets.append( offset )
+
+            previous = current
+
+        # transitionTimestamps[ i ] is the first second at which offsets[ i ] applies.
+        self.transitionTimestamps = numpy.array( transitionTimestamps, dtype = numpy.int64 )
+        self.offsets = numpy.array( offsets, dtype = numpy.int64 )
+
+
+    # Return the UTC offset in seconds for each timestamp.
+    def getOffsets( self, timestamps ):
+        indices = numpy.searchsorted( self.transitionTimestamps, numpy.asarray( timestamps, dtype = numpy.int64 ), side = "right" ) - 1
+        return self.offsets[ numpy.clip( indices, 0, None ) ]
+
+
+    # Return local wall clock time for each timestamp as numpy datetime64 (seconds).
+    def toLocal( self, timestamps ):
+        timestamps = numpy.asarray( timestamps, dtype = numpy.int64 )
+        return ( timestamps + self.getOffsets( timestamps ) ).astype( "datetime64[s]" )
+
+
+    # Return local wall clock time for each timestamp as a list of naive datetime.datetime.
+    def toLocalDateTimes( self, timestamps ):
+        return self.toLocal( timestamps ).tolist()
+
+
+    def __getOffset( self, timestamp ):
+        return int( datetime.datetime.fromtimestamp( timestamp, self.timezone ).utcoffset().total_seconds() )
+
+
+    # Binary search for the first second in ( low, high ] with an offset different to lowOffset.
+    def __findTransition( self, low, high, lowOffset ):
+        while high - low > 1:
+            middle = ( low + high ) // 2
+            if self.__getOffset( middle ) == lowOffset:
+                low = middle
+
+            else:
+                high = middle
+
+        return high
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# HTTP access for the tide data getter, so that the source of responses may be swapped:
+#
+#    LiveTransport: the network, via requests.
+#    RecordingTransport: the network, saving each request/response pair to the cache directory.
+#    ReplayTransport: the saved pairs, without the network, with deterministic timing.
+#    SharedCacheTransport: another transport, with successful responses shared between processes (see tidesharedcache).
+#
+# Recordings hold the URL, status, elapsed time and body; never the request headers (which carry the API key).
+#
+# Each get() optionally takes a cancellation token (see indicatorbase.CancellationToken):
+# the timeout is bounded by the time remaining to the token's deadline
+# and a TransportError is raised once the token is cancelled or expired, including whilst a request is in flight.
+
+
+import base64, hashlib, json, os, requests, threading, time
+
+from abc import ABC, abstractmethod
+from tidesharedcache import SharedCache
+
+
+MODE_LIVE = "live"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+RECORDING_BASENAME = "recording-"
+
+CANCELLATION_POLL_INTERVAL_IN_SECONDS = 0.1
+
+
+# Raised when a request cannot be satisfied, such as when no recording exists.
+# A requests exception, so is handled wherever network errors are.
+class TransportError( requests.exceptions.RequestException ):
+    pass
+
+
+# The parts of a requests.Response used by the getter.
+class TransportResponse( object ):
+
+    def __init__( self, url, statusCode, content, elapsedInSeconds ):
+        self.url = url
+        self.status_code = statusCode
+        self.content = content
+        self.elapsedInSeconds = elapsedInSeconds
+
+
+    @property
+    def text( self ):
+        return self.content.decode( "utf-8" )
+
+
+    def json( self ):
+        return json.loads( self.content )
+
+
+    def raise_for_status( self ):
+        if 400 <= self.status_code < 600:
+            raise requests.exceptions.HTTPError( "{} error for url: {}".format( self.status_code, self.url ), response = self )
+
+
+class Transport( ABC ):
+
+    # Perform an HTTP GET and return a TransportResponse.
+    # Raises a requests exception on network errors, or on cancellation.
+    @abstractmethod
+    def get( self, url, headers = None, timeout = None, cancellation = None ):
+        pass
+
+
+class LiveTransport( Transport ):
+
+    # With a cancellation token, the request runs on its own thread, which is abandoned on cancellation
+    # (and finishes of its own accord, within the timeout).
+    def get( self, url, headers = None, timeout = None, cancellation = None ):
+        start = time.monotonic()
+        if cancellation is None:
+            response = requests.get( url, headers = headers, timeout = timeout )
+
+        else:
+            timeout = getTimeout( timeout, cancellation )
+            result = { }
+            done = threading.Event()
+            def request():
+                try:
+                    result[ "response" ] = requests.get( url, headers = headers, timeout = timeout )
+
+                except Exception as e:
+                    result[ "error" ] = e
+
+                finally:
+                    done.set()
+
+            threading.Thread( target = request, name = "Request", daemon = True ).start()
+            while not done.wait( CANCELLATION_POLL_INTERVAL_IN_SECONDS ):
+                checkCancellation( cancellation, url )
+
+            if "error" in result:
+                raise result[ "error" ]
+
+            response = result[ "response" ]
+
+        return TransportResponse( url, response.status_code, response.content, time.monotonic() - start )
+
+
+class RecordingTransport( Transport ):
+
+    # directory: Where recordings are written, ending in '/'.
+    # transport: The transport which performs the requests.
+    def __init__( self, directory, transport = None ):
+        self.directory = directory
+        self.transport = transport if transport else LiveTransport()
+
+
+    def get( self, url, headers = None, timeout = None, cancellation = None ):
+        response = self.transport.get( url, headers, timeout, cancellation )
+        filename = getRecordingFilename( self.directory, url )
+
+        # Hidden and unique to the process, so never taken for a recording nor written by two processes at once.
+        temporaryFilename = self.directory + '.' + os.path.basename( filename ) + '.' + str( os.getpid() ) + ".tmp"
+        try:
+            with open( temporaryFilename, 'w' ) as fOut:
+                json.dump( _toRecording( response ), fOut )
+
+            os.replace( temporaryFilename, filename )
+
+        except Exception:
+            if os.path.exists( temporaryFilename ):
+                os.remove( temporaryFilename )
+
+            raise
+
+        return response
+
+
+class ReplayTransport( Transport ):
+
+    # directory: Where recordings are read, ending in '/'.
+    # delayScale: Each response is delayed by its recorded elapsed time multiplied by this;
+    #             0 (the default) replays at full speed.
+    def __init__( self, directory, delayScale = 0.0 ):
+        self.directory = directory
+        self.delayScale = delayScale
+        self.recordings = { } # Read once per URL.
+
+
+    def get( self, url, headers = None, timeout = None, cancellation = None ):
+        checkCancellation( cancellation, url )
+        if url not in self.recordings:
+            filename = getRecordingFilename( self.directory, url )
+            if not os.path.isfile( filename ):
+                raise TransportError( "No recording for url: " + url )
+
+            with open( filename, 'r' ) as fIn:
+                self.recordings[ url ] = _fromRecording( json.load( fIn ) )
+
+        response = self.recordings[ url ]
+        if self.delayScale:
+            if cancellation is None:
+                time.sleep( response.elapsedInSeconds * self.delayScale )
+
+            elif cancellation.wait( response.elapsedInSeconds * self.delayScale ):
+                checkCancellation( cancellation, url )
+
+        return response
+
+
+class SharedCacheTransport( Transport ):
+
+    # directory: The shared cache directory, ending in '/'.
+    # maximumAgeInSeconds: Cached responses older than this are fetched again.
+    # transport: The transport which performs the requests.
+    def __init__( self, directory, maximumAgeInSeconds, logging, transport = None ):
+        self.cache = SharedCache( directory, logging )
+        self.maximumAgeInSeconds = maximumAgeInSeconds
+        self.transport = transport if transport else LiveTransport()
+
+
+    # Only one process at a time fetches a given URL; the others wait for and use its response.
+    # Unsuccessful responses are returned but not cached.
+    def get( self, url, headers = None, timeout = None, cancellation = None ):
+        uncached = [ ]
+        def fetch():
+            response = self.transport.get( url, headers, timeout, cancellation )
+            if response.status_code == 200:
+                content = json.dumps( _toRecording( response ) ).encode()
+
+            else:
+                uncached.append( response )
+                content = None
+
+            return content
+
+        lockTimeout = getTimeout( ( timeout if timeout else 20 ) * 2, cancellation )
+        content = self.cache.get( url, self.maximumAgeInSeconds, fetch, lockTimeout, cancellation.isStopped if cancellation else None )
+        return uncached[ 0 ] if uncached else _fromRecording( json.loads( content ) )
+
+
+# Raises a TransportError if the cancellation token (if any) is cancelled or expired.
+def checkCancellation( cancellation, url ):
+    if cancellation is not None and cancellation.isStopped():
+        raise TransportError( "{}: {}".format( cancellation.getReason(), url ) )
+
+
+# Returns the timeout bounded by the time remaining to the deadline of the cancellation token (if any).
+# Raises a TransportError if the token is cancelled or expired.
+def getTimeout( timeout, cancellation ):
+    if cancellation is not None:
+        checkCancellation( cancellation, "" )
+        remaining = cancellation.getRemainingInSeconds()
+        if remaining is not None:
+            timeout = remaining if timeout is None else min( timeout, remaining )
+
+    return timeout
+
+
+def _toRecording( response ):
+    return {
+        "url" : response.url,
+        "status" : response.status_code,
+        "elapsed" : response.elapsedInSeconds,
+        "content" : base64.b64encode( response.content ).decode( "ascii" ) }
+
+
+def _fromRecording( recording ):
+    return TransportResponse(
+        recording[ "url" ],
+        recording[ "status" ],
+        base64.b64decode( recording[ "content" ] ),
+        recording[ "elapsed" ] )
+
+
+def getRecordingFilename( directory, url ):
+    return directory + RECORDING_BASENAME + hashlib.sha256( url.encode() ).hexdigest()[ : 16 ] + ".json"
+
+
+# Return the recording filenames in the directory; if text is given, only those whose URL contains it.
+def listRecordings( directory, text = None ):
+    filenames = [ ]
+    if os.path.isdir( directory ):
+        for file in sorted( os.listdir( directory ) ):
+            if file.startswith( RECORDING_BASENAME ) and file.endswith( ".json" ):
+                if text is None:
+                    filenames.append( directory + file )
+
+                else:
+                    with open( directory + file, 'r' ) as fIn:
+                        if text in json.load( fIn )[ "url" ]:
+                            filenames.append( directory + file )
+
+    return filenames
+
+
+# Create the transport for a mode (MODE_LIVE, MODE_RECORD, MODE_REPLAY), recording to/replaying from the directory.
+def createTransport( mode, directory ):
+    if mode == MODE_RECORD:
+        transport = RecordingTransport( directory )
+
+    elif mode == MODE_REPLAY:
+        transport = ReplayTransport( directory )
+
+    else:
+        transport = LiveTransport()
+
+    return transport
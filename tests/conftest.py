@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# Tests of the modules which need neither GTK nor the network; run from the top level directory with
+#
+#    python3 -m pytest tests
+#
+# The modules sit flat in src and import one another by name, so src is put on the path.
+
+
+import os, sys
+
+
+sys.path.insert( 0, os.path.join( os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ), "src" ) )
+
+
+import tide
+
+
+# A tide.Reading with only what the tests need; import with "from conftest import reading".
+def reading( location, timestamp, level, isHigh = True, date = "date" ):
+    return tide.Reading( date, "time", location, isHigh, level, "url", timestamp )
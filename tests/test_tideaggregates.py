@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import math
+
+from conftest import reading
+from tideaggregates import TideAggregates
+
+
+READINGS = [
+    reading( "A", None, "5.0m", True, date = "Monday" ),
+    reading( "A", None, "1.0m", False, date = "Monday" ),
+    reading( "A", None, "4.5m", True, date = "Monday" ),
+    reading( "A", None, "1.5m", False, date = "Monday" ),
+    reading( "A", None, "3.5m", True, date = "Tuesday" ),
+    reading( "A", None, "2.0m", False, date = "Tuesday" ),
+    reading( "A", None, "4.5m", True, date = "Wednesday" ),
+    reading( "A", None, "2.0m", False, date = "Wednesday" ),
+    reading( "B", None, "2.0m", True, date = "Monday" ), # No low.
+    reading( "B", None, "n/a", True, date = "Monday" ) ]
+
+
+def test_getDay():
+    aggregates = TideAggregates( list( reversed( READINGS ) ) ) # In any order.
+    assert aggregates.getDay( "A", "Monday" ) == ( 5.0, 1.0, 4.0, 1.0 ) # Springs.
+    assert aggregates.getDay( "A", "Tuesday" ) == ( 3.5, 2.0, 1.5, 0.0 ) # Neaps.
+    assert aggregates.getDay( "A", "Wednesday" ) == ( 4.5, 2.0, 2.5, 0.4 )
+    assert aggregates.getDay( "A", "Thursday" ) is None
+
+
+def test_dayWithoutLowIsNaN():
+    maximumHigh, minimumLow, tidalRange, springNeapIndex = TideAggregates( READINGS ).getDay( "B", "Monday" )
+    assert maximumHigh == 2.0
+    assert math.isnan( minimumLow ) and math.isnan( tidalRange ) and math.isnan( springNeapIndex )
+
+
+def test_getStation():
+    aggregates = TideAggregates( READINGS )
+    assert aggregates.getStation( "A" ) == ( 5.0, 1.0, 1.5, 4.0 )
+    assert aggregates.getStation( "C" ) is None
+
+
+def test_noReadings():
+    aggregates = TideAggregates( [ ] )
+    assert aggregates.getDay( "A", "Monday" ) is None
+    assert aggregates.getStation( "A" ) is None
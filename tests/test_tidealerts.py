@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import builtins, importlib, pytest, sys, types
+
+from conftest import reading
+
+
+NOW = 1000000.0
+
+
+class FakeGLib( object ):
+
+    def __init__( self ):
+        self.timers = { }
+        self.nextID = 0
+
+
+    def timeout_add( self, delayInMilliseconds, callback ):
+        self.nextID += 1
+        self.timers[ self.nextID ] = ( delayInMilliseconds, callback )
+        return self.nextID
+
+
+    def source_remove( self, timerID ):
+        del self.timers[ timerID ]
+
+
+    # Run the single armed timer, as the main loop would.
+    def fire( self ):
+        ( timerID, ( delayInMilliseconds, callback ) ), = self.timers.items()
+        del self.timers[ timerID ]
+        callback()
+
+
+class FakeClock( object ):
+
+    def __init__( self ):
+        self.now = NOW
+
+
+    def time( self ):
+        return self.now
+
+
+@pytest.fixture
+def environment( monkeypatch ):
+    glib = FakeGLib()
+    repository = types.ModuleType( "gi.repository" )
+    repository.GLib = glib
+    gi = types.ModuleType( "gi" )
+    gi.repository = repository
+    monkeypatch.setitem( sys.modules, "gi", gi )
+    monkeypatch.setitem( sys.modules, "gi.repository", repository )
+    monkeypatch.delitem( sys.modules, "tidealerts", raising = False )
+    monkeypatch.setattr( builtins, "_", lambda text: text, raising = False )
+    tidealerts = importlib.import_module( "tidealerts" )
+    clock = FakeClock()
+    monkeypatch.setattr( tidealerts, "time", clock )
+    notifications = [ ]
+    scheduler = tidealerts.TideAlertScheduler( lambda summary, body: notifications.append( ( summary, body ) ), None )
+    return scheduler, glib, clock, notifications
+
+
+READINGS = [
+    reading( "A", NOW + 3600, "2.0m", True ),
+    reading( "A", NOW + 7200, "0.0m", False ),
+    reading( "B", NOW + 1800, "3.0m", True ) ]
+
+
+def test_singleTimerForEarliestAlert( environment ):
+    scheduler, glib, clock, notifications = environment
+    scheduler.setRules( [ { "event" : "high", "minutesBefore" : 10 } ] )
+    scheduler.setReadings( READINGS )
+    assert [ delay for delay, callback in glib.timers.values() ] == [ ( 1800 - 600 ) * 1000 ]
+
+    clock.now += 1800 - 600
+    glib.fire()
+    assert notifications == [ ( "High water in 10 minutes", "B: time (3.0m)" ) ]
+    assert [ delay for delay, callback in glib.timers.values() ] == [ 1800 * 1000 ]
+
+
+def test_firedAlertNotRepeatedWhenReadingsRefresh( environment ):
+    scheduler, glib, clock, notifications = environment
+    scheduler.setRules( [ { "event" : "high", "location" : "B" } ] )
+    scheduler.setReadings( READINGS )
+    clock.now += 1800
+    glib.fire()
+    scheduler.setReadings( READINGS )
+    assert len( notifications ) == 1
+    assert glib.timers == { }
+
+
+def test_unchangedReadingsKeepTimer( environment ):
+    scheduler, glib, clock, notifications = environment
+    scheduler.setRules( [ { "event" : "low" } ] )
+    scheduler.setReadings( READINGS )
+    timers = dict( glib.timers )
+    scheduler.setReadings( list( READINGS ) )
+    assert glib.timers == timers
+
+
+def test_heightCrossing( environment ):
+    scheduler, glib, clock, notifications = environment
+    scheduler.setRules( [ { "event" : "below", "height" : 1.0 } ] )
+    scheduler.setReadings( READINGS )
+    ( delay, callback ), = glib.timers.values()
+    assert delay == 5400 * 1000 # Half way down the half cosine from 2m to 0m.
+
+    clock.now += 5400
+    glib.fire()
+    assert notifications == [ ( "Tide below 1.0m", "A: falling to time (0.0m)" ) ]
+
+
+def test_lateAlertDropped( environment ):
+    scheduler, glib, clock, notifications = environment
+    scheduler.setRules( [ { "event" : "high", "location" : "B" } ] )
+    scheduler.setReadings( READINGS )
+    clock.now += 1800 + scheduler.LATE_TOLERANCE_IN_SECONDS + 1 # Such as after a suspend.
+    glib.fire()
+    assert notifications == [ ]
+
+
+def test_invalidRuleSkipped( environment ):
+    scheduler, glib, clock, notifications = environment
+    logged = [ ]
+    scheduler.logging = types.SimpleNamespace( error = logged.append )
+    scheduler.setRules( [ { "event" : "spring" }, { "event" : "high", "location" : "B" } ] )
+    scheduler.setReadings( READINGS )
+    assert len( logged ) == 1
+    assert len( glib.timers ) == 1
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import datetime, os, pytest, tidearchive
+
+
+PARTS = [ ( "station", b'{"name":"The port"}' ), ( "events", b'[{"height":1.5}]' * 100 ) ]
+
+
+def write( directory, station = "0001", day = 1, **kwargs ):
+    return tidearchive.writeArchive(
+        str( directory ) + '/',
+        station,
+        datetime.datetime( 2024, 5, day, 12, 0, 0 ),
+        datetime.date( 2024, 5, 1 ),
+        7,
+        PARTS,
+        compression = tidearchive.COMPRESSION_GZIP,
+        **kwargs )
+
+
+def test_roundTrip( tmp_path ):
+    filename = write( tmp_path )
+    header, parts = tidearchive.readParts( filename )
+    assert header[ "station" ] == "0001"
+    assert header[ "windowDays" ] == 7
+    assert parts == dict( PARTS )
+    assert tidearchive.readPart( filename, "events" ) == PARTS[ 1 ][ 1 ]
+    assert tidearchive.readPart( filename, "missing" ) is None
+
+
+def test_noTemporaryFileLeft( tmp_path ):
+    write( tmp_path )
+    assert [ file for file in os.listdir( tmp_path ) if file.endswith( ".tmp" ) ] == [ ]
+
+
+def test_failedWriteLeavesNothing( tmp_path, monkeypatch ):
+    def replace( source, destination ):
+        raise OSError( "Disc full" )
+
+    monkeypatch.setattr( tidearchive.os, "replace", replace )
+    with pytest.raises( OSError ):
+        write( tmp_path )
+
+    assert os.listdir( tmp_path ) == [ ]
+
+
+def test_oldestArchivesPruned( tmp_path ):
+    filenames = [ write( tmp_path, day = day, maximumAgeInDays = 2 ) for day in range( 1, 6 ) ]
+    write( tmp_path, station = "0002", day = 1, maximumAgeInDays = 2 )
+    assert tidearchive.listArchives( str( tmp_path ) + '/', "0001" ) == filenames[ -3 : ] # Days 3 to 5.
+    assert len( tidearchive.listArchives( str( tmp_path ) + '/', "0002" ) ) == 1
+
+
+def test_monthsKeptByDefault( tmp_path ):
+    write( tmp_path, day = 1 )
+    write( tmp_path, day = 31 )
+    assert len( tidearchive.listArchives( str( tmp_path ) + '/', "0001" ) ) == 2
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import math, numpy, tidecurve
+
+from conftest import reading
+
+
+def test_getHeight():
+    assert tidecurve.getHeight( reading( "A", 0, "1.23m" ) ) == 1.23
+    assert tidecurve.getHeight( reading( "A", 0, " 2 M" ) ) == 2.0
+    assert tidecurve.getHeight( reading( "A", 0, 0.5 ) ) == 0.5
+    assert tidecurve.getHeight( reading( "A", 0, "n/a" ) ) is None
+
+
+def test_getIntervalsPerLocationInTimeOrder():
+    readings = [
+        reading( "A", 200, "1m" ),
+        reading( "B", 50, "3m" ),
+        reading( "A", 0, "2m" ),
+        reading( "A", 100, "n/a" ), # No height.
+        reading( "A", None, "4m" ), # No timestamp.
+        reading( "B", 150, "1m" ) ]
+
+    intervals = tidecurve.getIntervals( readings )
+    assert [ ( interval[ 0 ].getLocation(), interval[ 1 ], interval[ 2 ], interval[ 4 ], interval[ 5 ] ) for interval in intervals ] == [
+        ( "A", 0, 2.0, 200, 1.0 ),
+        ( "B", 50, 3.0, 150, 1.0 ) ]
+
+
+def test_getHeightsFromEvents():
+    heights = tidecurve.getHeightsFromEvents( [ 0, 100, 200 ], [ 0.0, 2.0, 1.0 ], [ -1, 0, 50, 100, 150, 200, 201 ] )
+    assert math.isnan( heights[ 0 ] ) and math.isnan( heights[ -1 ] )
+    assert numpy.allclose( heights[ 1 : -1 ], [ 0.0, 1.0, 2.0, 1.5, 1.0 ] )
+
+
+def test_getHeightsFromTooFewEvents():
+    assert numpy.isnan( tidecurve.getHeightsFromEvents( [ 0 ], [ 1.0 ], [ 0 ] ) ).all()
+
+
+def test_getCrossingTimeLiesOnCurve():
+    crossingTime = tidecurve.getCrossingTime( 0, 2.0, 100, 0.0, 0.5 )
+    assert 50 < crossingTime < 100
+    assert math.isclose( tidecurve.getHeightsFromEvents( [ 0, 100 ], [ 2.0, 0.0 ], [ crossingTime ] )[ 0 ], 0.5 )
+    assert tidecurve.getCrossingTime( 0, 2.0, 100, 0.0, 3.0 ) is None # Never reached.
+    assert tidecurve.getCrossingTime( 0, 2.0, 100, 0.0, 2.0 ) is None # Already there at the start.
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import io, math, numpy, pytest, tidecurve, tideexport
+
+from tidestore import TideEventStore
+
+
+HOUR = 60 * 60
+
+
+@pytest.fixture
+def store( tmp_path ):
+    store = TideEventStore( str( tmp_path / TideEventStore.FILENAME ) )
+    store.upsertEvents( "0001", "First", [ ( 0, True, 2.0 ), ( 6 * HOUR, False, -0.25 ), ( 12 * HOUR, True, 1.9 ) ] )
+    store.upsertEvents( "0002", "Second", [ ( 3 * HOUR, False, 0.5 ), ( 9 * HOUR, True, 3.0 ) ] )
+    yield store
+    store.close()
+
+
+def expected( store, station, timestamps ):
+    eventTimestamps, eventHeights = tideexport.getEvents( store, station, timestamps[ 0 ], timestamps[ -1 ] + 1 )
+    return tidecurve.getHeightsFromEvents( eventTimestamps, eventHeights, timestamps )
+
+
+def test_csv( store, monkeypatch ):
+    monkeypatch.setattr( tideexport, "CHUNK_SAMPLES", 7 ) # Several chunks.
+    fOut = io.StringIO()
+    tideexport.writeCSV( store, [ "0001", "0002" ], 0, 12 * HOUR, 15 * 60, fOut )
+    lines = fOut.getvalue().splitlines()
+    assert lines[ 0 ] == "utc,timestamp,0001,0002"
+    assert lines[ 1 ] == "1970-01-01T00:00:00,0,2.000,"
+    assert len( lines ) == 1 + 12 * 4
+
+    timestamps = numpy.arange( 0, 12 * HOUR, 15 * 60 )
+    for column, station in ( ( 2, "0001" ), ( 3, "0002" ) ):
+        for line, height in zip( lines[ 1 : ], expected( store, station, timestamps ) ):
+            value = line.split( ',' )[ column ]
+            assert value == "" if math.isnan( height ) else float( value ) == pytest.approx( height, abs = 0.0005 )
+
+
+def test_binaryRoundTrip( store, tmp_path, monkeypatch ):
+    monkeypatch.setattr( tideexport, "CHUNK_SAMPLES", 5 )
+    filename = str( tmp_path / "heights.bin" )
+    with open( filename, 'wb' ) as fOut:
+        tideexport.writeBinary( store, [ "0001", "0002" ], 0, 12 * HOUR, 60, fOut )
+
+    header, heights = tideexport.readBinary( filename )
+    assert ( header[ "start" ], header[ "step" ], header[ "count" ], header[ "stations" ] ) == ( 0, 60, 12 * 60, [ "0001", "0002" ] )
+    assert heights.shape == ( 2, 12 * 60 )
+
+    timestamps = numpy.arange( 0, 12 * HOUR, 60 )
+    for row, station in enumerate( header[ "stations" ] ):
+        assert numpy.allclose( heights[ row ], expected( store, station, timestamps ), equal_nan = True, atol = 1e-6 )
+
+
+def test_readBinaryRejectsOtherFiles( tmp_path ):
+    filename = str( tmp_path / "other.bin" )
+    with open( filename, 'wb' ) as fOut:
+        fOut.write( b'{"format": "something else"}\n' )
+
+    with pytest.raises( ValueError ):
+        tideexport.readBinary( filename )
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os, pytest, tidecurve, tideicons
+
+from conftest import reading
+from tideicons import PHASE_FALLING, PHASE_HIGH, PHASE_LOW, PHASE_RISING
+
+
+HOUR = 60 * 60
+
+
+# High water at 0, low water at 6 hours, high again at 12 hours.
+INTERVALS = tidecurve.getIntervals( [
+    reading( "A", 0, "2m", True ),
+    reading( "A", 6 * HOUR, "0m", False ),
+    reading( "A", 12 * HOUR, "2m", True ),
+    reading( "B", 0, "0m", False ),
+    reading( "B", 6 * HOUR, "3m", True ) ] )
+
+
+def test_getState():
+    assert tideicons.getState( INTERVALS, 10 * 60, "A" ) == ( PHASE_HIGH, tideicons.LEVELS - 1 )
+    assert tideicons.getState( INTERVALS, 3 * HOUR, "A" ) == ( PHASE_FALLING, 2 )
+    assert tideicons.getState( INTERVALS, 6 * HOUR - 10 * 60, "A" ) == ( PHASE_LOW, 0 )
+    assert tideicons.getState( INTERVALS, 9 * HOUR, "A" ) == ( PHASE_RISING, 2 )
+    assert tideicons.getState( INTERVALS, 2 * HOUR, "B" ) == ( PHASE_RISING, 1 )
+
+
+def test_getStateOutsideReadings():
+    assert tideicons.getState( INTERVALS, -1, "A" ) is None
+    assert tideicons.getState( INTERVALS, 12 * HOUR, "A" ) is None
+    assert tideicons.getState( INTERVALS, HOUR, "C" ) is None
+    assert tideicons.getState( [ ], 0 ) is None
+
+
+def test_createIconsForEveryState( tmp_path ):
+    directory = str( tmp_path ) + '/'
+    icons = tideicons.createIcons( directory, "FFFFFF" )
+    assert sorted( icons ) == sorted( tideicons.getStates() )
+    assert sorted( os.listdir( directory ) ) == sorted( os.path.basename( filename ) for filename in icons.values() )
+    with open( icons[ ( PHASE_RISING, 0 ) ] ) as fIn:
+        assert fIn.read() == tideicons.getIconSVG( "FFFFFF", PHASE_RISING, 0 )
+
+
+def test_createIconsKeepsExisting( tmp_path ):
+    directory = str( tmp_path ) + '/'
+    filename = tideicons.createIcons( directory, "ffffff" )[ ( PHASE_HIGH, tideicons.LEVELS - 1 ) ]
+    modified = os.stat( filename ).st_mtime_ns
+    os.utime( filename, ns = ( 0, 0 ) )
+    tideicons.createIcons( directory, "ffffff" )
+    assert os.stat( filename ).st_mtime_ns == 0 != modified
+
+
+def test_failedWriteLeavesNothing( tmp_path, monkeypatch ):
+    def replace( source, destination ):
+        raise OSError( "Disc full" )
+
+    monkeypatch.setattr( tideicons.os, "replace", replace )
+    with pytest.raises( OSError ):
+        tideicons.createIcons( str( tmp_path ) + '/', "ffffff" )
+
+    assert os.listdir( tmp_path ) == [ ]
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import pytest, struct, tide, tidecurve, tiderecords
+
+from tidestations import Station
+
+
+def createReadings():
+    return [
+        tide.Reading( "Monday June 02", "04:07 AM", "Ardrossan", True, "3.12m", "https://example.com/0536", 1748833620 ),
+        tide.Reading( "Monday June 02", "10:19 AM", "Ardrossan", False, "0.48m", "https://example.com/0536", 1748856000 ),
+        tide.Reading( "Monday June 02", "", "Ardrossan", True, None, None, None ) ]
+
+
+def assertReadingsEqual( readings, expected ):
+    assert len( readings ) == len( expected )
+    for reading, expectedReading in zip( readings, expected ):
+        assert reading.getDate() == expectedReading.getDate()
+        assert reading.getTime() == expectedReading.getTime()
+        assert reading.getLocation() == expectedReading.getLocation()
+        assert reading.isHigh() == expectedReading.isHigh()
+        assert reading.getLevel() == expectedReading.getLevel()
+        assert reading.getURL() == expectedReading.getURL()
+        assert reading.getTimestamp() == expectedReading.getTimestamp()
+
+
+def test_readingsRoundTrip():
+    readings, metadata = tiderecords.decodeReadings( tiderecords.encodeReadings( createReadings(), { "key" : [ "0536", 7 ] } ) )
+    assertReadingsEqual( readings, createReadings() )
+    assert metadata == { "key" : [ "0536", 7 ] }
+
+
+def test_numericLevelStoredAsText():
+    reading = tide.Reading( "Monday June 02", "04:07 AM", "Ardrossan", True, 3.12, "https://example.com/0536", 1748833620 )
+    readings, metadata = tiderecords.decodeReadings( tiderecords.encodeReadings( [ reading ] ) )
+    assert readings[ 0 ].getLevel() == "3.12"
+    assert tidecurve.getHeight( readings[ 0 ] ) == 3.12
+    assert metadata is None
+
+
+def test_stationsRoundTrip():
+    stations = [ Station( "0536", "Ardrossan", 55.64, -4.82 ), Station( "0001", "Leith", None, None ) ]
+    decoded, metadata = tiderecords.decodeStations( tiderecords.encodeStations( stations, { "fetched" : 1 } ) )
+    assert [ ( station.id, station.name, station.latitude, station.longitude ) for station in decoded ] == \
+        [ ( "0536", "Ardrossan", 55.64, -4.82 ), ( "0001", "Leith", None, None ) ]
+
+    assert metadata == { "fetched" : 1 }
+    assert tiderecords.decodeMetadata( tiderecords.encodeStations( stations, { "fetched" : 1 } ) ) == { "fetched" : 1 }
+
+
+# A later writer appending a field to each record must still be readable.
+def test_trailingFieldsSkipped():
+    buffer = bytearray( tiderecords.encodeReadings( createReadings() ) )
+    headerSize = struct.calcsize( "<4sHHHHIII" )
+    recordSize = tiderecords._READING.size
+    count = len( createReadings() )
+    records = buffer[ headerSize : headerSize + recordSize * count ]
+    widened = b"".join( bytes( records[ index * recordSize : ( index + 1 ) * recordSize ] ) + b"\xff" * 8 for index in range( count ) )
+    header = bytearray( buffer[ : headerSize ] )
+    struct.pack_into( "<H", header, 10, recordSize + 8 )
+    readings, metadata = tiderecords.decodeReadings( bytes( header ) + widened + bytes( buffer[ headerSize + recordSize * count : ] ) )
+    assertReadingsEqual( readings, createReadings() )
+
+
+def test_invalidInputRejected():
+    encoded = tiderecords.encodeReadings( createReadings() )
+    with pytest.raises( ValueError ):
+        tiderecords.decodeReadings( b"TIDR" )
+
+    with pytest.raises( ValueError ):
+        tiderecords.decodeReadings( b"XXXX" + encoded[ 4 : ] )
+
+    with pytest.raises( ValueError ):
+        tiderecords.decodeReadings( encoded[ : -1 ] )
+
+    with pytest.raises( ValueError ):
+        tiderecords.decodeStations( encoded )
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import errno, logging, os, pytest, socket, tide, tideserver, threading
+
+from tideserver import TideReadingsServer
+
+
+@pytest.fixture
+def socketPath( tmp_path ):
+    return str( tmp_path / tideserver.SOCKET_FILENAME )
+
+
+@pytest.fixture
+def server( socketPath ):
+    server = TideReadingsServer( socketPath, logging.getLogger( "test" ) )
+    server.start()
+    yield server
+    server.stop()
+
+
+READINGS = [ tide.Reading( "Monday", "04:07 AM", "Falmouth", True, "5.1m", "url", 1000 ) ]
+STATIONS = [ { "id" : "0005", "name" : "Falmouth", "latitude" : 50.15, "longitude" : -5.05 } ]
+
+
+def test_publishAndRead( server, socketPath ):
+    status, readings = tideserver.request( socketPath, tideserver.PATH_READINGS )
+    assert ( status, readings[ "version" ], readings[ "readings" ] ) == ( 200, 0, [ ] )
+
+    server.publish( READINGS, STATIONS, 2000 )
+    status, readings = tideserver.request( socketPath, tideserver.PATH_READINGS )
+    assert ( readings[ "version" ], readings[ "nextUpdate" ], readings[ "stations" ] ) == ( 1, 2000, STATIONS )
+    assert readings[ "readings" ] == [ {
+        "date" : "Monday", "time" : "04:07 AM", "location" : "Falmouth", "isHigh" : True, "level" : "5.1m", "timestamp" : 1000, "url" : "url" } ]
+
+    assert tideserver.request( socketPath, tideserver.PATH_STATIONS ) == ( 200, { "version" : 1, "stations" : STATIONS } )
+    assert tideserver.request( socketPath, "/unknown" )[ 0 ] == 404
+
+
+def test_socketForUserOnly( server, socketPath ):
+    assert os.stat( socketPath ).st_mode & 0o777 == 0o600
+
+
+def test_changesLongPoll( server, socketPath ):
+    assert tideserver.request( socketPath, tideserver.PATH_CHANGES + "?since=0&timeout=0.1" ) == ( 204, None )
+    assert tideserver.request( socketPath, tideserver.PATH_CHANGES + "?since=x" )[ 0 ] == 400
+
+    timer = threading.Timer( 0.2, server.publish, ( READINGS, STATIONS, None ) )
+    timer.start()
+    status, readings = tideserver.request( socketPath, tideserver.PATH_CHANGES + "?since=0&timeout=10" )
+    timer.join()
+    assert ( status, readings[ "version" ] ) == ( 200, 1 )
+
+
+def test_socketInUseIsNotTakenOver( server, socketPath ):
+    with pytest.raises( OSError ) as error:
+        TideReadingsServer( socketPath, logging.getLogger( "test" ) ).start()
+
+    assert error.value.errno == errno.EADDRINUSE
+    assert tideserver.request( socketPath, tideserver.PATH_READINGS )[ 0 ] == 200 # Still served by the first.
+
+
+def test_staleSocketReplaced( socketPath ):
+    stale = socket.socket( socket.AF_UNIX, socket.SOCK_STREAM )
+    stale.bind( socketPath ) # Bound but never listening, as left by a process which has gone.
+    stale.close()
+
+    server = TideReadingsServer( socketPath, logging.getLogger( "test" ) )
+    server.start()
+    try:
+        assert tideserver.request( socketPath, tideserver.PATH_READINGS )[ 0 ] == 200
+
+    finally:
+        server.stop()
+
+    assert not os.path.exists( socketPath )
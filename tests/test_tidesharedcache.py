@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import fcntl, logging, os, threading, time
+
+from tidesharedcache import SharedCache
+from tidetransport import SharedCacheTransport, Transport, TransportResponse
+
+
+def createCache( tmp_path ):
+    return SharedCache( str( tmp_path / "shared" ) + '/', logging.getLogger( "test" ) )
+
+
+def test_fetchedOnceThenCached( tmp_path ):
+    cache = createCache( tmp_path )
+    fetches = [ ]
+    fetch = lambda: fetches.append( 1 ) or b"content"
+    assert cache.get( "key", 60, fetch ) == b"content"
+    assert cache.get( "key", 60, fetch ) == b"content"
+    assert len( fetches ) == 1
+
+
+def test_staleEntryFetchedAgain( tmp_path ):
+    cache = createCache( tmp_path )
+    cache.get( "key", 60, lambda: b"old" )
+    os.utime( cache.getFilename( "key" ), ( time.time() - 120, time.time() - 120 ) )
+    assert cache.get( "key", 60, lambda: b"new" ) == b"new"
+
+
+def test_nothingCachedForNone( tmp_path ):
+    cache = createCache( tmp_path )
+    assert cache.get( "key", 60, lambda: None ) is None
+    assert not os.path.exists( cache.getFilename( "key" ) )
+
+
+# Open file descriptions lock independently, so threads stand in for processes.
+def test_singleFlight( tmp_path ):
+    fetches = [ ]
+    def fetch():
+        fetches.append( 1 )
+        time.sleep( 0.3 )
+        return b"content"
+
+    results = [ ]
+    threads = [ threading.Thread( target = lambda: results.append( createCache( tmp_path ).get( "key", 60, fetch ) ) ) for i in range( 4 ) ]
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert results == [ b"content" ] * 4
+    assert len( fetches ) == 1
+
+
+def test_lockTimeoutOrCancellationFetchesRegardless( tmp_path ):
+    cache = createCache( tmp_path )
+    lockFile = os.open( cache.getFilename( "key" ) + ".lock", os.O_RDWR | os.O_CREAT )
+    fcntl.flock( lockFile, fcntl.LOCK_EX ) # Held by a stuck process.
+    try:
+        start = time.monotonic()
+        assert cache.get( "key", 60, lambda: b"timed out", lockTimeoutInSeconds = 0.2 ) == b"timed out"
+        os.remove( cache.getFilename( "key" ) )
+        assert cache.get( "key", 60, lambda: b"cancelled", isCancelled = lambda: True ) == b"cancelled"
+        assert time.monotonic() - start < 5
+
+    finally:
+        os.close( lockFile )
+
+
+class FakeTransport( Transport ):
+
+    def __init__( self, statusCode ):
+        self.statusCode = statusCode
+        self.count = 0
+
+
+    def get( self, url, headers = None, timeout = None, cancellation = None ):
+        self.count += 1
+        return TransportResponse( url, self.statusCode, b'{"n":' + str( self.count ).encode() + b'}', 0.1 )
+
+
+def test_transportSharesSuccessOnly( tmp_path ):
+    directory = str( tmp_path / "shared" ) + '/'
+    ok = FakeTransport( 200 )
+    assert SharedCacheTransport( directory, 60, logging.getLogger( "test" ), ok ).get( "https://example.com/a" ).json() == { "n" : 1 }
+    assert SharedCacheTransport( directory, 60, logging.getLogger( "test" ), ok ).get( "https://example.com/a" ).json() == { "n" : 1 }
+    assert ok.count == 1
+
+    failing = FakeTransport( 500 )
+    transport = SharedCacheTransport( directory, 60, logging.getLogger( "test" ), failing )
+    assert transport.get( "https://example.com/b" ).status_code == 500
+    transport.get( "https://example.com/b" )
+    assert failing.count == 2
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import math, random, tidestations
+
+from tidestations import Station, StationSpatialIndex
+
+
+def haversine( latitude0, longitude0, latitude1, longitude1 ):
+    latitude0, longitude0, latitude1, longitude1 = map( math.radians, ( latitude0, longitude0, latitude1, longitude1 ) )
+    a = math.sin( ( latitude1 - latitude0 ) / 2 ) ** 2 + math.cos( latitude0 ) * math.cos( latitude1 ) * math.sin( ( longitude1 - longitude0 ) / 2 ) ** 2
+    return 2 * math.asin( math.sqrt( a ) ) * StationSpatialIndex.EARTH_RADIUS_IN_KM
+
+
+def randomStations( count ):
+    generator = random.Random( 1 )
+    return [ Station( str( index ), "S" + str( index ), generator.uniform( -90, 90 ), generator.uniform( -180, 180 ) ) for index in range( count ) ]
+
+
+def test_nearestMatchesBruteForce():
+    stations = randomStations( 500 )
+    index = StationSpatialIndex( stations )
+    generator = random.Random( 2 )
+    for query in range( 50 ):
+        latitude, longitude = generator.uniform( -90, 90 ), generator.uniform( -180, 180 )
+        expected = sorted( stations, key = lambda station: haversine( latitude, longitude, station.latitude, station.longitude ) )[ : 5 ]
+        nearest = index.getNearest( latitude, longitude, 5 )
+        assert [ station for distance, station in nearest ] == expected
+        for distance, station in nearest:
+            assert math.isclose( distance, haversine( latitude, longitude, station.latitude, station.longitude ), abs_tol = 1e-6 )
+
+
+def test_nearestAcrossAntimeridian():
+    stations = [ Station( "W", "West", 0, -179.5 ), Station( "E", "East", 0, 170 ) ]
+    assert StationSpatialIndex( stations ).getNearest( 0, 179.9 )[ 0 ][ 1 ].id == "W"
+
+
+def test_stationsWithoutCoordinatesIgnored():
+    index = StationSpatialIndex( [ Station( "A", "A" ), Station( "B", "B", 50, -5 ) ] )
+    assert [ station.id for distance, station in index.getNearest( 0, 0, 5 ) ] == [ "B" ]
+    assert StationSpatialIndex( [ ] ).getNearest( 0, 0 ) == [ ]
+
+
+def test_withinBox():
+    stations = randomStations( 500 )
+    index = StationSpatialIndex( stations )
+    for south, west, north, east in ( ( -10, -20, 30, 40 ), ( 0, 170, 60, -170 ) ):
+        within = index.getWithinBox( south, west, north, east )
+        expected = [
+            station for station in stations
+            if south <= station.latitude <= north and ( ( west <= station.longitude <= east ) if west <= east else ( station.longitude >= west or station.longitude <= east ) ) ]
+
+        assert sorted( station.id for station in within ) == sorted( station.id for station in expected )
+        assert [ station.latitude for station in within ] == sorted( station.latitude for station in within )
+
+
+def test_parseLocation():
+    assert tidestations.parseLocation( "50.103, -5.543" ) == ( 50.103, -5.543 )
+    assert tidestations.parseLocation( "50.103 -5.543" ) == ( 50.103, -5.543 )
+    assert tidestations.parseLocation( "91, 0" ) is None
+    assert tidestations.parseLocation( "Newlyn" ) is None
+    assert tidestations.parseLocation( "1, 2, 3" ) is None
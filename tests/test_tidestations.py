@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import json, pytest, tidestations
+
+from tidestations import Station, StationIndex
+
+
+STATIONS = [
+    Station( "0001", "Aberdeen" ),
+    Station( "0002", "Aberdaron" ),
+    Station( "0050", "Port of Ness" ),
+    Station( "0501", "Newlyn" ),
+    Station( "0536", "Falmouth" ),
+    Station( "0123", "Great Yarmouth" ),
+    Station( "1234", "St Mary's" ) ]
+
+
+@pytest.fixture
+def index():
+    return StationIndex( STATIONS )
+
+
+def ids( stations ):
+    return [ station.id for station in stations ]
+
+
+def test_emptyQueryReturnsAll( index ):
+    assert ids( index.search( "" ) ) == ids( STATIONS )
+    assert ids( index.search( "  ", limit = 2 ) ) == [ "0001", "0002" ]
+
+
+def test_prefixOfIdOrWord( index ):
+    assert ids( index.search( "abe" ) ) == [ "0002", "0001" ]
+    assert ids( index.search( "yarm" ) ) == [ "0123" ]
+    assert ids( index.search( "053" ) )[ 0 ] == "0536"
+
+
+def test_laterWordsMustAppearInName( index ):
+    assert ids( index.search( "port ness" ) ) == [ "0050" ]
+    assert "0050" not in ids( index.search( "port falmouth" ) )
+
+
+def test_shortQueryDoesNotMatchOnSharedFirstCharacter( index ):
+    assert ids( index.search( "05" ) ) == [ "0536", "0501" ] # By name.
+    assert ids( index.search( "f" ) ) == [ "0536" ]
+
+
+def test_typoToleratedByTrigrams( index ):
+    assert ids( index.search( "falmuoth" ) ) == [ "0536" ]
+    assert ids( index.search( "newlin" ) ) == [ "0501" ]
+
+
+def test_parseStations():
+    geoJSON = json.dumps( { "features" : [
+        { "properties" : { "Id" : "0536", "Name" : "Falmouth" }, "geometry" : { "coordinates" : [ -5.05, 50.15 ] } },
+        { "properties" : { "Id" : "0001", "Name" : "aberdeen" }, "geometry" : None } ] } )
+
+    stations = tidestations.parseStations( geoJSON )
+    assert ids( stations ) == [ "0001", "0536" ]
+    assert ( stations[ 0 ].latitude, stations[ 0 ].longitude ) == ( None, None )
+    assert ( stations[ 1 ].latitude, stations[ 1 ].longitude ) == ( 50.15, -5.05 )
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import pytest
+
+from tidestore import TideEventStore
+
+
+@pytest.fixture
+def store( tmp_path ):
+    store = TideEventStore( str( tmp_path / TideEventStore.FILENAME ) )
+    yield store
+    store.close()
+
+
+def test_upsertReplacesEventAtSameTime( store ):
+    assert store.upsertEvents( "0001", "The port", [ ( 1000, True, 1.5 ), ( 2000, False, 0.5 ) ] ) == 2
+    store.upsertEvents( "0001", "The port", [ ( 1000, True, 1.75 ) ] )
+    assert store.getEvents( 0, 3000 ) == [ ( "0001", 1000, "The port", True, 1.75 ), ( "0001", 2000, "The port", False, 0.5 ) ]
+
+
+def test_getEventsIsHalfOpenAndFiltered( store ):
+    store.upsertEvents( "0001", "First", [ ( 1000, True, 1.5 ), ( 2000, False, 0.5 ), ( 3000, True, 1.6 ) ] )
+    store.upsertEvents( "0002", "Second", [ ( 1000, True, 2.5 ) ] )
+    assert [ event[ : 2 ] for event in store.getEvents( 1000, 3000 ) ] == [ ( "0001", 1000 ), ( "0002", 1000 ), ( "0001", 2000 ) ]
+    assert [ event[ 1 ] for event in store.getEvents( 0, 5000, station = "0001", isHigh = True ) ] == [ 1000, 3000 ]
+
+
+def test_getNextEventsPerStation( store ):
+    store.upsertEvents( "0001", "First", [ ( timestamp, timestamp % 2000 == 0, 1.0 ) for timestamp in range( 1000, 6000, 1000 ) ] )
+    store.upsertEvents( "0002", "Second", [ ( 4500, True, 2.0 ) ] )
+    assert [ event[ : 2 ] for event in store.getNextEvents( 2, fromTimestamp = 2500 ) ] == [ ( "0001", 3000 ), ( "0001", 4000 ), ( "0002", 4500 ) ]
+    assert [ event[ 1 ] for event in store.getNextEvents( 5, fromTimestamp = 0, isHigh = True ) ] == [ 2000, 4000, 4500 ]
+
+
+def test_getStations( store ):
+    store.upsertEvents( "0002", "Second", [ ( 1000, True, 2.0 ) ] )
+    store.upsertEvents( "0001", "First", [ ( 1000, True, 2.0 ) ] )
+    assert store.getStations() == [ ( "0001", "First" ), ( "0002", "Second" ) ]
+
+
+def test_getReadingsInTimezone( store ):
+    store.upsertEvents( "0001", "The port", [ ( 1719835200, True, 1.234 ) ] ) # 2024-07-01 12:00 UTC.
+    reading = store.getReadings( 1719792000, 1719878400, "0001", "http://url", "Europe/London" )[ 0 ]
+    assert reading.getTime() == "01:00 PM"
+    assert reading.getLevel() == "1.23m"
+    assert reading.isHigh()
+    assert reading.getTimestamp() == 1719835200
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import datetime, numpy, tidetimezone, zoneinfo
+
+
+# Spans the end of British Summer Time, 2024-10-27 01:00 UTC.
+START = 1729641600 # 2024-10-23 00:00 UTC.
+END = 1730419200 # 2024-11-01 00:00 UTC.
+
+
+def test_matchesZoneinfoAcrossTransition():
+    converter = tidetimezone.TimezoneConverter( "Europe/London", START, END )
+    timestamps = numpy.arange( START, END, 599 )
+    timezone = zoneinfo.ZoneInfo( "Europe/London" )
+    expected = [ datetime.datetime.fromtimestamp( int( timestamp ), timezone ).replace( tzinfo = None ) for timestamp in timestamps ]
+    assert converter.toLocalDateTimes( timestamps ) == expected
+
+
+def test_transitionFoundToTheSecond():
+    converter = tidetimezone.TimezoneConverter( "Europe/London", START, END )
+    assert converter.transitionTimestamps.tolist() == [ START, 1729990800 ]
+    assert converter.getOffsets( [ 1729990799, 1729990800 ] ).tolist() == [ 3600, 0 ]
+
+
+def test_outsideWindowUsesNearestOffset():
+    converter = tidetimezone.TimezoneConverter( "Europe/London", START, END )
+    assert converter.getOffsets( [ START - 86400, END + 86400 ] ).tolist() == [ 3600, 0 ]
+
+
+def test_parseUTCTimestampsIgnoresFraction():
+    assert tidetimezone.parseUTCTimestamps( [ "1970-01-01T00:01:00.999", "2024-10-27T01:00:00" ] ).tolist() == [ 60, 1729990800 ]
+
+
+def test_emptyNameIsSystemTimezone( monkeypatch ):
+    monkeypatch.setenv( "TZ", "Asia/Tokyo" )
+    assert tidetimezone.getTimezone( "" ) == zoneinfo.ZoneInfo( "Asia/Tokyo" )
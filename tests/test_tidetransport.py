@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os, pytest, requests, tidetransport
+
+from tidetransport import RecordingTransport, ReplayTransport, Transport, TransportError, TransportResponse
+
+
+URL = "https://example.com/Stations/0536"
+
+
+class FakeTransport( Transport ):
+
+    def __init__( self, statusCode = 200, content = b'{"Name":"Falmouth"}' ):
+        self.statusCode = statusCode
+        self.content = content
+        self.requests = [ ]
+
+
+    def get( self, url, headers = None, timeout = None, cancellation = None ):
+        self.requests.append( ( url, headers, timeout, cancellation ) )
+        return TransportResponse( url, self.statusCode, self.content, 0.25 )
+
+
+def test_recordThenReplay( tmp_path ):
+    directory = str( tmp_path ) + '/'
+    live = FakeTransport()
+    response = RecordingTransport( directory, live ).get( URL, { "Ocp-Apim-Subscription-Key" : "secret" }, 20 )
+    assert response.json() == { "Name" : "Falmouth" }
+
+    replayed = ReplayTransport( directory ).get( URL )
+    assert ( replayed.url, replayed.status_code, replayed.content, replayed.elapsedInSeconds ) == ( URL, 200, live.content, 0.25 )
+    assert replayed.text == '{"Name":"Falmouth"}'
+
+
+def test_recordingHoldsNoHeaders( tmp_path ):
+    directory = str( tmp_path ) + '/'
+    RecordingTransport( directory, FakeTransport() ).get( URL, { "Ocp-Apim-Subscription-Key" : "secret" } )
+    with open( tidetransport.getRecordingFilename( directory, URL ) ) as fIn:
+        assert "secret" not in fIn.read()
+
+    assert [ file for file in os.listdir( directory ) if file.endswith( ".tmp" ) ] == [ ]
+
+
+def test_replayWithoutRecording( tmp_path ):
+    with pytest.raises( TransportError ):
+        ReplayTransport( str( tmp_path ) + '/' ).get( URL )
+
+    assert issubclass( TransportError, requests.exceptions.RequestException ) # Handled as any network error.
+
+
+def test_raiseForStatus():
+    TransportResponse( URL, 200, b"", 0 ).raise_for_status()
+    with pytest.raises( requests.exceptions.HTTPError ):
+        TransportResponse( URL, 404, b"", 0 ).raise_for_status()
+
+
+def test_createTransport( tmp_path ):
+    directory = str( tmp_path ) + '/'
+    assert isinstance( tidetransport.createTransport( tidetransport.MODE_RECORD, directory ), RecordingTransport )
+    assert isinstance( tidetransport.createTransport( tidetransport.MODE_REPLAY, directory ), ReplayTransport )
+    assert isinstance( tidetransport.createTransport( tidetransport.MODE_LIVE, directory ), tidetransport.LiveTransport )
+
+
+# Stands in for indicatorbase.CancellationToken, which needs GTK.
+class FakeCancellation( object ):
+
+    def __init__( self, remainingInSeconds = None ):
+        self.remainingInSeconds = remainingInSeconds
+        self.reason = None
+
+
+    def cancel( self, reason ):
+        self.reason = reason
+
+
+    def isStopped( self ):
+        return self.reason is not None
+
+
+    def getReason( self ):
+        return self.reason
+
+
+    def getRemainingInSeconds( self ):
+        return self.remainingInSeconds
+
+
+    # Cancelled part way through the wait.
+    def wait( self, seconds ):
+        self.cancel( "Preferences opened" )
+        return True
+
+
+def test_timeoutBoundedByCancellation():
+    assert tidetransport.getTimeout( 20, None ) == 20
+    assert tidetransport.getTimeout( 20, FakeCancellation() ) == 20
+    assert tidetransport.getTimeout( 20, FakeCancellation( 5 ) ) == 5
+    assert tidetransport.getTimeout( None, FakeCancellation( 5 ) ) == 5
+
+    cancellation = FakeCancellation( 5 )
+    cancellation.cancel( "Quit" )
+    with pytest.raises( TransportError ):
+        tidetransport.getTimeout( 20, cancellation )
+
+
+def test_replayCancelled( tmp_path ):
+    directory = str( tmp_path ) + '/'
+    RecordingTransport( directory, FakeTransport() ).get( URL )
+
+    with pytest.raises( TransportError, match = "Preferences opened" ):
+        ReplayTransport( directory, delayScale = 1.0 ).get( URL, cancellation = FakeCancellation() )
+
+    cancellation = FakeCancellation()
+    cancellation.cancel( "Quit" )
+    with pytest.raises( TransportError, match = "Quit" ):
+        ReplayTransport( directory ).get( URL, cancellation = cancellation )
+
+
+def test_failedRecordingLeavesNothing( tmp_path, monkeypatch ):
+    def replace( source, destination ):
+        raise OSError( "Disc full" )
+
+    monkeypatch.setattr( tidetransport.os, "replace", replace )
+    with pytest.raises( OSError ):
+        RecordingTransport( str( tmp_path ) + '/', FakeTransport() ).get( URL )
+
+    assert os.listdir( tmp_path ) == [ ]
+
+
+def test_listRecordings( tmp_path ):
+    directory = str( tmp_path ) + '/'
+    assert tidetransport.listRecordings( directory ) == [ ]
+
+    RecordingTransport( directory, FakeTransport() ).get( URL )
+    RecordingTransport( directory, FakeTransport() ).get( "https://example.com/Stations/0001" )
+    assert len( tidetransport.listRecordings( directory ) ) == 2
+    assert tidetransport.listRecordings( directory, "0536" ) == [ tidetransport.getRecordingFilename( directory, URL ) ]
+    assert tidetransport.listRecordings( directory, "9999" ) == [ ]